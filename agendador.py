@@ -0,0 +1,206 @@
+import random
+import re
+import threading
+import time
+import requests # type: ignore
+
+from metricas import obter_metricas
+from sessao_http import obter_sessao
+
+# Limites padrão (requisições por segundo). A Omie limita o consumo por aplicativo e por método;
+# a taxa de cada balde é reduzida automaticamente quando a API sinaliza excesso de requisições
+# e volta a subir aos poucos enquanto as respostas forem bem-sucedidas.
+TAXA_POR_APP = 4.0
+TAXA_POR_ENDPOINT = 2.0
+TAXA_MINIMA = 0.2
+
+MAX_TENTATIVAS = 5
+BACKOFF_BASE = 1.0  # segundos
+BACKOFF_MAXIMO = 60.0  # segundos
+
+# Trechos de faultstring que indicam limite de consumo da Omie
+_FALTAS_LIMITE = ("consumo redundante", "consumo indevido", "too many requests", "limite de requisi")
+
+
+class ErroRequisicaoOmie(requests.exceptions.RequestException):
+    """
+    Falha definitiva de uma requisição à Omie, após esgotar as tentativas ou por erro não recuperável.
+
+    Atributos:
+        call (str): Método da API chamado (ex: ListarMovimentos).
+        tentativas (int): Quantidade de tentativas realizadas.
+        status (int | None): Último status HTTP recebido.
+        faultcode (str | None): Código de falha devolvido pela Omie.
+        faultstring (str | None): Mensagem de falha devolvida pela Omie.
+        limite_consumo (bool): Se a última falha foi de limite de consumo.
+    """
+
+    def __init__(self, mensagem, call=None, tentativas=0, status=None, faultcode=None, faultstring=None,
+                 limite_consumo=False):
+        super().__init__(mensagem)
+        self.call = call
+        self.tentativas = tentativas
+        self.status = status
+        self.faultcode = faultcode
+        self.faultstring = faultstring
+        self.limite_consumo = limite_consumo
+
+
+class BaldeTokens:
+    """
+    Balde de tokens com taxa adaptativa, seguro para uso entre threads.
+
+    Parâmetros:
+        taxa (float): Tokens repostos por segundo (taxa máxima).
+        capacidade (float, opcional): Rajada máxima permitida; por padrão igual à taxa.
+    """
+
+    def __init__(self, taxa: float, capacidade: float = None):
+        self.taxa_maxima = taxa
+        self.taxa = taxa
+        self.capacidade = capacidade or max(taxa, 1.0)
+        self._tokens = self.capacidade
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def adquirir(self):
+        """Consome um token, aguardando o tempo necessário caso o balde esteja vazio."""
+        with self._lock:
+            agora = time.monotonic()
+            self._tokens = min(self.capacidade, self._tokens + (agora - self._ultimo) * self.taxa)
+            self._ultimo = agora
+            # Reserva o token mesmo que o saldo fique negativo; a espera é calculada sobre a dívida
+            self._tokens -= 1
+            espera = -self._tokens / self.taxa if self._tokens < 0 else 0
+        if espera:
+            time.sleep(espera)
+
+    def reduzir(self):
+        """Reduz a taxa pela metade após um sinal de limite de consumo."""
+        with self._lock:
+            self.taxa = max(TAXA_MINIMA, self.taxa / 2)
+
+    def aumentar(self):
+        """Recupera a taxa gradualmente, até a taxa máxima."""
+        with self._lock:
+            self.taxa = min(self.taxa_maxima, self.taxa + self.taxa_maxima * 0.05)
+
+
+class AgendadorRequisicoes:
+    """
+    Executa requisições à Omie respeitando um balde de tokens por app_key e outro por app_key + método,
+    com novas tentativas em backoff exponencial com jitter.
+    """
+
+    def __init__(self, taxa_por_app: float = TAXA_POR_APP, taxa_por_endpoint: float = TAXA_POR_ENDPOINT,
+                 max_tentativas: int = MAX_TENTATIVAS):
+        self.taxa_por_app = taxa_por_app
+        self.taxa_por_endpoint = taxa_por_endpoint
+        self.max_tentativas = max_tentativas
+        self._baldes = {}
+        self._lock = threading.Lock()
+
+    def _balde(self, chave, taxa):
+        with self._lock:
+            if chave not in self._baldes:
+                self._baldes[chave] = BaldeTokens(taxa)
+            return self._baldes[chave]
+
+    def executar(self, url: str, payload: dict, headers: dict) -> dict:
+        """
+        Envia a requisição e devolve o JSON da resposta.
+
+        Levanta:
+            ErroRequisicaoOmie: quando todas as tentativas falham ou a Omie devolve um erro não recuperável.
+        """
+        app_key = payload.get("app_key")
+        call = payload.get("call")
+        baldes = (self._balde(app_key, self.taxa_por_app),
+                  self._balde((app_key, call), self.taxa_por_endpoint))
+
+        metricas = obter_metricas()
+        ultimo_erro = {}
+        for tentativa in range(1, self.max_tentativas + 1):
+            if tentativa > 1:
+                metricas.incrementar("omie_repeticoes_total", call=call)
+            for balde in baldes:
+                balde.adquirir()
+
+            espera_sugerida = None
+            inicio = time.perf_counter()
+            try:
+                response = obter_sessao().post(url, json=payload, headers=headers, timeout=120)
+                metricas.observar("omie_requisicao_segundos", time.perf_counter() - inicio, call=call)
+                metricas.incrementar("omie_bytes_recebidos_total", len(response.content), call=call)
+                dados = _json_ou_none(response)
+                falta = dados.get("faultstring") if isinstance(dados, dict) else None
+
+                if response.ok and not falta:
+                    metricas.incrementar("omie_requisicoes_total", call=call, resultado="ok")
+                    for balde in baldes:
+                        balde.aumentar()
+                    return dados
+
+                faultcode = dados.get("faultcode") if isinstance(dados, dict) else None
+                limite = response.status_code == 429 or _eh_limite_consumo(falta)
+                ultimo_erro = dict(status=response.status_code, faultcode=faultcode, faultstring=falta,
+                                   limite_consumo=limite)
+                metricas.incrementar("omie_requisicoes_total", call=call, resultado="limite" if limite else "erro",
+                                     status=response.status_code)
+
+                if limite:
+                    for balde in baldes:
+                        balde.reduzir()
+                    espera_sugerida = _espera_informada(falta, response)
+                elif (faultcode and "Client" in faultcode) or 400 <= response.status_code < 500:
+                    # Erro de parâmetro/credencial: repetir a requisição não muda o resultado
+                    raise ErroRequisicaoOmie(f"{call}: {falta or response.reason}", call=call,
+                                             tentativas=tentativa, **ultimo_erro)
+
+            except ErroRequisicaoOmie:
+                raise
+            except requests.exceptions.RequestException as e:
+                metricas.incrementar("omie_requisicoes_total", call=call, resultado="falha_conexao")
+                ultimo_erro = dict(status=getattr(e.response, "status_code", None), faultstring=str(e))
+
+            if tentativa < self.max_tentativas:
+                time.sleep(espera_sugerida if espera_sugerida is not None else _backoff(tentativa))
+
+        raise ErroRequisicaoOmie(
+            f"{call}: falha após {self.max_tentativas} tentativas ({ultimo_erro.get('faultstring')})",
+            call=call, tentativas=self.max_tentativas, **ultimo_erro)
+
+
+def _json_ou_none(response):
+    try:
+        return response.json()
+    except ValueError:
+        return None
+
+
+def _eh_limite_consumo(falta) -> bool:
+    return bool(falta) and any(trecho in falta.lower() for trecho in _FALTAS_LIMITE)
+
+
+def _espera_informada(falta, response):
+    """Usa o tempo de espera informado pela API (Retry-After ou 'aguarde N segundos'), se houver."""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), BACKOFF_MAXIMO)
+    encontrado = re.search(r"(\d+)\s*segundo", falta or "", re.IGNORECASE)
+    if encontrado:
+        return min(float(encontrado.group(1)), BACKOFF_MAXIMO)
+    return None
+
+
+def _backoff(tentativa: int) -> float:
+    """Backoff exponencial com jitter completo."""
+    return random.uniform(0, min(BACKOFF_MAXIMO, BACKOFF_BASE * 2 ** (tentativa - 1)))
+
+
+_agendador = AgendadorRequisicoes()
+
+
+def obter_agendador() -> AgendadorRequisicoes:
+    """Retorna o agendador compartilhado por todas as consultas."""
+    return _agendador
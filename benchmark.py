@@ -0,0 +1,261 @@
+"""
+Benchmark ponta a ponta do ETL: extração (contra o mock da Omie), tratamento e carga (SQLite).
+
+Os dados são gerados por omie_sintetico na escala pedida (empresas × registros) e servidos por
+mock_omie com latência e taxa de erro configuráveis. Para cada etapa são medidos o tempo de parede,
+as linhas por segundo e o pico de memória (RSS) durante a etapa, do processo e dos processos filhos
+(ex: o pool do tratamento com --processos), amostrado enquanto a etapa roda.
+
+Uso:
+    python benchmark.py --empresas 4 --movimentos 20000
+    python benchmark.py --empresas 8 --movimentos 5000 --latencia 20 80 --taxa-erro 0.02 --json resultado.json
+    python benchmark.py --empresas 8 --movimentos 20000 --processos 4
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from mock_omie import ServidorOmieMock
+from omie_sintetico import gerar_empresas
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def pico_rss_mb(quem=None):
+    """
+    Pico de memória residente em MB desde o início do processo (None se a plataforma não informa).
+    Com `quem=resource.RUSAGE_CHILDREN`, o do maior processo filho já encerrado.
+    """
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF if quem is None else quem).ru_maxrss
+    # Linux informa em KB; macOS em bytes
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+def _rss_mb(pid="self"):
+    """Memória residente atual de um processo em MB, lida do /proc (None fora do Linux ou se já terminou)."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _filhos(pid="self"):
+    """PIDs dos processos filhos (diretos e indiretos), lidos do /proc."""
+    filhos = []
+    try:
+        for tarefa in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tarefa}/children") as f:
+                filhos.extend(f.read().split())
+    except OSError:
+        return []
+    return filhos + [neto for filho in filhos for neto in _filhos(filho)]
+
+
+class AmostradorRSS:
+    """
+    Amostra em uma thread o RSS do processo e a soma do RSS dos filhos enquanto uma etapa roda,
+    guardando o maior valor de cada um. O ru_maxrss sozinho não serve por etapa: é o pico da vida
+    inteira do processo, e repetiria o da maior etapa em todas as seguintes.
+    Com o contexto fork, as páginas herdadas do pai entram no RSS de cada filho (a soma é um teto).
+    """
+
+    def __init__(self, intervalo: float = 0.01):
+        self.intervalo = intervalo
+        self.pico = None
+        self.pico_filhos = None
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._amostrar, daemon=True)
+
+    def _amostrar(self):
+        while True:
+            atual = _rss_mb()
+            if atual is not None:
+                self.pico = max(self.pico or 0.0, atual)
+                filhos = sum(_rss_mb(pid) or 0.0 for pid in _filhos())
+                self.pico_filhos = max(self.pico_filhos or 0.0, filhos)
+            if self._parar.wait(self.intervalo):
+                return
+
+    def __enter__(self):
+        self._filhos_antes = pico_rss_mb(resource.RUSAGE_CHILDREN) if resource else None
+        self._thread.start()
+        return self
+
+    def __exit__(self, *excecao):
+        self._parar.set()
+        self._thread.join()
+        if self.pico is None:
+            # Sem /proc (ex: macOS): fica o pico da vida do processo, como no ru_maxrss
+            self.pico = pico_rss_mb()
+        if resource is not None:
+            # Filhos que terminaram entre duas amostras: o ru_maxrss dos filhos só sobe se algum
+            # filho encerrado durante a etapa passou do maior pico anterior
+            filhos_depois = pico_rss_mb(resource.RUSAGE_CHILDREN)
+            if filhos_depois > self._filhos_antes:
+                self.pico_filhos = max(self.pico_filhos or 0.0, filhos_depois)
+
+
+class Medicoes:
+    """Acumula o tempo, as linhas e o pico de RSS (do processo e dos filhos) de cada etapa do benchmark."""
+
+    def __init__(self):
+        self.etapas = []
+
+    def medir(self, etapa: str, funcao, *args, **kwargs):
+        with AmostradorRSS() as rss:
+            inicio = time.perf_counter()
+            resultado = funcao(*args, **kwargs)
+            segundos = time.perf_counter() - inicio
+        linhas = _contar_linhas(resultado)
+        self.etapas.append({
+            "etapa": etapa,
+            "segundos": round(segundos, 4),
+            "linhas": linhas,
+            "linhas_por_segundo": round(linhas / segundos) if linhas and segundos else None,
+            "pico_rss_mb": round(rss.pico, 1) if rss.pico is not None else None,
+            "pico_rss_filhos_mb": round(rss.pico_filhos, 1) if rss.pico_filhos else None,
+        })
+        return resultado
+
+    def imprimir(self):
+        print(f"{'etapa':32} {'segundos':>9} {'linhas':>9} {'linhas/s':>11} {'pico RSS (MB)':>14} "
+              f"{'filhos (MB)':>12}")
+        for etapa in self.etapas:
+            linhas_s = etapa["linhas_por_segundo"]
+            rss = etapa["pico_rss_mb"]
+            filhos = etapa["pico_rss_filhos_mb"]
+            print(f"{etapa['etapa']:32} {etapa['segundos']:9.3f} {etapa['linhas'] or 0:9} "
+                  f"{linhas_s if linhas_s is not None else '-':>11} {rss if rss is not None else '-':>14} "
+                  f"{filhos if filhos is not None else '-':>12}")
+
+
+def _contar_linhas(resultado):
+    if resultado is None:
+        return 0
+    if isinstance(resultado, dict):
+        return sum(_contar_linhas(valor) for valor in resultado.values())
+    if isinstance(resultado, int):
+        return resultado
+    return len(resultado)
+
+
+def extrair(dados_empresas: dict, max_workers: int) -> dict:
+    """Extrai as quatro fontes de cada empresa, com as empresas em paralelo (como no main)."""
+    from consultar_api import consultar_categorias, consultar_dre, consultar_movimentos, consultar_orcamentos
+
+    def extrair_empresa(empresa, credenciais):
+        app_key, app_secret = credenciais["APP_KEY"], credenciais["APP_SECRET"]
+        return {
+            "movimentos": consultar_movimentos(app_key, app_secret, empresa, "01/02/2025", "28/02/2025"),
+            "categorias": consultar_categorias(app_key, app_secret, empresa),
+            "orcamentos": consultar_orcamentos(app_key, app_secret, empresa, 2025, 2),
+            "dre": consultar_dre(app_key, app_secret, empresa),
+        }
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futuros = {empresa: executor.submit(extrair_empresa, empresa, credenciais)
+                   for empresa, credenciais in dados_empresas.items()}
+        respostas = {empresa: futuro.result() for empresa, futuro in futuros.items()}
+
+    return {
+        fonte: [item for resposta in respostas.values() for item in resposta[fonte]]
+        for fonte in ("movimentos", "categorias", "orcamentos", "dre")
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--empresas", type=int, default=2)
+    parser.add_argument("--movimentos", type=int, default=10000, help="movimentos por empresa")
+    parser.add_argument("--categorias", type=int, default=500, help="categorias por empresa")
+    parser.add_argument("--orcamentos", type=int, default=200, help="orçamentos por empresa")
+    parser.add_argument("--dre", type=int, default=100, help="contas do DRE por empresa")
+    parser.add_argument("--latencia", type=float, nargs="+", default=[0.0],
+                        help="latência do mock em ms (um valor fixo ou mínimo e máximo)")
+    parser.add_argument("--taxa-erro", type=float, default=0.0, help="fração das requisições com erro 500")
+    parser.add_argument("--empresas-paralelas", type=int, default=4)
+    parser.add_argument("--processos", type=int, default=1, help="processos no tratamento dos movimentos")
+    parser.add_argument("--json", help="grava as medições neste arquivo")
+    args = parser.parse_args()
+
+    medicoes = Medicoes()
+    gerados = medicoes.medir("gerar payloads", gerar_empresas, args.empresas, args.movimentos,
+                             args.categorias, args.orcamentos, args.dre)
+
+    latencia = [ms / 1000 for ms in args.latencia]
+    servidor = ServidorOmieMock(
+        empresas={f"KEY_{empresa}": dados for empresa, dados in gerados.items()},
+        latencia=tuple(latencia) if len(latencia) > 1 else latencia[0],
+        taxa_erro=args.taxa_erro,
+        semente=42,
+    ).iniciar()
+    # A URL base é lida na importação do consultar_api, por isso os módulos do ETL são importados aqui
+    os.environ["OMIE_URL_BASE"] = servidor.url_base
+
+    import agendador
+    from post_banco import carregar_dados, criar_tabelas
+    from sqlalchemy import create_engine
+    from tratar_dados import tratamento_categorias, tratamento_dre, tratamento_orcamentos, tratar_em_paralelo
+
+    # Contra o mock não há limite de consumo; os erros simulados são repetidos quase sem espera
+    agendador.BACKOFF_BASE = 0.01
+    agendador.obter_agendador().taxa_por_app = 10000.0
+    agendador.obter_agendador().taxa_por_endpoint = 10000.0
+
+    dados_empresas = {empresa: {"APP_KEY": f"KEY_{empresa}", "APP_SECRET": "SEGREDO"} for empresa in gerados}
+    try:
+        brutos = medicoes.medir("extração", extrair, dados_empresas, args.empresas_paralelas)
+    finally:
+        servidor.parar()
+
+    tratados = {
+        "movimentacoes": medicoes.medir("tratamento_movimentos", tratar_em_paralelo, brutos["movimentos"],
+                                        "movimentacoes", args.processos),
+        "categorias": medicoes.medir("tratamento_categorias", tratamento_categorias, brutos["categorias"]),
+        "orcamentos": medicoes.medir("tratamento_orcamentos", tratamento_orcamentos, brutos["orcamentos"]),
+        "dre": medicoes.medir("tratamento_dre", tratamento_dre, brutos["dre"]),
+    }
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        engine = create_engine(f"sqlite:///{os.path.join(diretorio, 'benchmark.db')}")
+        criar_tabelas(engine)
+
+        # Mesmos parâmetros de carga usados no main
+        parametros_carga = {
+            "movimentacoes": {"dtinicio": "2025-02-01", "dtfim": "2025-02-28", "empresas": list(gerados)},
+            "categorias": {"modo": "diff"},
+            "orcamentos": {"ano": 2025, "mes": 2},
+            "dre": {"modo": "diff"},
+        }
+
+        def carregar(df, tabela):
+            carregar_dados(df=df, tabela=tabela, engine=engine, **parametros_carga[tabela])
+            return 0 if df is None else len(df)
+
+        for tabela, df in tratados.items():
+            medicoes.medir(f"carregar_dados {tabela}", carregar, df, tabela)
+        engine.dispose()
+
+    print(f"\n{args.empresas} empresa(s), {len(servidor.requisicoes)} requisições ao mock "
+          f"({servidor.erros_simulados} erros simulados)\n")
+    medicoes.imprimir()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"parametros": vars(args), "requisicoes": len(servidor.requisicoes),
+                       "erros_simulados": servidor.erros_simulados, "etapas": medicoes.etapas}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
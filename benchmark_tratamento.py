@@ -0,0 +1,213 @@
+"""
+Benchmark das etapas de tratamento (tratar_dados).
+
+Compara o tratamento_movimentos atual (EsquemaColunar) com a implementação original baseada em
+pd.json_normalize e confere que os dois produzem o mesmo DataFrame. Também compara a conversão das
+colunas de data (pd.to_datetime com dayfirst e inferência de formato, coluna a coluna) com
+converter_datas (formato fixo, cada valor distinto convertido uma vez).
+
+Uso:
+    python benchmark_tratamento.py --linhas 100000 --repeticoes 3
+"""
+import argparse
+import copy
+import time
+
+import numpy as np
+import pandas as pd
+
+from omie_sintetico import gerar_movimentos
+from tratar_dados import PARES_DATA_HORA, TIPOS_MOVIMENTOS, converter_datas, tratamento_movimentos
+
+
+def tratamento_movimentos_json_normalize(lista):
+    """
+    Implementação original de tratamento_movimentos (json_normalize + conversões coluna a coluna),
+    mantida como referência de desempenho e de resultado.
+    """
+    if lista:
+        # Normalizando os dados
+        df = pd.json_normalize(lista,sep="_")
+        # Renomeia as colunas para remover os prefixos 'resumo_' e 'detalhes_'
+        df.columns = df.columns.str.replace('detalhes_', '', regex=False)
+        
+        numerical_columns = [
+            'nCodTitulo', 'nCodCliente', 'nCodCtr', 'nCodOS', 'nCodCC', 'nValorTitulo', 
+            'nValorPIS', 'nValorCOFINS', 'nValorCSLL', 'nValorIR', 'nValorISS', 'nValorINSS', 
+            'nCodProjeto', 'cCodVendedor', 'nCodComprador', 'nCodNF', 'nCodTitRepet', 'nCodMovCC', 
+            'nValorMovCC', 'nCodMovCCRepet', 'nDesconto', 'nJuros', 'nMulta', 'nCodBaixa', 
+            'resumo_nValPago', 'resumo_nValAberto', 'resumo_nDesconto', 'resumo_nJuros', 'resumo_nMulta', 
+            'resumo_nValLiquido'
+        ]
+
+        # Converte para numérico, forçando nulos (erro='coerce')
+        for col in numerical_columns:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+
+        # Converte colunas de data com pd.to_datetime(), forçando nulos (erro='coerce')
+        date_columns = [
+            'dDtEmissao', 'dDtVenc', 'dDtPrevisao', 'dDtPagamento', 'dDtRegistro', 
+            'dDtCredito', 'dDtConcilia', 'dDtInc', 'dDtAlt'
+        ]
+
+        # Converte para datetime, forçando nulos (erro='coerce')
+        for col in date_columns:
+            if col in df.columns:
+                df[col] = pd.to_datetime(df[col], errors='coerce', dayfirst=True)
+
+        tipos_colunas = {
+            'ID': 'Int64',
+            'nCodTitulo': 'Int64',
+            'empresa': 'string',
+            'cCodIntTitulo': 'string',
+            'cNumTitulo': 'string',
+            'dDtEmissao': 'datetime64[ns]',
+            'dDtVenc': 'datetime64[ns]',
+            'dDtPrevisao': 'datetime64[ns]',
+            'dDtPagamento': 'datetime64[ns]',
+            'nCodCliente': 'Int64',
+            'cCPFCNPJCliente': 'string',
+            'nCodCtr': 'Int64',
+            'cNumCtr': 'string',
+            'nCodOS': 'Int64',
+            'cNumOS': 'string',
+            'nCodCC': 'Int64',
+            'cStatus': 'string',
+            'cNatureza': 'string',
+            'cTipo': 'string',
+            'cOperacao': 'string',
+            'cNumDocFiscal': 'string',
+            'cCodCateg': 'string',
+            'cNumParcela': 'string',
+            'nValorTitulo': 'float64',  # Alterado de decimal para float64
+            'nValorPIS': 'float64',
+            'cRetPIS': 'string',
+            'nValorCOFINS': 'float64',
+            'cRetCOFINS': 'string',
+            'nValorCSLL': 'float64',
+            'cRetCSLL': 'string',
+            'nValorIR': 'float64',
+            'cRetIR': 'string',
+            'nValorISS': 'float64',
+            'cRetISS': 'string',
+            'nValorINSS': 'float64',
+            'cRetINSS': 'string',
+            'cCodProjeto': 'Int64',
+            'observacao': 'string',
+            'cCodVendedor': 'Int64',
+            'nCodComprador': 'Int64',
+            'cCodigoBarras': 'string',
+            'cNSU': 'string',
+            'nCodNF': 'Int64',
+            'dDtRegistro': 'datetime64[ns]',
+            'cNumBoleto': 'string',
+            'cChaveNFe': 'string',
+            'cOrigem': 'string',
+            'nCodTitRepet': 'Int64',
+            'cGrupo': 'string',
+            'nCodMovCC': 'Int64',
+            'nValorMovCC': 'float64',
+            'nCodMovCCRepet': 'Int64',
+            'nDesconto': 'float64',
+            'nJuros': 'float64',
+            'nMulta': 'float64',
+            'nCodBaixa': 'Int64',
+            'dDtCredito': 'datetime64[ns]',
+            'dDtConcilia': 'datetime64[ns]',
+            'cHrConcilia': 'string',
+            'cUsConcilia': 'string',
+            'dDtInc': 'datetime64[ns]',
+            'cHrInc': 'string',
+            'cUsInc': 'string',
+            'dDtAlt': 'datetime64[ns]',
+            'cHrAlt': 'string',
+            'cUsAlt': 'string',
+            'resumo_cLiquidado': 'string',
+            'resumo_nValPago': 'float64',
+            'resumo_nValAberto': 'float64',
+            'resumo_nDesconto': 'float64',
+            'resumo_nJuros': 'float64',
+            'resumo_nMulta': 'float64',
+            'resumo_nValLiquido': 'float64'
+        }
+        # Verifica quais colunas existem no DataFrame antes de aplicar os tipos
+        # colunas_existentes = {col: tipos_colunas[col] for col in df.columns if col in tipos_colunas}
+        
+        # Adicionando colunas ausentes com valores padrão
+        for col, tipo in tipos_colunas.items():
+            if col not in df.columns:
+                if tipo.startswith('datetime'):
+                    df[col] = pd.NaT  # Data em branco
+                elif tipo == 'Int64' or tipo == 'float64':
+                    df[col] = np.nan  # Número em branco
+                else:
+                    df[col] = ''  # String em branco
+        # Alterando a tipagem das colunas presentes no DataFrame
+        df = df.astype(tipos_colunas)
+
+        return df
+
+
+def cronometrar(funcao, lista, repeticoes: int) -> float:
+    """Retorna o menor tempo de execução entre as repetições (cada uma sobre uma cópia da lista)."""
+    tempos = []
+    for _ in range(repeticoes):
+        entrada = copy.deepcopy(lista)
+        inicio = time.perf_counter()
+        funcao(entrada)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def datas_to_datetime(colunas: dict) -> dict:
+    """Conversão original das colunas de data: inferência de formato em cada coluna."""
+    return {coluna: pd.to_datetime(valores, errors='coerce', dayfirst=True) for coluna, valores in colunas.items()}
+
+
+def datas_memoizadas(colunas: dict) -> dict:
+    return {coluna: converter_datas(valores) for coluna, valores in colunas.items()}
+
+
+def colunas_de_data(movimentos) -> dict:
+    """Valores brutos (texto DD/MM/AAAA) de cada coluna de data dos movimentos."""
+    nomes = [coluna for coluna, tipo in TIPOS_MOVIMENTOS.items() if tipo.startswith('datetime')]
+    return {
+        coluna: np.array([movimento["detalhes"].get(coluna) for movimento in movimentos], dtype=object)
+        for coluna in nomes
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, default=50000)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    movimentos = gerar_movimentos(args.linhas)
+
+    referencia = tratamento_movimentos_json_normalize(copy.deepcopy(movimentos))
+    atual = tratamento_movimentos(copy.deepcopy(movimentos))
+    atual = atual.drop(columns=list(PARES_DATA_HORA))
+    pd.testing.assert_frame_equal(referencia[atual.columns], atual)
+
+    tempo_referencia = cronometrar(tratamento_movimentos_json_normalize, movimentos, args.repeticoes)
+    tempo_atual = cronometrar(tratamento_movimentos, movimentos, args.repeticoes)
+    print(f"tratamento_movimentos ({args.linhas} linhas)")
+    print(f"  json_normalize  {tempo_referencia:8.3f}s")
+    print(f"  EsquemaColunar  {tempo_atual:8.3f}s  ({tempo_referencia / tempo_atual:.1f}x)")
+
+    datas = colunas_de_data(movimentos)
+    esperado = datas_to_datetime(datas)
+    for coluna, valores in datas_memoizadas(datas).items():
+        np.testing.assert_array_equal(np.asarray(esperado[coluna], dtype='datetime64[ns]'), valores)
+
+    tempo_referencia = cronometrar(datas_to_datetime, datas, args.repeticoes)
+    tempo_atual = cronometrar(datas_memoizadas, datas, args.repeticoes)
+    print(f"colunas de data ({len(datas)} colunas x {args.linhas} linhas)")
+    print(f"  to_datetime(dayfirst)  {tempo_referencia:8.3f}s")
+    print(f"  converter_datas        {tempo_atual:8.3f}s  ({tempo_referencia / tempo_atual:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
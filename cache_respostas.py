@@ -0,0 +1,100 @@
+"""
+Armazenamento em disco das respostas brutas da API da Omie.
+
+Cada resposta é gravada comprimida (gzip) em um arquivo cujo nome é o hash da requisição
+(endpoint, empresa, método e parâmetros, sem as credenciais). Modos:
+
+- 'desligado': nada é lido nem gravado;
+- 'gravar': as respostas da API são gravadas no cache à medida que chegam;
+- 'replay': as respostas vêm apenas do cache, sem nenhum acesso à rede.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+from urllib.parse import urlparse
+
+MODOS = ("desligado", "gravar", "replay")
+
+_lock = threading.Lock()
+_configuracao = {
+    "modo": os.environ.get("OMIE_CACHE_MODO", "desligado"),
+    "diretorio": os.environ.get("OMIE_CACHE_DIR", "cache_omie"),
+}
+
+
+def configurar_cache(modo: str = None, diretorio: str = None):
+    """
+    Define o modo e/ou o diretório do cache de respostas.
+
+    Parâmetros:
+        modo (str, opcional): 'desligado', 'gravar' ou 'replay'.
+        diretorio (str, opcional): Pasta onde as respostas ficam armazenadas.
+    """
+    if modo is not None and modo not in MODOS:
+        raise ValueError(f"Modo de cache inválido: {modo}. Use um de {MODOS}.")
+    with _lock:
+        if modo is not None:
+            _configuracao["modo"] = modo
+        if diretorio is not None:
+            _configuracao["diretorio"] = diretorio
+
+
+def modo_cache() -> str:
+    return _configuracao["modo"]
+
+
+def identidade_requisicao(url: str, empresa: str, payload: dict) -> dict:
+    """Campos que identificam uma requisição no cache; as credenciais ficam de fora."""
+    # Só o caminho do endpoint, para o cache valer também contra um servidor local (OMIE_URL_BASE)
+    endpoint = urlparse(url).path.split("/api/v1/", 1)[-1].strip("/")
+    return {
+        "endpoint": endpoint,
+        "empresa": empresa,
+        "call": payload.get("call"),
+        "param": payload.get("param"),
+    }
+
+
+def chave_requisicao(url: str, empresa: str, payload: dict) -> str:
+    """Hash SHA-256 da identidade da requisição, usado como nome do arquivo no cache."""
+    identidade = json.dumps(identidade_requisicao(url, empresa, payload), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(identidade.encode("utf-8")).hexdigest()
+
+
+def _caminho(chave: str) -> str:
+    return os.path.join(_configuracao["diretorio"], chave[:2], f"{chave}.json.gz")
+
+
+def gravar_resposta(url: str, empresa: str, payload: dict, dados: dict) -> str:
+    """
+    Grava a resposta no cache (arquivo temporário + rename, para nunca deixar um arquivo pela metade).
+
+    Retorno:
+        str: Chave (hash) da resposta gravada.
+    """
+    chave = chave_requisicao(url, empresa, payload)
+    caminho = _caminho(chave)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+
+    conteudo = {"requisicao": identidade_requisicao(url, empresa, payload), "resposta": dados}
+    temporario = f"{caminho}.{threading.get_ident()}.tmp"
+    with gzip.open(temporario, "wt", encoding="utf-8") as f:
+        json.dump(conteudo, f, ensure_ascii=False)
+    os.replace(temporario, caminho)
+    return chave
+
+
+def ler_resposta(url: str, empresa: str, payload: dict):
+    """
+    Lê a resposta de uma requisição no cache.
+
+    Retorno:
+        dict | None: A resposta gravada, ou None se a requisição não está no cache.
+    """
+    caminho = _caminho(chave_requisicao(url, empresa, payload))
+    if not os.path.exists(caminho):
+        return None
+    with gzip.open(caminho, "rt", encoding="utf-8") as f:
+        return json.load(f)["resposta"]
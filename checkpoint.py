@@ -0,0 +1,197 @@
+"""
+Checkpoint da extração: cada resposta da Omie é gravada em um SQLite local assim que chega.
+
+A unidade é a requisição (empresa, método, página ou mês). Se o processo cair no meio da extração,
+a próxima execução com a mesma identidade (ex: a mesma data de referência) reaproveita as unidades
+já concluídas e só consulta o que falta, inclusive no meio de uma paginação. Unidades gravadas
+por uma execução com outra identidade são descartadas ao abrir o checkpoint, e o checkpoint é
+limpo quando a execução termina com sucesso.
+
+As unidades concluídas também podem ser lidas sem a API (`carregar_registros`), por exemplo
+para carregar no banco o que já foi extraído antes da falha.
+
+Exemplo de uso:
+    configurar_checkpoint("checkpoint_extracao.db", execucao="2025-02-10")
+    ...
+    obter_checkpoint().limpar()
+"""
+import gzip
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+from cache_respostas import chave_requisicao, identidade_requisicao
+
+# Arquivo padrão do checkpoint
+ARQUIVO_CHECKPOINT = "checkpoint_extracao.db"
+
+# Chave da lista de registros na resposta de cada método da Omie
+CHAVES_REGISTROS = {
+    "ListarMovimentos": "movimentos",
+    "ListarCategorias": "categoria_cadastro",
+    "ListarOrcamentos": "ListaOrcamentos",
+    "ListarCadastroDRE": "dreLista",
+}
+
+
+class CheckpointExtracao:
+    """
+    Respostas da Omie já obtidas na execução atual, guardadas em SQLite.
+
+    Parâmetros:
+        arquivo (str): Caminho do banco SQLite do checkpoint.
+        execucao (str): Identidade da execução; unidades de outra execução são descartadas.
+    """
+
+    def __init__(self, arquivo: str = ARQUIVO_CHECKPOINT, execucao: str = ""):
+        self.arquivo = arquivo
+        self.execucao = execucao
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(arquivo, check_same_thread=False)
+        with self._lock, self._conexao:
+            self._conexao.execute("PRAGMA journal_mode=WAL")
+            self._conexao.execute(
+                "CREATE TABLE IF NOT EXISTS unidades ("
+                " chave TEXT PRIMARY KEY, execucao TEXT NOT NULL, empresa TEXT, call TEXT,"
+                " unidade TEXT, param TEXT, registros INTEGER, resposta BLOB, concluida_em TEXT)"
+            )
+            descartadas = self._conexao.execute(
+                "DELETE FROM unidades WHERE execucao <> ?", (execucao,)).rowcount
+        self.descartadas = descartadas
+
+    def ler(self, url: str, empresa: str, payload: dict):
+        """
+        Resposta já gravada para a requisição na execução atual.
+
+        Retorno:
+            dict | None: A resposta, ou None se a unidade ainda não foi concluída.
+        """
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT resposta FROM unidades WHERE chave = ?", (chave_requisicao(url, empresa, payload),)
+            ).fetchone()
+        return None if linha is None else json.loads(gzip.decompress(linha[0]))
+
+    def gravar(self, url: str, empresa: str, payload: dict, dados: dict, unidade: str = None):
+        """
+        Grava a resposta de uma unidade concluída (a gravação é confirmada antes de retornar).
+
+        Parâmetros:
+            url, empresa, payload: Identificam a requisição (as credenciais ficam de fora).
+            dados (dict): JSON da resposta.
+            unidade (str, opcional): Rótulo legível da unidade (ex: 'pagina 3', '2025-02').
+        """
+        identidade = identidade_requisicao(url, empresa, payload)
+        registros = dados.get(CHAVES_REGISTROS.get(identidade["call"]), []) if isinstance(dados, dict) else []
+        resposta = gzip.compress(json.dumps(dados, ensure_ascii=False).encode("utf-8"), compresslevel=1)
+        with self._lock, self._conexao:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO unidades VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (chave_requisicao(url, empresa, payload), self.execucao, empresa, identidade["call"],
+                 unidade, json.dumps(identidade["param"], sort_keys=True, ensure_ascii=False),
+                 len(registros), resposta, datetime.now().isoformat(timespec="seconds")),
+            )
+
+    def descartar(self, url: str, empresa: str, payload: dict):
+        """
+        Remove a unidade de uma requisição cuja resposta não faz parte do resultado
+        (ex: a página 1 de uma faixa de datas que foi dividida em faixas menores).
+        """
+        with self._lock, self._conexao:
+            self._conexao.execute(
+                "DELETE FROM unidades WHERE chave = ?", (chave_requisicao(url, empresa, payload),))
+
+    def unidades(self, empresa: str = None, call: str = None) -> list:
+        """
+        Lista as unidades concluídas, sem o conteúdo.
+
+        Retorno:
+            list: Dicts com empresa, call, unidade, param, registros e concluida_em.
+        """
+        consulta, valores = self._filtro(empresa, call)
+        with self._lock:
+            linhas = self._conexao.execute(
+                f"SELECT empresa, call, unidade, param, registros, concluida_em FROM unidades{consulta}"
+                " ORDER BY empresa, call, concluida_em", valores
+            ).fetchall()
+        colunas = ("empresa", "call", "unidade", "param", "registros", "concluida_em")
+        return [dict(zip(colunas, linha)) for linha in linhas]
+
+    def carregar_registros(self, empresa: str = None, call: str = None) -> list:
+        """
+        Registros das unidades concluídas, no mesmo formato devolvido pelas funções de consultar_api
+        (com a empresa e, nos orçamentos, o ano e o mês preenchidos).
+
+        Parâmetros:
+            empresa (str, opcional): Apenas desta empresa.
+            call (str, opcional): Apenas deste método (ex: 'ListarMovimentos').
+
+        Retorno:
+            list: Registros brutos, prontos para as funções tratamento_*.
+        """
+        consulta, valores = self._filtro(empresa, call)
+        with self._lock:
+            linhas = self._conexao.execute(
+                f"SELECT empresa, call, param, resposta FROM unidades{consulta} ORDER BY rowid", valores
+            ).fetchall()
+
+        registros = []
+        for nome, metodo, param, resposta in linhas:
+            lista = json.loads(gzip.decompress(resposta)).get(CHAVES_REGISTROS.get(metodo), [])
+            extras = {"empresa": nome}
+            if metodo == "ListarOrcamentos":
+                param = (json.loads(param) or [{}])[0]
+                extras.update(nAno=param.get("nAno"), nMes=param.get("nMes"))
+            for registro in lista:
+                registro.update(extras)
+            registros.extend(lista)
+        return registros
+
+    def limpar(self):
+        """Remove todas as unidades (chamado quando a execução termina com sucesso)."""
+        with self._lock, self._conexao:
+            self._conexao.execute("DELETE FROM unidades")
+
+    def fechar(self):
+        with self._lock:
+            self._conexao.close()
+
+    @staticmethod
+    def _filtro(empresa, call):
+        condicoes, valores = [], []
+        if empresa is not None:
+            condicoes.append("empresa = ?")
+            valores.append(empresa)
+        if call is not None:
+            condicoes.append("call = ?")
+            valores.append(call)
+        return (" WHERE " + " AND ".join(condicoes) if condicoes else ""), tuple(valores)
+
+
+_checkpoint = None
+_lock = threading.Lock()
+
+
+def configurar_checkpoint(arquivo: str = ARQUIVO_CHECKPOINT, execucao: str = ""):
+    """
+    Ativa o checkpoint da extração para a execução informada (arquivo None desliga).
+
+    Parâmetros:
+        arquivo (str, opcional): Caminho do banco SQLite do checkpoint.
+        execucao (str, opcional): Identidade da execução (ex: a data de referência).
+
+    Retorno:
+        CheckpointExtracao | None: O checkpoint ativo.
+    """
+    global _checkpoint
+    with _lock:
+        if _checkpoint is not None:
+            _checkpoint.fechar()
+        _checkpoint = CheckpointExtracao(arquivo, execucao) if arquivo else None
+        return _checkpoint
+
+
+def obter_checkpoint():
+    """Retorna o checkpoint ativo do processo, ou None se o checkpoint está desligado."""
+    return _checkpoint
@@ -1,6 +1,17 @@
 import requests # type: ignore
 import math
 import logging
+import os
+import copy
+import time
+from datetime import date, datetime, timedelta
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from agendador import ErroRequisicaoOmie, obter_agendador  # noqa: F401
+from cache_respostas import modo_cache, ler_resposta, gravar_resposta
+from checkpoint import obter_checkpoint
+from metricas import obter_metricas
+from tratar_dados import projetar_registros
 
 # Configuração do Logger
 logging.basicConfig(
@@ -21,22 +32,408 @@ def log_error(message: str, exc: Exception, payload=None, response=None):
     if response:
         logging.error(f"Response: {response.text if response else 'No response'}")
 
-# fazer requisicao e caso de erro, repetir até 5x
-def fazer_requisicao(url, payload, headers):
-    tentativas = 0
-    while tentativas < 5:
+# URL base da API; pode ser apontada para um servidor local (ex: mock_omie.py) via variável de ambiente
+URL_BASE = os.environ.get("OMIE_URL_BASE", "https://app.omie.com.br/api/v1").rstrip("/")
+
+# Quantidade padrão de páginas buscadas simultaneamente por consulta
+MAX_WORKERS_PAGINAS = 4
+
+# Poda cada registro recebido para os campos usados no tratamento (ver tratar_dados.PROJECOES)
+PROJETAR_REGISTROS = True
+
+# Movimentos: uma faixa de datas com mais registros que isto é dividida em faixas menores
+LIMITE_REGISTROS_FAIXA = 5000
+
+# Quantidade de faixas de datas de movimentos buscadas simultaneamente por empresa
+MAX_FAIXAS_PARALELAS = 4
+
+# fazer requisicao respeitando os limites de consumo da Omie e repetindo com backoff em caso de erro
+def fazer_requisicao(url, payload, headers, empresa=None, unidade=None):
+    """
+    Envia uma requisição à Omie pelo agendador compartilhado.
+
+    Conforme o modo do cache de respostas (ver cache_respostas), a resposta é gravada em disco
+    ou, no modo 'replay', lida do disco sem acessar a rede. Com o checkpoint ativo (ver checkpoint),
+    uma requisição já concluída nesta execução não é repetida e cada resposta nova é gravada nele.
+
+    Parâmetros:
+        unidade (str, opcional): Rótulo da unidade no checkpoint (ex: 'pagina 3', '2025-02').
+
+    Retorno:
+        dict: JSON da resposta.
+
+    Levanta:
+        ErroRequisicaoOmie: quando a requisição falha definitivamente ou, no replay, não está no cache.
+    """
+    modo = modo_cache()
+    if modo == "replay":
+        dados = ler_resposta(url, empresa, payload)
+        if dados is None:
+            raise ErroRequisicaoOmie(f"{payload.get('call')}: resposta ausente no cache (replay) para {empresa}",
+                                     call=payload.get("call"))
+        obter_metricas().incrementar("omie_respostas_replay_total", call=payload.get("call"))
+        return dados
+
+    checkpoint = obter_checkpoint()
+    if checkpoint is not None:
+        dados = checkpoint.ler(url, empresa, payload)
+        if dados is not None:
+            obter_metricas().incrementar("omie_respostas_checkpoint_total", call=payload.get("call"))
+            return dados
+
+    dados = obter_agendador().executar(url, payload, headers)
+    if modo == "gravar":
+        gravar_resposta(url, empresa, payload, dados)
+    if checkpoint is not None:
+        checkpoint.gravar(url, empresa, payload, dados, unidade)
+    return dados
+
+
+def iterar_paginas(url, payload, headers, paginas, montar_param, max_workers: int = MAX_WORKERS_PAGINAS, empresa=None):
+    """
+    Busca várias páginas de um endpoint em paralelo, com no máximo `max_workers` requisições simultâneas,
+    e devolve as respostas uma a uma, na ordem das páginas.
+
+    Cada página recebe a sua própria cópia do payload, então nenhuma requisição
+    enxerga o parâmetro de página de outra. No máximo `max_workers` respostas ficam em memória
+    aguardando o consumidor.
+
+    Parâmetros:
+        url (str): Endereço do endpoint.
+        payload (dict): Payload base (call, app_key, app_secret, param).
+        headers (dict): Cabeçalhos da requisição.
+        paginas (iterable): Números das páginas a serem buscadas.
+        montar_param (callable): Recebe (param, pagina) e preenche os campos de paginação em `param`.
+        max_workers (int, opcional): Quantidade máxima de requisições simultâneas.
+        empresa (str, opcional): Empresa consultada (identifica as respostas no cache).
+
+    Retorno:
+        generator: Respostas de cada página, na mesma ordem de `paginas`.
+    """
+    paginas = list(paginas)
+
+    def buscar(pagina):
+        payload_pagina = copy.deepcopy(payload)
+        montar_param(payload_pagina["param"][0], pagina)
+        inicio = time.perf_counter()
+        dados = fazer_requisicao(url, payload_pagina, headers, empresa, unidade=f"pagina {pagina}")
+        duracao = time.perf_counter() - inicio
+        obter_metricas().observar("omie_pagina_segundos", duracao, call=payload["call"], empresa=empresa)
+        log_message(f"{payload['call']} página {pagina} obtida em {duracao:.3f}s")
+        return dados
+
+    if max_workers <= 1 or len(paginas) <= 1:
+        for pagina in paginas:
+            yield buscar(pagina)
+        return
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(paginas))) as executor:
+        pendentes = deque()
+        proximas = iter(paginas)
+        for pagina in proximas:
+            pendentes.append(executor.submit(buscar, pagina))
+            if len(pendentes) >= max_workers:
+                break
+        # Entrega sempre a página mais antiga e só então agenda a próxima, mantendo a ordem
+        while pendentes:
+            dados = pendentes.popleft().result()
+            for pagina in proximas:
+                pendentes.append(executor.submit(buscar, pagina))
+                break
+            yield dados
+
+
+def buscar_paginas(url, payload, headers, paginas, montar_param, max_workers: int = MAX_WORKERS_PAGINAS, empresa=None) -> list:
+    """
+    Igual a `iterar_paginas`, mas devolve todas as respostas de uma vez.
+
+    Retorno:
+        list: Respostas de cada página, na mesma ordem de `paginas`.
+    """
+    return list(iterar_paginas(url, payload, headers, paginas, montar_param, max_workers, empresa))
+
+
+class EndpointPaginado:
+    """
+    Descrição de um endpoint paginado da Omie: onde ele fica e como se chamam os campos de paginação.
+
+    Parâmetros:
+        caminho (str): Caminho do endpoint a partir da URL base (ex: "financas/mf/").
+        call (str): Método chamado (ex: "ListarMovimentos").
+        campo_lista (str): Campo da resposta com a lista de registros.
+        campo_pagina (str): Parâmetro com o número da página.
+        campo_por_pagina (str): Parâmetro com a quantidade de registros por página.
+        campo_total_paginas (str): Campo da resposta com o total de páginas.
+        campo_total_registros (str): Campo da resposta com o total de registros.
+        registros_por_pagina (int, opcional): Tamanho de página usado nas consultas.
+        tabela (str, opcional): Tabela de destino, cuja projeção poda os registros recebidos.
+    """
+
+    def __init__(self, caminho: str, call: str, campo_lista: str, campo_pagina: str, campo_por_pagina: str,
+                 campo_total_paginas: str, campo_total_registros: str, registros_por_pagina: int = 500,
+                 tabela: str = None):
+        self.caminho = caminho
+        self.call = call
+        self.campo_lista = campo_lista
+        self.campo_pagina = campo_pagina
+        self.campo_por_pagina = campo_por_pagina
+        self.campo_total_paginas = campo_total_paginas
+        self.campo_total_registros = campo_total_registros
+        self.registros_por_pagina = registros_por_pagina
+        self.tabela = tabela
+
+    def total_paginas(self, dados: dict) -> int:
+        """Total de páginas informado na resposta (ou calculado pelo total de registros)."""
+        total = dados.get(self.campo_total_paginas)
+        if total is None:
+            total = math.ceil(dados.get(self.campo_total_registros, 0) / self.registros_por_pagina)
+        return int(total)
+
+
+ENDPOINT_MOVIMENTOS = EndpointPaginado(
+    "financas/mf/", "ListarMovimentos", "movimentos",
+    "nPagina", "nRegPorPagina", "nTotPaginas", "nTotRegistros", tabela="movimentacoes",
+)
+ENDPOINT_CATEGORIAS = EndpointPaginado(
+    "geral/categorias/", "ListarCategorias", "categoria_cadastro",
+    "pagina", "registros_por_pagina", "total_de_paginas", "total_de_registros", tabela="categorias",
+)
+
+
+def _consulta_paginada(endpoint: EndpointPaginado, app_key: str, app_secret: str, filtros: dict = None) -> tuple:
+    """Monta a URL, o payload base, os cabeçalhos e a função de paginação de uma consulta ao endpoint."""
+    url = f"{URL_BASE}/{endpoint.caminho}"
+    payload = {
+        "call": endpoint.call,
+        "app_key": app_key,
+        "app_secret": app_secret,
+        "param": [dict(filtros or {})],
+    }
+    headers = {"Content-Type": "application/json"}
+
+    def montar_param(param, pagina):
+        param[endpoint.campo_pagina] = pagina
+        param[endpoint.campo_por_pagina] = endpoint.registros_por_pagina
+
+    return url, payload, headers, montar_param
+
+
+def primeira_pagina(endpoint: EndpointPaginado, app_key: str, app_secret: str, empresa: str, filtros: dict = None) -> dict:
+    """
+    Busca a página 1 (de tamanho cheio) de uma consulta, que também informa os totais.
+
+    Retorno:
+        dict: JSON da resposta, que pode ser repassado a `paginar` para não ser pedido de novo.
+    """
+    url, payload, headers, montar_param = _consulta_paginada(endpoint, app_key, app_secret, filtros)
+    log_message(f"Realizando a primeira requisição de {endpoint.call} da {empresa}")
+    return next(iterar_paginas(url, payload, headers, [1], montar_param, 1, empresa))
+
+
+def descartar_primeira_pagina(endpoint: EndpointPaginado, app_key: str, app_secret: str, empresa: str,
+                              filtros: dict = None):
+    """
+    Remove do checkpoint a página 1 de uma consulta cujos registros não serão usados, para que
+    `carregar_registros` não devolva esses registros junto com os das consultas que a substituíram.
+    """
+    checkpoint = obter_checkpoint()
+    if checkpoint is None:
+        return
+    url, payload, _, montar_param = _consulta_paginada(endpoint, app_key, app_secret, filtros)
+    montar_param(payload["param"][0], 1)
+    checkpoint.descartar(url, empresa, payload)
+
+
+def paginar(endpoint: EndpointPaginado, app_key: str, app_secret: str, empresa: str, filtros: dict = None,
+            max_workers: int = MAX_WORKERS_PAGINAS, primeira: dict = None):
+    """
+    Percorre todas as páginas de um endpoint paginado da Omie, devolvendo os registros de cada página.
+
+    A página 1 já é pedida com o tamanho cheio e informa os totais, então não há uma requisição
+    só para contar os registros. As demais páginas são buscadas em paralelo; uma página com menos
+    registros que o tamanho da página é a última, e nenhuma página seguinte é consumida.
+
+    Parâmetros:
+        endpoint (EndpointPaginado): Descrição do endpoint.
+        app_key (str): Chave de acesso da API da Omie.
+        app_secret (str): Segredo de acesso da API da Omie.
+        empresa (str): Nome da empresa consultada; preenchida em cada registro.
+        filtros (dict, opcional): Parâmetros adicionais da consulta (ex: datas).
+        max_workers (int, opcional): Quantidade de páginas buscadas simultaneamente.
+        primeira (dict, opcional): Resposta da página 1 já obtida com `primeira_pagina`.
+
+    Retorno:
+        generator: Listas de registros, uma por página, na ordem das páginas.
+
+    Levanta:
+        ErroRequisicaoOmie: quando alguma página não pôde ser obtida.
+    """
+    url, payload, headers, montar_param = _consulta_paginada(endpoint, app_key, app_secret, filtros)
+    por_pagina = endpoint.registros_por_pagina
+
+    def registros(dados):
+        lista = dados.get(endpoint.campo_lista, [])
+        if PROJETAR_REGISTROS and endpoint.tabela:
+            lista = projetar_registros(lista, endpoint.tabela)
+        for registro in lista:
+            registro["empresa"] = empresa
+        return lista
+
+    try:
+        if primeira is None:
+            primeira = primeira_pagina(endpoint, app_key, app_secret, empresa, filtros)
+        total_paginas = endpoint.total_paginas(primeira)
+        log_message(f"Total de registros: {primeira.get(endpoint.campo_total_registros, 0)}. "
+                    f"Total de páginas: {total_paginas}.")
+
+        lista = registros(primeira)
+        if lista:
+            yield lista
+        if len(lista) < por_pagina:
+            return
+
+        for dados in iterar_paginas(url, payload, headers, range(2, total_paginas + 1), montar_param, max_workers, empresa):
+            lista = registros(dados)
+            if lista:
+                yield lista
+            if len(lista) < por_pagina:
+                break
+
+    except requests.exceptions.RequestException as e:
+        log_error(f"Erro na requisição durante a consulta de {endpoint.call} da {empresa}", e, payload)
+        raise
+
+
+def dividir_periodo(inicio: date, fim: date, partes: int) -> list:
+    """
+    Divide o período [inicio, fim] em até `partes` faixas contíguas de dias inteiros, de tamanhos parecidos.
+
+    Retorno:
+        list: Tuplas (início, fim) de cada faixa, em ordem cronológica.
+    """
+    dias = (fim - inicio).days + 1
+    partes = max(1, min(partes, dias))
+    return [
+        (inicio + timedelta(days=dias * i // partes), inicio + timedelta(days=dias * (i + 1) // partes - 1))
+        for i in range(partes)
+    ]
+
+
+def chave_movimento(movimento: dict) -> tuple:
+    """Identifica um movimento (título e movimento de conta corrente) na junção das faixas."""
+    detalhes = movimento.get("detalhes", {})
+    return detalhes.get("nCodTitulo"), detalhes.get("nCodMovCC")
+
+
+def consultar_movimentos_por_faixas(app_key: str, app_secret: str, empresa: str, dtinicio: str, dtfim: str,
+                                    max_workers: int = MAX_WORKERS_PAGINAS, limite: int = LIMITE_REGISTROS_FAIXA,
+                                    max_faixas: int = MAX_FAIXAS_PARALELAS) -> list:
+    """
+    Consulta os movimentos de um período dividindo-o em faixas de datas de emissão buscadas em paralelo.
+
+    A consulta começa pelo período inteiro; uma faixa cuja página 1 informa mais de `limite` registros
+    é dividida em faixas menores (proporcionalmente ao total, até faixas de um dia), e as demais são
+    paginadas aproveitando a página 1 já obtida. Assim cada faixa tem no máximo algumas páginas, com
+    tempo e repetições limitados independente do tamanho da empresa. As faixas são unidas em ordem
+    cronológica, sem repetir um movimento que apareça em mais de uma faixa.
+
+    Parâmetros:
+        app_key (str): Chave de acesso da API da Omie.
+        app_secret (str): Segredo de acesso da API da Omie.
+        empresa (str): Nome da empresa consultada.
+        dtinicio (str): Data de início no formato "DD/MM/AAAA".
+        dtfim (str): Data de fim no formato "DD/MM/AAAA".
+        max_workers (int, opcional): Quantidade de páginas de uma faixa buscadas simultaneamente.
+        limite (int, opcional): Máximo de registros de uma faixa antes de dividi-la.
+        max_faixas (int, opcional): Quantidade de faixas buscadas simultaneamente.
+
+    Retorno:
+        list: Lista contendo todas as movimentações do período.
+
+    Levanta:
+        ErroRequisicaoOmie: quando alguma página de alguma faixa não pôde ser obtida.
+    """
+    formato = "%d/%m/%Y"
+
+    def filtros(faixa):
+        return {"dDtEmisDe": faixa[0].strftime(formato), "dDtEmisAte": faixa[1].strftime(formato)}
+
+    def buscar(faixa):
+        primeira = primeira_pagina(ENDPOINT_MOVIMENTOS, app_key, app_secret, empresa, filtros(faixa))
+        total = primeira.get(ENDPOINT_MOVIMENTOS.campo_total_registros, 0)
+        if total > limite and faixa[1] > faixa[0]:
+            # A página 1 da faixa inteira só serviu para contar; os registros vêm das subfaixas
+            descartar_primeira_pagina(ENDPOINT_MOVIMENTOS, app_key, app_secret, empresa, filtros(faixa))
+            return dividir_periodo(*faixa, math.ceil(total / limite)), None
+        paginas = paginar(ENDPOINT_MOVIMENTOS, app_key, app_secret, empresa, filtros(faixa), max_workers, primeira)
+        return None, [movimento for pagina in paginas for movimento in pagina]
+
+    inicio = datetime.strptime(dtinicio, formato).date()
+    fim = datetime.strptime(dtfim, formato).date()
+    log_message(f"Iniciando consulta de movimentos por faixas de {dtinicio} a {dtfim} da {empresa}")
+
+    concluidas = {}
+    with ThreadPoolExecutor(max_workers=max(1, max_faixas)) as executor:
+        pendentes = {executor.submit(buscar, (inicio, fim)): (inicio, fim)}
         try:
-            response = requests.post(url, json=payload, headers=headers, timeout=120)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:  # noqa: F841
-            tentativas += 1
-    return None
+            while pendentes:
+                prontos, _ = wait(pendentes, return_when=FIRST_COMPLETED)
+                for futuro in prontos:
+                    faixa = pendentes.pop(futuro)
+                    subfaixas, movimentos = futuro.result()
+                    if subfaixas:
+                        log_message(f"Faixa {faixa[0]:%d/%m/%Y}-{faixa[1]:%d/%m/%Y} da {empresa} dividida em {len(subfaixas)}")
+                        obter_metricas().incrementar("omie_faixas_divididas_total", empresa=empresa)
+                        for subfaixa in subfaixas:
+                            pendentes[executor.submit(buscar, subfaixa)] = subfaixa
+                    else:
+                        concluidas[faixa] = movimentos
+        except Exception:
+            for futuro in pendentes:
+                futuro.cancel()
+            raise
+
+    all_data = []
+    vistos = set()
+    for faixa in sorted(concluidas):
+        for movimento in concluidas[faixa]:
+            chave = chave_movimento(movimento)
+            if chave not in vistos:
+                vistos.add(chave)
+                all_data.append(movimento)
+
+    obter_metricas().incrementar("omie_faixas_total", len(concluidas), empresa=empresa)
+    log_message(f"Consulta de movimentos finalizada. {len(concluidas)} faixa(s), "
+                f"total de movimentos encontrados: {len(all_data)}.")
+    return all_data
 
 
-def consultar_movimentos(app_key: str, app_secret: str, empresa: str, dtinicio: str = None, dtfim: str = None) -> list:
+def consultar_movimentos(app_key: str, app_secret: str, empresa: str, dtinicio: str = None, dtfim: str = None,
+                         max_workers: int = MAX_WORKERS_PAGINAS, alterado_desde: datetime = None,
+                         alterado_ate: datetime = None) -> list:
     """
     Consulta os dados financeiros na API da Omie, focando em movimentos de contas.
+    Os parâmetros são os mesmos de `consultar_movimentos_paginas`. Um período com início e fim
+    é consultado em faixas de datas (ver `consultar_movimentos_por_faixas`).
+
+    Retorno:
+        list: Lista contendo todas as movimentações feitas.
+    """
+    if dtinicio and dtfim and not alterado_desde:
+        return consultar_movimentos_por_faixas(app_key, app_secret, empresa, dtinicio, dtfim, max_workers)
+
+    all_data = []
+    for movimentos in consultar_movimentos_paginas(app_key, app_secret, empresa, dtinicio, dtfim,
+                                                   max_workers, alterado_desde, alterado_ate):
+        all_data.extend(movimentos)
+    return all_data
+
+
+def consultar_movimentos_paginas(app_key: str, app_secret: str, empresa: str, dtinicio: str = None, dtfim: str = None,
+                                 max_workers: int = MAX_WORKERS_PAGINAS, alterado_desde: datetime = None,
+                                 alterado_ate: datetime = None):
+    """
+    Consulta os movimentos de contas na API da Omie, devolvendo uma página por vez.
 
     Parâmetros:
         app_key (str): Chave de acesso da API da Omie.
@@ -44,113 +441,76 @@ def consultar_movimentos(app_key: str, app_secret: str, empresa: str, dtinicio:
         empresa (str): Nome da empresa de cada API consultada.
         dtinicio (str, opcional): Data de início no formato "DD/MM/AAAA".
         dtfim (str, opcional): Data de fim no formato "DD/MM/AAAA".
+        max_workers (int, opcional): Quantidade de páginas buscadas simultaneamente.
+        alterado_desde (datetime, opcional): Consulta incremental; traz apenas os movimentos alterados
+            a partir desta data (filtro dDtAltDe da Omie). O dia inteiro é consultado, então alterações
+            do mesmo dia já carregadas voltam e são mescladas novamente sem duplicar.
+        alterado_ate (datetime, opcional): Fim da consulta incremental (filtro dDtAltAte), normalmente
+            a data de referência da execução; sem ele, a Omie não limita o fim. A data entra na chave
+            das requisições, então um replay ou reprocessamento do mesmo dia encontra o cache e o checkpoint.
 
     Retorno:
-        list: Lista contendo todas as movimentações feitas.
+        generator: Listas de movimentações, uma por página, na ordem das páginas.
+
+    Levanta:
+        ErroRequisicaoOmie: quando alguma página não pôde ser obtida.
     """
     log_message("Iniciando consulta de movimentos...")
-    
-    url = "https://app.omie.com.br/api/v1/financas/mf/"
-
-    payload = {
-        "call": "ListarMovimentos",
-        "app_key": app_key,
-        "app_secret": app_secret,
-        "param": [{"nPagina": 1, "nRegPorPagina": 1}]
-    }
 
+    filtros = {}
     # Adicionar filtros de data ao payload se fornecidos
     if dtinicio or dtfim:
-        payload["param"][0]["dDtEmisDe"] = dtinicio if dtinicio else ""
-        payload["param"][0]["dDtEmisAte"] = dtfim if dtfim else ""
-
-    headers = {"Content-Type": "application/json"}
-
-    all_data = []
-    try:
-        log_message(f"Realizando a primeira requisição para obter o total de registros da {empresa}")
-        dados = fazer_requisicao(url,payload, headers)
-        
-        total_registros = dados.get("nTotRegistros", 0)
-        n_reg_por_pagina = 500
-        total_paginas = math.ceil(total_registros / n_reg_por_pagina)
+        filtros["dDtEmisDe"] = dtinicio if dtinicio else ""
+        filtros["dDtEmisAte"] = dtfim if dtfim else ""
 
-        log_message(f"Total de registros: {total_registros}. Total de páginas: {total_paginas}.")
+    if alterado_desde:
+        filtros["dDtAltDe"] = alterado_desde.strftime("%d/%m/%Y")
+        if alterado_ate:
+            filtros["dDtAltAte"] = alterado_ate.strftime("%d/%m/%Y")
 
-        for pagina in range(1, total_paginas + 1):
-            payload["param"][0]["nPagina"] = pagina
-            payload["param"][0]["nRegPorPagina"] = n_reg_por_pagina
+    total_movimentos = 0
+    for movimentos in paginar(ENDPOINT_MOVIMENTOS, app_key, app_secret, empresa, filtros, max_workers):
+        total_movimentos += len(movimentos)
+        yield movimentos
 
-            dados = fazer_requisicao(url,payload, headers)
-            
-            movimentos = dados.get("movimentos", [])
-            for movimento in movimentos:
-                movimento["empresa"] = empresa
-            all_data.extend(movimentos)
+    log_message(f"Consulta de movimentos finalizada. Total de movimentos encontrados: {total_movimentos}.")
 
-        log_message(f"Consulta de movimentos finalizada. Total de movimentos encontrados: {len(all_data)}.")
 
-    except requests.exceptions.RequestException as e:
-        log_error("Erro na requisição durante a consulta de movimentos", e, payload, dados)
+def consultar_categorias(app_key: str, app_secret: str, empresa: str, max_workers: int = MAX_WORKERS_PAGINAS) -> list:
+    """
+    Consulta os dados categoricos na API da Omie.
+    Os parâmetros são os mesmos de `consultar_categorias_paginas`.
 
+    Retorno:
+        list: Lista contendo todas as categorias cadastradas.
+    """
+    all_data = []
+    for categorias in consultar_categorias_paginas(app_key, app_secret, empresa, max_workers):
+        all_data.extend(categorias)
     return all_data
 
-    
-    
-def consultar_categorias(app_key: str, app_secret: str, empresa: str) -> list:
+
+def consultar_categorias_paginas(app_key: str, app_secret: str, empresa: str, max_workers: int = MAX_WORKERS_PAGINAS):
     """
-    Consulta os dados categoricos na API da Omie.
+    Consulta os dados categoricos na API da Omie, devolvendo uma página por vez.
 
     Parâmetros:
         app_key (str): Chave de acesso da API da Omie.
         app_secret (str): Segredo de acesso da API da Omie.
         empresa: (str): Nome da empresa de cada API consultada.
+        max_workers (int, opcional): Quantidade de páginas buscadas simultaneamente.
 
     Retorno:
-        list: Lista contendo todas as categorias cadastradas.
+        generator: Listas de categorias, uma por página, na ordem das páginas.
     """
     log_message("Iniciando consulta de categorias...")
 
-    url = "https://app.omie.com.br/api/v1/geral/categorias/"
-    
-    payload = {
-        "call": "ListarCategorias",
-        "app_key": app_key,
-        "app_secret": app_secret,
-    }
-    headers = {"Content-Type": "application/json"}
+    total_categorias = 0
+    for categorias in paginar(ENDPOINT_CATEGORIAS, app_key, app_secret, empresa, max_workers=max_workers):
+        total_categorias += len(categorias)
+        yield categorias
 
-    all_data = []
-    try:
-        log_message(f"Realizando a primeira requisição para obter o total de registros da {empresa}")
-        # Enviar a requisição para a primeira página para saber o total de registros
-        payload['param'] = [{"pagina": 1, "registros_por_pagina": 1}]  # 1 registro por página
-        dados = fazer_requisicao(url,payload, headers)
-        
-        # Obter o total de registros e calcular o total de páginas
-        total_registros = dados.get("total_de_registros", 0)
-        n_reg_por_pagina = 500  # Ajuste o número de registros por página conforme necessário
-        total_paginas = math.ceil(total_registros / n_reg_por_pagina)
-
-        log_message(f"Total de registros: {total_registros}. Total de páginas: {total_paginas}.")
-        
-        # Iterar pelas páginas e coletar os dados
-        for pagina in range(1, total_paginas + 1):
-            # print(f"Requisitando a página {pagina}/{total_paginas}...")
-            payload['param'] = [{"pagina": pagina, "registros_por_pagina": n_reg_por_pagina}]
-            dados = fazer_requisicao(url,payload, headers)
-            
-            # Extrair dados da página
-            categorias = dados.get('categoria_cadastro', [])
-            for movimento in categorias:
-                movimento['empresa'] = empresa
-            all_data.extend(categorias)
-
-        log_message(f"Consulta de categorias finalizada. Total de categorias encontradas: {len(all_data)}.")
-
-    except requests.exceptions.RequestException as e:
-        log_error("Erro na requisição durante a consulta de categorias", e, payload, dados)
-    return all_data
+    log_message(f"Consulta de categorias finalizada. Total de categorias encontradas: {total_categorias}.")
 
 def consultar_orcamentos(app_key: str, app_secret: str, empresa: str, ano: int, mes: int) -> list:
     """
@@ -168,7 +528,7 @@ def consultar_orcamentos(app_key: str, app_secret: str, empresa: str, ano: int,
     """
     log_message("Iniciando consulta de orçamentos...")
 
-    url = "https://app.omie.com.br/api/v1/financas/caixa/"
+    url = f"{URL_BASE}/financas/caixa/"
     
     payload = {
         "call": "ListarOrcamentos",
@@ -181,9 +541,11 @@ def consultar_orcamentos(app_key: str, app_secret: str, empresa: str, ano: int,
         log_message(f"Realizando a carga total dos orcamentos da {empresa}")
         # por no payload o ano e mes que irá puxar da API
         payload['param'] = [{"nAno": ano, "nMes": mes}]
-        dados = fazer_requisicao(url,payload, headers)
+        dados = fazer_requisicao(url,payload, headers, empresa, unidade=f"{ano:04d}-{mes:02d}")
         # Obtém a lista de orçamentos ou uma lista vazia caso a chave não exista
         orcamentos = dados.get("ListaOrcamentos", [])
+        if PROJETAR_REGISTROS:
+            orcamentos = projetar_registros(orcamentos, "orcamentos")
 
         # Adiciona empresa, ano e mês a cada orçamento individualmente
         for orcamento in orcamentos:
@@ -194,8 +556,8 @@ def consultar_orcamentos(app_key: str, app_secret: str, empresa: str, ano: int,
         log_message(f"Consulta de orcamento finalizada. Total de orcamentos encontrados: {len(orcamentos)}.")
         return orcamentos
     except requests.exceptions.RequestException as e:
-        log_error("Erro na requisição durante a consulta de orcamentos", e, payload, dados)
-        return []  # Retorna uma lista vazia em caso de erro
+        log_error(f"Erro na requisição durante a consulta de orcamentos da {empresa}", e, payload)
+        raise
     
 
 def consultar_dre(app_key: str, app_secret: str, empresa: str) -> list:
@@ -212,7 +574,7 @@ def consultar_dre(app_key: str, app_secret: str, empresa: str) -> list:
     """
 
 
-    url = "https://app.omie.com.br/api/v1/geral/dre/"
+    url = f"{URL_BASE}/geral/dre/"
     
     payload = {
         "call": "ListarCadastroDRE",
@@ -225,9 +587,11 @@ def consultar_dre(app_key: str, app_secret: str, empresa: str) -> list:
      
         # por no payload o ano e mes que irá puxar da API
         payload['param'] = [{"apenasContasAtivas": "N"}]
-        dados = fazer_requisicao(url,payload, headers)
+        dados = fazer_requisicao(url,payload, headers, empresa, unidade="completa")
         # Obtém a lista de orçamentos ou uma lista vazia caso a chave não exista
         lista_dre = dados.get("dreLista", [])
+        if PROJETAR_REGISTROS:
+            lista_dre = projetar_registros(lista_dre, "dre")
 
         # Adiciona empresa, ano e mês a cada orçamento individualmente
         for dre in lista_dre:
@@ -237,5 +601,5 @@ def consultar_dre(app_key: str, app_secret: str, empresa: str) -> list:
         return lista_dre
 
     except requests.exceptions.RequestException as e:
-        print(e, empresa)
-        return []  # Retorna uma lista vazia em caso de erro
\ No newline at end of file
+        log_error(f"Erro na requisição durante a consulta de dre da {empresa}", e, payload)
+        raise
@@ -0,0 +1,174 @@
+import os
+import sqlite3
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+# Tamanho máximo (aproximado) de cada comando INSERT com múltiplos VALUES.
+# Fica bem abaixo do max_allowed_packet padrão do MySQL (64MB no 8.0, 4MB em versões antigas).
+MAX_BYTES_LOTE = 2 * 1024 * 1024
+
+# Estratégia preferida por tabela no MySQL. Em outros bancos, 'load_data' cai para 'multi'.
+ESTRATEGIA_POR_TABELA = {
+    'movimentacoes': 'load_data',
+    'orcamentos': 'multi',
+    'categorias': 'multi',
+    'dre': 'multi',
+}
+ESTRATEGIA_PADRAO = 'multi'
+
+# Os comandos são enviados direto ao driver; o sqlite3 não converte Decimal sozinho
+# (o pymysql converte). Valores monetários exatos (modo compacto) chegam como Decimal.
+sqlite3.register_adapter(Decimal, str)
+
+
+def _linhas_por_lote(conn, keys, linhas) -> int:
+    """Calcula quantas linhas cabem em um INSERT, respeitando o limite de parâmetros e de bytes."""
+    if conn.dialect.name == 'sqlite':
+        limite_parametros = 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+    else:
+        limite_parametros = 65535
+
+    amostra = linhas[:100]
+    bytes_por_linha = max(1, sum(
+        sum(len(str(valor)) + 4 for valor in linha.values()) for linha in amostra
+    ) // max(1, len(amostra)))
+
+    return max(1, min(limite_parametros // max(1, len(keys)), MAX_BYTES_LOTE // bytes_por_linha))
+
+
+def _marcador(conn) -> str:
+    return "?" if conn.dialect.paramstyle == "qmark" else "%s"
+
+
+def inserir_multi_valores(pd_table, conn, keys, data_iter):
+    """
+    Método de inserção para `DataFrame.to_sql`: um INSERT com múltiplas linhas em VALUES,
+    dividido em lotes pelo tamanho estimado do comando.
+
+    O comando é montado direto no formato do driver, sem compilar uma expressão SQLAlchemy
+    por lote (a compilação de VALUES com milhares de parâmetros é mais lenta que o próprio envio).
+    """
+    linhas = list(data_iter)
+    if not linhas:
+        return 0
+
+    tamanho = _linhas_por_lote(conn, keys, [dict(zip(keys, linha)) for linha in linhas[:100]])
+    preparador = conn.dialect.identifier_preparer
+    colunas = ", ".join(preparador.quote(coluna) for coluna in keys)
+    grupo = "(" + ", ".join([_marcador(conn)] * len(keys)) + ")"
+    prefixo = f"INSERT INTO {preparador.format_table(pd_table.table)} ({colunas}) VALUES "
+
+    comandos = {}
+    for inicio in range(0, len(linhas), tamanho):
+        lote = linhas[inicio:inicio + tamanho]
+        if len(lote) not in comandos:
+            comandos[len(lote)] = prefixo + ", ".join([grupo] * len(lote))
+        conn.exec_driver_sql(comandos[len(lote)], tuple(valor for linha in lote for valor in linha))
+    return len(linhas)
+
+
+def inserir_executemany(pd_table, conn, keys, data_iter):
+    """
+    Método de inserção para `DataFrame.to_sql`: um único INSERT parametrizado executado com executemany.
+
+    No pymysql o executemany reescreve o INSERT em lotes de múltiplas linhas, respeitando o tamanho
+    máximo do pacote do servidor.
+    """
+    linhas = [dict(zip(keys, linha)) for linha in data_iter]
+    if linhas:
+        conn.execute(pd_table.table.insert(), linhas)
+    return len(linhas)
+
+
+def _valor_tsv(valor) -> str:
+    if valor is None or valor != valor:  # None ou NaN
+        return "\\N"
+    if isinstance(valor, datetime):
+        if (valor.hour, valor.minute, valor.second, valor.microsecond) == (0, 0, 0, 0):
+            return valor.strftime("%Y-%m-%d")
+        return valor.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(valor, date):
+        return valor.strftime("%Y-%m-%d")
+    if isinstance(valor, bool):
+        return "1" if valor else "0"
+    return (str(valor).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+def inserir_load_data(pd_table, conn, keys, data_iter):
+    """
+    Método de inserção para `DataFrame.to_sql`: grava as linhas em um arquivo temporário e usa
+    `LOAD DATA LOCAL INFILE` (apenas MySQL, com local_infile habilitado no cliente e no servidor).
+
+    Se o servidor recusar o LOAD DATA, o lote é inserido com executemany. Com LOCAL, o MySQL trata
+    erros de dados como avisos (como um IGNORE implícito: chaves repetidas e valores inválidos são
+    descartados ou truncados), então a quantidade de linhas gravadas e os avisos são conferidos e
+    qualquer diferença ou aviso interrompe a carga.
+
+    Levanta:
+        ValueError: quando o LOAD DATA gravou menos linhas que as enviadas ou gerou avisos.
+    """
+    if conn.dialect.name != 'mysql':
+        return inserir_multi_valores(pd_table, conn, keys, data_iter)
+
+    linhas = list(data_iter)
+    if not linhas:
+        return 0
+
+    arquivo = tempfile.NamedTemporaryFile("w", encoding="utf-8", newline="\n", suffix=".tsv", delete=False)
+    try:
+        with arquivo:
+            for linha in linhas:
+                arquivo.write("\t".join(_valor_tsv(valor) for valor in linha))
+                arquivo.write("\n")
+
+        caminho = arquivo.name.replace("\\", "/")
+        colunas = ", ".join(f"`{coluna}`" for coluna in keys)
+        try:
+            # Savepoint: uma recusa do servidor não derruba a transação da carga
+            with conn.begin_nested():
+                gravadas = conn.execute(text(
+                    f"LOAD DATA LOCAL INFILE '{caminho}' INTO TABLE `{pd_table.name}` CHARACTER SET utf8mb4 "
+                    f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' ({colunas})")).rowcount
+                # Notes (ex: arredondamento de float em DECIMAL) são aceitos também num INSERT comum
+                avisos = [aviso for aviso in conn.execute(text("SHOW WARNINGS")).fetchall() if aviso[0] != "Note"]
+        except DBAPIError:
+            return inserir_executemany(pd_table, conn, keys, iter(linhas))
+    finally:
+        os.remove(arquivo.name)
+
+    if gravadas != len(linhas) or avisos:
+        detalhes = "; ".join(f"{nivel} {codigo}: {mensagem}" for nivel, codigo, mensagem in avisos[:5])
+        raise ValueError(
+            f"LOAD DATA em {pd_table.name}: {gravadas} de {len(linhas)} linhas gravadas"
+            + (f" ({len(avisos)} avisos: {detalhes})" if avisos else ""))
+    return len(linhas)
+
+
+ESTRATEGIAS = {
+    'multi': inserir_multi_valores,
+    'executemany': inserir_executemany,
+    'load_data': inserir_load_data,
+}
+
+
+def escolher_estrategia(tabela: str, engine, estrategia: str = None):
+    """
+    Retorna o método de inserção a ser passado para `DataFrame.to_sql`.
+
+    Parâmetros:
+        tabela (str): Nome da tabela de destino.
+        engine: Engine ou conexão SQLAlchemy (usada para identificar o banco).
+        estrategia (str, opcional): 'multi', 'executemany' ou 'load_data'; por padrão a de ESTRATEGIA_POR_TABELA.
+
+    Retorno:
+        callable: Função no formato esperado pelo parâmetro `method` do `to_sql`.
+    """
+    nome = estrategia or ESTRATEGIA_POR_TABELA.get(tabela, ESTRATEGIA_PADRAO)
+    if nome == 'load_data' and engine.dialect.name != 'mysql':
+        nome = 'multi'
+    return ESTRATEGIAS[nome]
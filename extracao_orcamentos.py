@@ -0,0 +1,156 @@
+"""
+Extração dos orçamentos mensais da Omie com cache dos meses fechados.
+
+Os meses são derivados da data de referência (do mês inicial configurado até o mês atual) e
+consultados em paralelo. Para cada (empresa, mês) é guardado um checksum do conteúdo; meses
+fechados já registrados não são consultados de novo, a menos que sejam invalidados, e meses
+consultados cujo checksum não mudou não precisam ser recarregados no banco.
+"""
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from consultar_api import consultar_orcamentos
+
+# Arquivo com o checksum de cada mês já carregado, por empresa
+ARQUIVO_CACHE = "cache_orcamentos.json"
+
+# Primeiro mês de orçamento extraído (ano, mês)
+MES_INICIAL = (2024, 1)
+
+# Quantidade de meses (contando o atual) que ainda podem mudar e são sempre consultados
+MESES_ABERTOS = 2
+
+MAX_WORKERS_MESES = 4
+
+_lock = threading.Lock()
+
+
+def meses_orcamento(referencia: datetime = None, inicio: tuple = MES_INICIAL) -> list:
+    """
+    Lista os meses (ano, mês) de `inicio` até o mês da data de referência, inclusive.
+
+    Parâmetros:
+        referencia (datetime, opcional): Data de referência; por padrão hoje.
+        inicio (tuple, opcional): Primeiro mês (ano, mês).
+
+    Retorno:
+        list: Tuplas (ano, mês) em ordem cronológica.
+    """
+    referencia = referencia or datetime.today()
+    ano, mes = inicio
+    meses = []
+    while (ano, mes) <= (referencia.year, referencia.month):
+        meses.append((ano, mes))
+        ano, mes = (ano + 1, 1) if mes == 12 else (ano, mes + 1)
+    return meses
+
+
+def mes_fechado(ano: int, mes: int, referencia: datetime = None, meses_abertos: int = MESES_ABERTOS) -> bool:
+    """Indica se o mês está fora da janela de meses abertos (ou seja, não deve mais mudar)."""
+    referencia = referencia or datetime.today()
+    distancia = (referencia.year - ano) * 12 + (referencia.month - mes)
+    return distancia >= meses_abertos
+
+
+def checksum_orcamentos(lista: list) -> str:
+    """Checksum estável do conteúdo de um mês (independente da ordem dos registros)."""
+    linhas = sorted(json.dumps(item, sort_keys=True, ensure_ascii=False) for item in lista)
+    return hashlib.sha256("\n".join(linhas).encode("utf-8")).hexdigest()
+
+
+def _chave_mes(ano: int, mes: int) -> str:
+    return f"{ano:04d}-{mes:02d}"
+
+
+def _ler_cache(arquivo: str) -> dict:
+    if not os.path.exists(arquivo):
+        return {}
+    with open(arquivo, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _gravar_cache(cache: dict, arquivo: str):
+    temporario = f"{arquivo}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2, ensure_ascii=False, sort_keys=True)
+    os.replace(temporario, arquivo)
+
+
+def extrair_orcamentos(app_key: str, app_secret: str, empresa: str, meses: list = None,
+                       referencia: datetime = None, max_workers: int = MAX_WORKERS_MESES,
+                       arquivo: str = ARQUIVO_CACHE) -> tuple:
+    """
+    Consulta em paralelo os meses de orçamento da empresa que podem ter mudado.
+
+    Meses fechados que já constam no cache não são consultados. Dos meses consultados, só são
+    devolvidos os que são novos ou cujo checksum mudou.
+
+    Parâmetros:
+        app_key (str): Chave de acesso da API da Omie.
+        app_secret (str): Segredo de acesso da API da Omie.
+        empresa (str): Nome da empresa.
+        meses (list, opcional): Meses (ano, mês); por padrão `meses_orcamento(referencia)`.
+        referencia (datetime, opcional): Data de referência; por padrão hoje.
+        max_workers (int, opcional): Quantidade de meses consultados ao mesmo tempo.
+        arquivo (str, opcional): Caminho do cache de checksums.
+
+    Retorno:
+        tuple: (dict (ano, mês) -> lista de orçamentos dos meses alterados,
+                dict (ano, mês) -> checksum, a ser confirmado com `confirmar_orcamentos` após a carga)
+    """
+    meses = meses or meses_orcamento(referencia)
+    with _lock:
+        conhecidos = _ler_cache(arquivo).get(empresa, {})
+
+    pendentes = [
+        (ano, mes) for ano, mes in meses
+        if not (mes_fechado(ano, mes, referencia) and _chave_mes(ano, mes) in conhecidos)
+    ]
+
+    def consultar(ano_mes):
+        return consultar_orcamentos(app_key, app_secret, empresa, *ano_mes)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pendentes) or 1))) as executor:
+        respostas = dict(zip(pendentes, executor.map(consultar, pendentes)))
+
+    alterados = {}
+    checksums = {}
+    for (ano, mes), lista in respostas.items():
+        checksum = checksum_orcamentos(lista)
+        if conhecidos.get(_chave_mes(ano, mes)) != checksum:
+            alterados[(ano, mes)] = lista
+            checksums[(ano, mes)] = checksum
+    return alterados, checksums
+
+
+def confirmar_orcamentos(empresa: str, checksums: dict, arquivo: str = ARQUIVO_CACHE):
+    """Registra no cache os checksums dos meses carregados com sucesso no banco."""
+    with _lock:
+        cache = _ler_cache(arquivo)
+        meses = cache.setdefault(empresa, {})
+        for (ano, mes), checksum in checksums.items():
+            meses[_chave_mes(ano, mes)] = checksum
+        _gravar_cache(cache, arquivo)
+
+
+def invalidar_orcamentos(empresa: str = None, meses: list = None, arquivo: str = ARQUIVO_CACHE):
+    """
+    Remove meses do cache, forçando nova consulta e carga na próxima execução.
+
+    Parâmetros:
+        empresa (str, opcional): Empresa a invalidar; por padrão todas.
+        meses (list, opcional): Meses (ano, mês) a invalidar; por padrão todos.
+    """
+    with _lock:
+        cache = _ler_cache(arquivo)
+        for nome in ([empresa] if empresa else list(cache)):
+            if meses is None:
+                cache.pop(nome, None)
+            else:
+                for ano, mes in meses:
+                    cache.get(nome, {}).pop(_chave_mes(ano, mes), None)
+        _gravar_cache(cache, arquivo)
@@ -1,12 +1,21 @@
-from consultar_api import consultar_movimentos , consultar_categorias, consultar_orcamentos, consultar_dre
-from tratar_dados import tratamento_movimentos, tratamento_categorias, tratamento_orcamentos, tratamento_dre
-from post_banco import carregar_dados, conectar_banco
+from consultar_api import consultar_movimentos , consultar_categorias, consultar_dre, consultar_movimentos_paginas
+from extracao_orcamentos import extrair_orcamentos, confirmar_orcamentos
+from tratar_dados import tratamento_movimentos, tratamento_categorias, tratamento_orcamentos, tratamento_dre, tratar_em_lotes, compactar_tipos, tratar_em_paralelo
+from post_banco import carregar_dados, conectar_banco, carregar_dados_em_lotes, criar_tabelas
+from sessao_http import estatisticas_conexoes, fechar_sessao
+from watermark import ler_watermark, salvar_watermarks, calcular_watermark
+from cache_respostas import configurar_cache
+from checkpoint import configurar_checkpoint
+from saida_parquet import apagar_particoes, gravar_parquet
+from metricas import obter_metricas
 import config
 import pandas as pd  # noqa: F401
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Obtém o dia da semana (0 = Segunda-feira, 6 = Domingo)
-hoje = datetime.today()
+# config.DATA_REFERENCIA ("AAAA-MM-DD") permite reprocessar um dia anterior, ex: em replay do cache
+hoje = datetime.strptime(config.DATA_REFERENCIA, "%Y-%m-%d") if getattr(config, "DATA_REFERENCIA", None) else datetime.today()
 mes = hoje.month
 ano = hoje.year
 dias_anteriores =  hoje - timedelta(days=45)
@@ -20,68 +29,317 @@ dias_anteriores_sql = dias_anteriores.strftime("%Y-%m-%d")
 if hoje.weekday() == 0: # Segunda-feira
     print()
 
+# Cache das respostas brutas da API: 'gravar' guarda cada resposta, 'replay' reprocessa sem rede
+configurar_cache(modo=getattr(config, "CACHE_MODO", None), diretorio=getattr(config, "CACHE_DIRETORIO", None))
+
+# Checkpoint da extração: uma nova execução para a mesma data de referência retoma de onde a anterior parou
+# (None desliga). É limpo quando todas as empresas são extraídas e carregadas com sucesso.
+CHECKPOINT_EXTRACAO = getattr(config, "CHECKPOINT_EXTRACAO", "checkpoint_extracao.db")
+
+# Quantidade de empresas extraídas ao mesmo tempo (pode ser definida em config.py)
+MAX_EMPRESAS_PARALELAS = getattr(config, "MAX_EMPRESAS_PARALELAS", 4)
+
+# Carga incremental de movimentos: busca só o que foi alterado desde a última carga de cada empresa
+MODO_INCREMENTAL = getattr(config, "MODO_INCREMENTAL", False)
+
+# Streaming de movimentos: cada página é tratada e gravada assim que chega, com memória constante
+MODO_STREAMING = getattr(config, "MODO_STREAMING", False)
+
+# Modo compacto: valores em centavos inteiros e textos repetidos como 'category' (menos memória, sem arredondamento)
+MODO_COMPACTO = getattr(config, "MODO_COMPACTO", False)
+
+# Relatório JSON de métricas da execução e, opcionalmente, arquivo para o textfile collector do Prometheus
+RELATORIO_METRICAS = getattr(config, "RELATORIO_METRICAS", "relatorio_execucao.json")
+METRICAS_PROMETHEUS = getattr(config, "METRICAS_PROMETHEUS", None)
+
+# Processos usados no tratamento dos movimentos (None usa todas as CPUs; 1 trata no próprio processo)
+PROCESSOS_TRATAMENTO = getattr(config, "PROCESSOS_TRATAMENTO", None)
+
+# Diretório da cópia em Parquet para leitura analítica (None desliga; requer pyarrow)
+SAIDA_PARQUET = getattr(config, "SAIDA_PARQUET", None)
+
+
+def medir_extracao(empresa, endpoint, consulta):
+    """Executa `consulta` registrando o tempo e a quantidade de registros por empresa e endpoint."""
+    metricas = obter_metricas()
+    with metricas.cronometro("etl_extracao_segundos", empresa=empresa, endpoint=endpoint):
+        registros = consulta()
+    metricas.incrementar("etl_extracao_registros_total", len(registros), empresa=empresa, endpoint=endpoint)
+    return registros
+
+
+def extrair_empresa(empresa, credenciais, incluir_movimentos=True):
+    """
+    Extrai todos os dados de uma empresa na API da Omie.
+
+    Parâmetros:
+        empresa (str): Nome da empresa.
+        credenciais (dict): Dicionário com APP_KEY e APP_SECRET da empresa.
+        incluir_movimentos (bool, opcional): Se False, os movimentos não são consultados
+            (no modo streaming eles são lidos página a página por `paginas_movimentos_em_fluxo`).
+
+    Retorno:
+        dict: Listas brutas com as chaves 'movimentos', 'categorias', 'orcamentos' e 'dres',
+        além da 'watermark' (última alteração de movimento recebida) usada no modo incremental,
+        dos 'orcamentos_por_mes' alterados e dos respectivos 'checksums_orcamentos'.
+    """
+    app_key = credenciais.get("APP_KEY")
+    app_secret = credenciais.get("APP_SECRET")
+
+    if not app_key or not app_secret:
+        raise ValueError(f"Credenciais ausentes para a empresa: {empresa}")
+
+    dados = {"movimentos": [], "categorias": [], "orcamentos": [], "dres": [], "watermark": None,
+             "orcamentos_por_mes": {}, "checksums_orcamentos": {}}
+
+    # Coletando os dados
+    if incluir_movimentos:
+        marca = ler_watermark(empresa) if MODO_INCREMENTAL else None
+        if marca:
+            dados["movimentos"].extend(medir_extracao(empresa, "movimentos", lambda: consultar_movimentos(
+                app_key, app_secret, empresa, alterado_desde=marca, alterado_ate=hoje)))
+        else:
+            dados["movimentos"].extend(medir_extracao(empresa, "movimentos", lambda: consultar_movimentos(
+                app_key, app_secret, empresa, dtinicio=dias_anteriores_str, dtfim=hoje_str)))
+        dados["watermark"] = calcular_watermark(dados["movimentos"]) or marca
+    if hoje.weekday() == 0:
+        dados["categorias"].extend(medir_extracao(empresa, "categorias", lambda: consultar_categorias(
+            app_key, app_secret, empresa)))
+        dados["dres"].extend(medir_extracao(empresa, "dre", lambda: consultar_dre(app_key, app_secret, empresa)))
+
+        # Só os meses abertos ou ainda não carregados são consultados; só os alterados voltam
+        with obter_metricas().cronometro("etl_extracao_segundos", empresa=empresa, endpoint="orcamentos"):
+            alterados, checksums = extrair_orcamentos(app_key, app_secret, empresa, referencia=hoje)
+        dados["orcamentos_por_mes"] = alterados
+        dados["checksums_orcamentos"] = checksums
+        for lista in alterados.values():
+            dados["orcamentos"].extend(lista)
+
+    return dados
+
+
+def extrair_empresas(dados_empresas, max_workers=MAX_EMPRESAS_PARALELAS, incluir_movimentos=True):
+    """
+    Extrai os dados de várias empresas em paralelo. A falha de uma empresa não interrompe as demais.
+
+    Parâmetros:
+        dados_empresas (dict): Empresas e suas credenciais (ex: config.dados_empresas).
+        max_workers (int, opcional): Quantidade de empresas extraídas ao mesmo tempo.
+        incluir_movimentos (bool, opcional): Repassado para `extrair_empresa`.
+
+    Retorno:
+        tuple: (dict empresa -> dados extraídos das empresas com sucesso, dict empresa -> exceção das que falharam)
+    """
+    resultados = {}
+    falhas = {}
+
+    def extrair(empresa, credenciais):
+        with obter_metricas().cronometro("etl_empresa_segundos", empresa=empresa):
+            return extrair_empresa(empresa, credenciais, incluir_movimentos)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futuros = {executor.submit(extrair, empresa, credenciais): empresa
+                   for empresa, credenciais in dados_empresas.items()}
+
+        for futuro in as_completed(futuros):
+            empresa = futuros[futuro]
+            try:
+                resultados[empresa] = futuro.result()
+                obter_metricas().incrementar("etl_empresas_total", resultado="sucesso")
+                print(f"[SUCESSO] {empresa} teve todos os dados processados com sucesso.")
+            except Exception as e:
+                falhas[empresa] = e
+                obter_metricas().incrementar("etl_empresas_total", resultado="falha")
+                print(f"[ERRO] Falha ao consultar dados para {empresa}: {e}")
+
+    # Mantém a ordem de config.dados_empresas, independente de qual empresa terminou primeiro
+    resultados = {empresa: resultados[empresa] for empresa in dados_empresas if empresa in resultados}
+    return resultados, falhas
+
+
+def paginas_movimentos_em_fluxo(dados_empresas, marcas, falhas):
+    """
+    Percorre as empresas uma a uma, devolvendo as páginas de movimentos conforme chegam da API.
+
+    Uma empresa que falha é registrada em `falhas` e as demais continuam. No modo incremental, as
+    páginas que ela já tinha entregado permanecem na carga; na substituição por período, ela mantém
+    os dados anteriores do banco.
+
+    Parâmetros:
+        dados_empresas (dict): Empresas e suas credenciais (ex: config.dados_empresas).
+        marcas (dict): Preenchido com a watermark de cada empresa (modo incremental).
+        falhas (dict): Preenchido com empresa -> exceção das empresas que falharam.
+
+    Retorno:
+        generator: Listas de movimentos brutos, uma por página.
+    """
+    for empresa, credenciais in dados_empresas.items():
+        app_key = credenciais.get("APP_KEY")
+        app_secret = credenciais.get("APP_SECRET")
+        if not app_key or not app_secret:
+            falhas[empresa] = ValueError(f"Credenciais ausentes para a empresa: {empresa}")
+            continue
+
+        marca = ler_watermark(empresa) if MODO_INCREMENTAL else None
+        if marca:
+            paginas = consultar_movimentos_paginas(app_key, app_secret, empresa, alterado_desde=marca, alterado_ate=hoje)
+        else:
+            paginas = consultar_movimentos_paginas(app_key, app_secret, empresa, dtinicio=dias_anteriores_str, dtfim=hoje_str)
+
+        marcas[empresa] = marca
+        try:
+            for pagina in paginas:
+                marca_pagina = calcular_watermark(pagina)
+                if marca_pagina and (marcas[empresa] is None or marca_pagina > marcas[empresa]):
+                    marcas[empresa] = marca_pagina
+                yield pagina
+        except Exception as e:
+            falhas[empresa] = e
+            print(f"[ERRO] Falha ao consultar movimentos para {empresa}: {e}")
+
+
+def carregar_movimentos_em_fluxo(conexao_banco, falhas):
+    """Extrai, trata e carrega os movimentos página a página (MODO_STREAMING)."""
+    marcas = {}
+    lotes = tratar_em_lotes(paginas_movimentos_em_fluxo(config.dados_empresas, marcas, falhas), tratamento_movimentos)
+
+    if MODO_INCREMENTAL:
+        total = carregar_dados_em_lotes(lotes, 'movimentacoes', conexao_banco, chaves=['empresa', 'nCodTitulo'])
+        salvar_watermarks({empresa: marca for empresa, marca in marcas.items() if empresa not in falhas})
+    else:
+        # Só o período das empresas que terminaram sem falha é substituído
+        total = carregar_dados_em_lotes(lotes, 'movimentacoes', conexao_banco, dtinicio=dias_anteriores_sql, dtfim=hoje_sql,
+                                        empresas=lambda: [empresa for empresa in config.dados_empresas if empresa not in falhas])
+    print(f"[SUCESSO] movimentacoes carregados no banco com sucesso. {total} linhas.")
+
+
+def carregar_orcamentos(conexao_banco, resultados, df_orcamentos):
+    """
+    Substitui no banco apenas os meses de orçamento que mudaram, empresa por empresa,
+    e confirma o checksum de cada mês carregado.
+
+    `df_orcamentos` traz todos os meses alterados já tratados (e, no MODO_COMPACTO, compactados).
+    """
+    linhas_por_mes = {}
+    if df_orcamentos is not None:
+        linhas_por_mes = df_orcamentos.groupby(['empresa', 'nAno', 'nMes'], observed=True, sort=False).indices
+    meses_carregados = 0
+    for empresa, dados in resultados.items():
+        for (ano_orcamento, mes_orcamento) in dados["orcamentos_por_mes"]:
+            # Um mês que ficou vazio na Omie (df None) apenas tem seus registros removidos
+            linhas = linhas_por_mes.get((empresa, ano_orcamento, mes_orcamento))
+            carregar_dados(df=None if linhas is None else df_orcamentos.iloc[linhas], tabela='orcamentos',
+                           engine=conexao_banco, ano=ano_orcamento, mes=mes_orcamento, empresa=empresa)
+            meses_carregados += 1
+        confirmar_orcamentos(empresa, dados["checksums_orcamentos"])
+    print(f"[SUCESSO] orçamentos carregados no banco com sucesso. {meses_carregados} mês(es) alterado(s).")
+
+
+def gravar_saida_parquet(diretorio, resultados, df_movimentos, df_categorias, df_orcamentos, df_dre):
+    """
+    Grava a cópia em Parquet das tabelas, com a mesma semântica de substituição usada no banco.
+
+    No MODO_STREAMING os movimentos não ficam em memória e não são gravados em Parquet.
+    """
+    if df_categorias is not None:
+        gravar_parquet(df_categorias, 'categorias', diretorio)
+    if df_movimentos is not None:
+        if MODO_INCREMENTAL:
+            gravar_parquet(df_movimentos, 'movimentacoes', diretorio, chaves=['empresa', 'nCodTitulo'])
+        else:
+            gravar_parquet(df_movimentos, 'movimentacoes', diretorio, dtinicio=dias_anteriores_sql, dtfim=hoje_sql)
+    if df_orcamentos is not None:
+        gravar_parquet(df_orcamentos, 'orcamentos', diretorio)
+    # Meses que ficaram vazios na Omie têm a partição removida, como no banco
+    meses_vazios = [
+        (empresa, ano, mes) for empresa, dados in resultados.items()
+        for (ano, mes), lista in dados["orcamentos_por_mes"].items() if not lista
+    ]
+    if meses_vazios:
+        apagar_particoes('orcamentos', diretorio, meses_vazios)
+    if df_dre is not None:
+        gravar_parquet(df_dre, 'dre', diretorio)
+    print(f"[SUCESSO] cópia em Parquet gravada em {diretorio}.")
+
+
 def main():
+    checkpoint = configurar_checkpoint(CHECKPOINT_EXTRACAO, execucao=hoje_sql)
+    concluidas = len(checkpoint.unidades()) if checkpoint is not None else 0
+    if concluidas:
+        print(f"[INFO] Retomando a extração de {hoje_sql}: {concluidas} requisição(ões) já concluída(s).")
+
     todos_movimentos = []
     todas_categorias = []
     todos_orcamentos = []
     todas_dres = []
     try:
-        for empresa, credenciais in config.dados_empresas.items():
-            app_key = credenciais.get("APP_KEY")
-            app_secret = credenciais.get("APP_SECRET")
+        resultados, falhas = extrair_empresas(config.dados_empresas, incluir_movimentos=not MODO_STREAMING)
 
-            if not app_key or not app_secret:
-                print(f"[ERRO] Credenciais ausentes para a empresa: {empresa}")
-                continue
+        for dados in resultados.values():
+            todos_movimentos.extend(dados["movimentos"])
+            todas_categorias.extend(dados["categorias"])
+            todos_orcamentos.extend(dados["orcamentos"])
+            todas_dres.extend(dados["dres"])
 
-            try:
-                # Coletando os dados
-                todos_movimentos.extend(consultar_movimentos(app_key, app_secret, empresa, dtinicio=dias_anteriores_str, dtfim=hoje_str))
-                if hoje.weekday() == 0:
-                    todas_categorias.extend(consultar_categorias(app_key, app_secret, empresa))
-                    todas_dres.extend(consultar_dre(app_key, app_secret, empresa))
-
-                    for ano in range(2024, 2026):
-                        for mes in range(1, 13):
-                            if ano == 2025 and mes > 3:
-                                continue  # Evita meses além de março de 2025
-                            todos_orcamentos.extend(consultar_orcamentos(app_key, app_secret, empresa, ano, mes))
-
-                print(f"[SUCESSO] {empresa} teve todos os dados processados com sucesso.")
-
-            except Exception as e:
-                print(f"[ERRO] Falha ao consultar dados para {empresa}: {e}")
+        if falhas:
+            print(f"[AVISO] {len(falhas)} empresa(s) com falha na extração: {', '.join(falhas)}")
 
         # Verifica se há dados antes de processá-los
-        if not any([todos_movimentos, todas_categorias, todos_orcamentos, todas_dres]):
+        if not MODO_STREAMING and not any([todos_movimentos, todas_categorias, todos_orcamentos, todas_dres]):
             print("[AVISO] Nenhum dado coletado. Processo encerrado.")
             return
 
         # Tratamento dos dados
-        df_movimentos = tratamento_movimentos(todos_movimentos) if todos_movimentos else None
+        df_movimentos = tratar_em_paralelo(todos_movimentos, 'movimentacoes', PROCESSOS_TRATAMENTO) if todos_movimentos else None
         df_categorias = tratamento_categorias(todas_categorias) if todas_categorias else None
-        df_orcamentos = tratamento_orcamentos(todos_orcamentos) if todos_orcamentos else None
         df_dre = tratamento_dre(todas_dres) if todas_dres else None
+        # Só os meses de orçamento alterados, tratados de uma vez
+        orcamentos_alterados = [
+            item for dados in resultados.values() for lista in dados["orcamentos_por_mes"].values() for item in lista
+        ]
+        df_orcamentos = tratamento_orcamentos(orcamentos_alterados) if orcamentos_alterados else None
+        if MODO_COMPACTO:
+            df_movimentos = compactar_tipos(df_movimentos, 'movimentacoes')
+            df_categorias = compactar_tipos(df_categorias, 'categorias')
+            df_orcamentos = compactar_tipos(df_orcamentos, 'orcamentos')
+            df_dre = compactar_tipos(df_dre, 'dre')
 
         # Conectando ao banco e carregando os dados
         conexao_banco = conectar_banco(user='', password='', host='', name='')
+        # Cria as tabelas que faltarem (só confere o banco se os modelos mudaram desde a última execução)
+        criar_tabelas(conexao_banco)
 
         try:
             if df_categorias is not None:
-                carregar_dados(df=df_categorias, tabela='categorias', engine=conexao_banco)
-                print("[SUCESSO] categorias carregados no banco com sucesso.")
-            if df_movimentos is not None:
-                carregar_dados(df=df_movimentos, tabela='movimentacoes', engine=conexao_banco,dtinicio= dias_anteriores_sql, dtfim= hoje_sql)
+                contagem = carregar_dados(df=df_categorias, tabela='categorias', engine=conexao_banco, modo='diff')
+                print(f"[SUCESSO] categorias carregados no banco com sucesso. {contagem}")
+            if MODO_STREAMING:
+                carregar_movimentos_em_fluxo(conexao_banco, falhas)
+            elif df_movimentos is not None:
+                if MODO_INCREMENTAL:
+                    # Substitui apenas os títulos recebidos e avança a watermark das empresas carregadas
+                    carregar_dados(df=df_movimentos, tabela='movimentacoes', engine=conexao_banco, chaves=['empresa', 'nCodTitulo'])
+                    salvar_watermarks({empresa: dados["watermark"] for empresa, dados in resultados.items()})
+                else:
+                    # Substitui o período só das empresas extraídas; as que falharam mantêm os dados anteriores
+                    carregar_dados(df=df_movimentos, tabela='movimentacoes', engine=conexao_banco,dtinicio= dias_anteriores_sql, dtfim= hoje_sql,
+                                   empresas=list(resultados))
                 print("[SUCESSO] movimentacoes carregados no banco com sucesso.")
-            if df_orcamentos is not None:
-                carregar_dados(df=df_orcamentos, tabela='orcamentos', engine=conexao_banco)
-                print("[SUCESSO] orçamentos carregados no banco com sucesso.")
+            if any(dados["orcamentos_por_mes"] for dados in resultados.values()):
+                carregar_orcamentos(conexao_banco, resultados, df_orcamentos)
             if df_dre is not None:
-                carregar_dados(df=df_dre, tabela='dre', engine=conexao_banco)
-                print("[SUCESSO] dre carregados no banco com sucesso.")
+                contagem = carregar_dados(df=df_dre, tabela='dre', engine=conexao_banco, modo='diff')
+                print(f"[SUCESSO] dre carregados no banco com sucesso. {contagem}")
 
             print("[SUCESSO] Todos os dados carregados no banco com sucesso.")
 
+            if SAIDA_PARQUET:
+                gravar_saida_parquet(SAIDA_PARQUET, resultados, df_movimentos, df_categorias, df_orcamentos, df_dre)
+
+            # Com alguma empresa pendente, o checkpoint fica para a próxima execução retomar
+            if checkpoint is not None and not falhas:
+                checkpoint.limpar()
+
         except Exception as e:
             print(f"[ERRO] Falha ao carregar dados no banco: {e}")
 
@@ -89,10 +347,30 @@ def main():
         print(f"[ERRO CRÍTICO] Erro inesperado: {e}")
 
     finally:
+        conexoes = estatisticas_conexoes()
+        print(f"[INFO] Conexões HTTP: {conexoes['novas']} novas, {conexoes['reutilizadas']} reutilizadas.")
+        fechar_sessao()
         # Garante que a conexão com o banco seja fechada
         if 'conexao_banco' in locals():
             conexao_banco.dispose()
             print("[INFO] Conexão com o banco fechada.")
+        gravar_metricas(conexoes, locals().get("falhas", {}))
+
+
+def gravar_metricas(conexoes, falhas):
+    """Grava o relatório JSON da execução e, se configurado, o arquivo de métricas do Prometheus."""
+    metricas = obter_metricas()
+    metricas.incrementar("etl_conexoes_http_total", conexoes["novas"], tipo="novas")
+    metricas.incrementar("etl_conexoes_http_total", conexoes["reutilizadas"], tipo="reutilizadas")
+    try:
+        if RELATORIO_METRICAS:
+            metricas.gravar_relatorio(RELATORIO_METRICAS, empresas_com_falha={
+                empresa: str(erro) for empresa, erro in falhas.items()})
+            print(f"[INFO] Relatório da execução gravado em {RELATORIO_METRICAS}.")
+        if METRICAS_PROMETHEUS:
+            metricas.gravar_prometheus(METRICAS_PROMETHEUS)
+    except OSError as e:
+        print(f"[ERRO] Falha ao gravar as métricas da execução: {e}")
 
 
 if __name__ == "__main__":
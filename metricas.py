@@ -0,0 +1,237 @@
+"""
+Métricas da execução do ETL: contadores e histogramas de tempo, com rótulos (empresa, call, tabela...).
+
+O registro é único por processo (`obter_metricas`) e seguro entre threads. Ao fim da execução,
+`gravar_relatorio` grava um JSON legível por máquina e `gravar_prometheus` um arquivo no formato
+texto do Prometheus (para o textfile collector do node_exporter).
+
+Exemplo de uso:
+    metricas = obter_metricas()
+    metricas.incrementar("omie_requisicoes_total", call="ListarMovimentos", resultado="ok")
+    with metricas.cronometro("etl_empresa_segundos", empresa="EMPRESA_X"):
+        ...
+"""
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Limites superiores (segundos) dos histogramas de tempo
+LIMITES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+class _Histograma:
+    __slots__ = ("limites", "baldes", "soma", "contagem", "minimo", "maximo")
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.baldes = [0] * (len(limites) + 1)
+        self.soma = 0.0
+        self.contagem = 0
+        self.minimo = None
+        self.maximo = None
+
+    def observar(self, valor):
+        self.baldes[bisect.bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+        self.contagem += 1
+        self.minimo = valor if self.minimo is None else min(self.minimo, valor)
+        self.maximo = valor if self.maximo is None else max(self.maximo, valor)
+
+    def quantil(self, q):
+        """Quantil aproximado pelo limite superior do balde (o máximo observado no último balde)."""
+        alvo = q * self.contagem
+        acumulado = 0
+        for limite, quantidade in zip(self.limites, self.baldes):
+            acumulado += quantidade
+            if acumulado >= alvo:
+                return min(limite, self.maximo)
+        return self.maximo
+
+
+class Metricas:
+    """Registro de contadores e histogramas, identificados por nome e rótulos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self._contadores = {}
+            self._histogramas = {}
+            self.inicio = time.time()
+
+    @staticmethod
+    def _chave(nome, rotulos):
+        return nome, tuple(sorted((k, str(v)) for k, v in rotulos.items()))
+
+    def incrementar(self, nome: str, valor: float = 1, **rotulos):
+        """Soma `valor` ao contador `nome` com os rótulos informados."""
+        chave = self._chave(nome, rotulos)
+        with self._lock:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def observar(self, nome: str, valor: float, limites=LIMITES_SEGUNDOS, **rotulos):
+        """Registra um valor (normalmente uma duração em segundos) no histograma `nome`."""
+        chave = self._chave(nome, rotulos)
+        with self._lock:
+            histograma = self._histogramas.get(chave)
+            if histograma is None:
+                histograma = self._histogramas[chave] = _Histograma(limites)
+            histograma.observar(valor)
+
+    @contextmanager
+    def cronometro(self, nome: str, **rotulos):
+        """Mede o tempo do bloco e o registra no histograma `nome` (mesmo se o bloco falhar)."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(nome, time.perf_counter() - inicio, **rotulos)
+
+    def relatorio(self, **extras) -> dict:
+        """
+        Monta o relatório da execução.
+
+        Parâmetros:
+            **extras: Campos adicionais incluídos no topo do relatório (ex: falhas).
+
+        Retorno:
+            dict: Início, duração, contadores e histogramas (com média e quantis aproximados).
+        """
+        with self._lock:
+            contadores = [
+                {"nome": nome, "rotulos": dict(rotulos), "valor": valor}
+                for (nome, rotulos), valor in sorted(self._contadores.items())
+            ]
+            histogramas = [
+                {
+                    "nome": nome,
+                    "rotulos": dict(rotulos),
+                    "contagem": h.contagem,
+                    "soma": round(h.soma, 6),
+                    "media": round(h.soma / h.contagem, 6),
+                    "minimo": round(h.minimo, 6),
+                    "p50": round(h.quantil(0.5), 6),
+                    "p95": round(h.quantil(0.95), 6),
+                    "maximo": round(h.maximo, 6),
+                }
+                for (nome, rotulos), h in sorted(self._histogramas.items())
+            ]
+        return {
+            "inicio": datetime.fromtimestamp(self.inicio).isoformat(timespec="seconds"),
+            "duracao_segundos": round(time.time() - self.inicio, 3),
+            **extras,
+            "contadores": contadores,
+            "histogramas": histogramas,
+        }
+
+    def texto_prometheus(self) -> str:
+        """Contadores e histogramas no formato de exposição em texto do Prometheus."""
+        linhas = []
+        with self._lock:
+            tipos_emitidos = set()
+            for (nome, rotulos), valor in sorted(self._contadores.items()):
+                if nome not in tipos_emitidos:
+                    linhas.append(f"# TYPE {nome} counter")
+                    tipos_emitidos.add(nome)
+                linhas.append(f"{nome}{_rotulos_prometheus(rotulos)} {valor}")
+            for (nome, rotulos), h in sorted(self._histogramas.items()):
+                if nome not in tipos_emitidos:
+                    linhas.append(f"# TYPE {nome} histogram")
+                    tipos_emitidos.add(nome)
+                acumulado = 0
+                for limite, quantidade in zip(h.limites, h.baldes):
+                    acumulado += quantidade
+                    linhas.append(f"{nome}_bucket{_rotulos_prometheus(rotulos + (('le', str(limite)),))} {acumulado}")
+                linhas.append(f"{nome}_bucket{_rotulos_prometheus(rotulos + (('le', '+Inf'),))} {h.contagem}")
+                linhas.append(f"{nome}_sum{_rotulos_prometheus(rotulos)} {h.soma}")
+                linhas.append(f"{nome}_count{_rotulos_prometheus(rotulos)} {h.contagem}")
+        linhas.append(f"etl_ultima_execucao_timestamp_segundos {self.inicio}")
+        return "\n".join(linhas) + "\n"
+
+    def gravar_relatorio(self, caminho: str, **extras) -> dict:
+        """Grava o relatório JSON em `caminho` (arquivo temporário + rename) e o retorna."""
+        relatorio = self.relatorio(**extras)
+        _gravar_atomico(caminho, json.dumps(relatorio, indent=2, ensure_ascii=False))
+        return relatorio
+
+    def gravar_prometheus(self, caminho: str):
+        """Grava as métricas no formato texto do Prometheus (o arquivo nunca fica pela metade)."""
+        _gravar_atomico(caminho, self.texto_prometheus())
+
+
+def _rotulos_prometheus(rotulos) -> str:
+    if not rotulos:
+        return ""
+    pares = ",".join(
+        '{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in rotulos
+    )
+    return "{" + pares + "}"
+
+
+def _gravar_atomico(caminho: str, conteudo: str):
+    temporario = f"{caminho}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        f.write(conteudo)
+    os.replace(temporario, caminho)
+
+
+def medir_tratamento(tabela: str):
+    """
+    Decorador das funções tratamento_*: mede o tempo e conta as linhas recebidas (registros brutos)
+    e devolvidas (linhas do DataFrame) para a tabela.
+    """
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def medida(lista, *args, **kwargs):
+            inicio = time.perf_counter()
+            resultado = funcao(lista, *args, **kwargs)
+            metricas = obter_metricas()
+            metricas.observar("etl_tratamento_segundos", time.perf_counter() - inicio, tabela=tabela)
+            metricas.incrementar("etl_tratamento_linhas_entrada_total", _tamanho(lista), tabela=tabela)
+            metricas.incrementar("etl_tratamento_linhas_saida_total", _tamanho(resultado), tabela=tabela)
+            return resultado
+        return medida
+    return decorador
+
+
+def medir_carga(funcao):
+    """
+    Decorador de carregar_dados: mede o tempo da carga por tabela e conta as linhas recebidas e as
+    gravadas (nos modos 'merge' e 'diff', só as inseridas, atualizadas e removidas).
+    """
+    @functools.wraps(funcao)
+    def medida(df, tabela, *args, **kwargs):
+        inicio = time.perf_counter()
+        resultado = funcao(df, tabela, *args, **kwargs)
+        metricas = obter_metricas()
+        metricas.observar("etl_carga_segundos", time.perf_counter() - inicio, tabela=tabela)
+        linhas = 0 if df is None else len(df)
+        metricas.incrementar("etl_carga_linhas_entrada_total", linhas, tabela=tabela)
+        if isinstance(resultado, dict):
+            linhas = resultado.get("inseridas", 0) + resultado.get("atualizadas", 0) + resultado.get("removidas", 0)
+        metricas.incrementar("etl_carga_linhas_gravadas_total", linhas, tabela=tabela)
+        return resultado
+    return medida
+
+
+def _tamanho(valor) -> int:
+    try:
+        return len(valor)
+    except TypeError:
+        return 0
+
+
+_metricas = Metricas()
+
+
+def obter_metricas() -> Metricas:
+    """Retorna o registro de métricas compartilhado pelo processo."""
+    return _metricas
@@ -0,0 +1,171 @@
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class ServidorOmieMock(ThreadingHTTPServer):
+    """
+    Servidor HTTP local que imita os endpoints da Omie usados pelo ETL.
+
+    Permite rodar consultar_api contra dados conhecidos, sem credenciais e sem rede.
+    Para usar, aponte a variável de ambiente OMIE_URL_BASE para `servidor.url_base`
+    antes de importar consultar_api.
+
+    Parâmetros:
+        movimentos (list, opcional): Registros devolvidos por ListarMovimentos (filtrados por dDtEmisDe/dDtEmisAte).
+        categorias (list, opcional): Registros devolvidos por ListarCategorias.
+        porta (int, opcional): Porta local; 0 escolhe uma porta livre.
+        orcamentos (list, opcional): Registros devolvidos por ListarOrcamentos (filtrados por nAno/nMes).
+        dre (list, opcional): Registros devolvidos por ListarCadastroDRE.
+        empresas (dict, opcional): app_key -> dict com as listas 'movimentos', 'categorias',
+            'orcamentos' e 'dre' de cada empresa; app_keys fora do dict usam as listas acima.
+        latencia (float | tuple, opcional): Atraso de cada resposta em segundos, ou (mínimo, máximo).
+        taxa_erro (float, opcional): Fração das requisições respondidas com erro 500 do servidor.
+        semente (int, opcional): Semente do sorteio de latência e erros.
+    """
+    daemon_threads = True
+
+    def __init__(self, movimentos=None, categorias=None, porta: int = 0, orcamentos=None, dre=None,
+                 empresas=None, latencia=0.0, taxa_erro: float = 0.0, semente: int = None):
+        super().__init__(("127.0.0.1", porta), _ManipuladorOmie)
+        self.padrao = {
+            "movimentos": movimentos or [],
+            "categorias": categorias or [],
+            "orcamentos": orcamentos or [],
+            "dre": dre or [],
+        }
+        self.empresas = empresas or {}
+        self.latencia = latencia
+        self.taxa_erro = taxa_erro
+        self.requisicoes = []
+        self.erros_simulados = 0
+        self._aleatorio = random.Random(semente)
+        self._lock = threading.Lock()
+
+    @property
+    def movimentos(self):
+        return self.padrao["movimentos"]
+
+    @property
+    def categorias(self):
+        return self.padrao["categorias"]
+
+    @property
+    def url_base(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/api/v1"
+
+    def iniciar(self):
+        """Inicia o servidor em uma thread de fundo e retorna o próprio servidor."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def parar(self):
+        self.shutdown()
+        self.server_close()
+
+    def dados(self, app_key) -> dict:
+        return self.empresas.get(app_key, self.padrao)
+
+    def sortear(self):
+        """Sorteia a latência e se a próxima resposta será um erro simulado."""
+        with self._lock:
+            if isinstance(self.latencia, (tuple, list)):
+                atraso = self._aleatorio.uniform(*self.latencia)
+            else:
+                atraso = self.latencia
+            erro = self.taxa_erro > 0 and self._aleatorio.random() < self.taxa_erro
+            if erro:
+                self.erros_simulados += 1
+        return atraso, erro
+
+
+def _data_ordenavel(data: str) -> str:
+    """'DD/MM/AAAA' -> 'AAAAMMDD', comparável como texto ('' fica fora de qualquer período)."""
+    return data[6:10] + data[3:5] + data[0:2] if data else ""
+
+
+def _filtrar_emissao(movimentos, param):
+    """Aplica os filtros dDtEmisDe/dDtEmisAte de ListarMovimentos, como a Omie."""
+    de, ate = param.get("dDtEmisDe"), param.get("dDtEmisAte")
+    if not de and not ate:
+        return movimentos
+    de, ate = _data_ordenavel(de) or "00000000", _data_ordenavel(ate) or "99999999"
+    return [m for m in movimentos if de <= _data_ordenavel(m["detalhes"].get("dDtEmissao", "")) <= ate]
+
+
+def _paginar(registros, pagina, por_pagina):
+    inicio = (pagina - 1) * por_pagina
+    return registros[inicio:inicio + por_pagina], max(1, math.ceil(len(registros) / por_pagina))
+
+
+class _ManipuladorOmie(BaseHTTPRequestHandler):
+    # HTTP/1.1 mantém a conexão aberta entre requisições, como o servidor real
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        corpo = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        with self.server._lock:
+            self.server.requisicoes.append(corpo)
+
+        atraso, erro = self.server.sortear()
+        if atraso:
+            time.sleep(atraso)
+        if erro:
+            self._responder(500, {"faultstring": "Erro interno simulado pelo mock.",
+                                  "faultcode": "SOAP-ENV:Server"})
+            return
+
+        call = corpo.get("call")
+        param = (corpo.get("param") or [{}])[0]
+        dados = self.server.dados(corpo.get("app_key"))
+
+        if call == "ListarMovimentos":
+            pagina, por_pagina = param.get("nPagina", 1), param.get("nRegPorPagina", 50)
+            movimentos = _filtrar_emissao(dados["movimentos"], param)
+            lista, total_paginas = _paginar(movimentos, pagina, por_pagina)
+            resposta = {
+                "nPagina": pagina,
+                "nTotPaginas": total_paginas,
+                "nRegistros": len(lista),
+                "nTotRegistros": len(movimentos),
+                "movimentos": lista,
+            }
+        elif call == "ListarCategorias":
+            pagina, por_pagina = param.get("pagina", 1), param.get("registros_por_pagina", 50)
+            lista, total_paginas = _paginar(dados["categorias"], pagina, por_pagina)
+            resposta = {
+                "pagina": pagina,
+                "total_de_paginas": total_paginas,
+                "registros": len(lista),
+                "total_de_registros": len(dados["categorias"]),
+                "categoria_cadastro": lista,
+            }
+        elif call == "ListarOrcamentos":
+            ano, mes = param.get("nAno"), param.get("nMes")
+            resposta = {"ListaOrcamentos": [
+                item for item in dados["orcamentos"]
+                if item.get("nAno", ano) == ano and item.get("nMes", mes) == mes
+            ]}
+        elif call == "ListarCadastroDRE":
+            resposta = {"totalRegistros": len(dados["dre"]), "dreLista": dados["dre"]}
+        else:
+            self._responder(500, {"faultstring": f"Método não suportado pelo mock: {call}",
+                                  "faultcode": "SOAP-ENV:Client-6"})
+            return
+
+        self._responder(200, resposta)
+
+    def _responder(self, status, corpo):
+        dados = json.dumps(corpo).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def log_message(self, format, *args):
+        # Silencia o log de acesso padrão do http.server
+        pass
@@ -0,0 +1,147 @@
+"""
+Geração de payloads sintéticos no formato devolvido pela API da Omie, para benchmarks e testes locais.
+
+Os geradores são determinísticos: a mesma semente e os mesmos parâmetros produzem sempre os mesmos registros.
+"""
+import random
+
+
+def gerar_movimentos(quantidade: int, empresa: str = "EMPRESA_BENCH", semente: int = 42) -> list:
+    """Gera movimentos no formato devolvido por ListarMovimentos."""
+    aleatorio = random.Random(semente)
+    movimentos = []
+    for i in range(quantidade):
+        dia = aleatorio.randint(1, 28)
+        valor = round(aleatorio.uniform(10, 50000), 2)
+        movimentos.append({
+            "detalhes": {
+                "nCodTitulo": 1000000 + i,
+                "cNumTitulo": f"T{i}",
+                "dDtEmissao": f"{dia:02d}/02/2025",
+                "dDtVenc": f"{dia:02d}/03/2025",
+                "nCodCliente": aleatorio.randint(1, 5000),
+                "cStatus": aleatorio.choice(["A VENCER", "PAGO", "ATRASADO", "RECEBIDO"]),
+                "cNatureza": aleatorio.choice(["P", "R"]),
+                "cTipo": "99999",
+                "cOperacao": "01",
+                "cCodCateg": f"2.01.{aleatorio.randint(1, 99):02d}",
+                "nValorTitulo": valor,
+                "nCodMovCC": 5000000 + i,
+                "observacao": "Pagamento referente ao contrato\tde serviços",
+                "dDtInc": f"{dia:02d}/02/2025",
+                "cHrInc": "10:15:00",
+            },
+            "resumo": {"cLiquidado": "N", "nValPago": 0, "nValAberto": valor, "nValLiquido": valor},
+            # Rateios devolvidos pela Omie, que o tratamento não usa
+            "departamentos": [{"cCodDepartamento": "1", "nDistrPercentual": 100, "nDistrValor": valor, "nValorFixo": "N"}],
+            "categorias": [{"cCodCateg": "2.01.01", "nDistrPercentual": 100, "nDistrValor": valor, "nValorFixo": "N"}],
+            "empresa": empresa,
+        })
+    return movimentos
+
+
+def _codigo_categoria(i: int) -> str:
+    return f"{1 + i // 9801}.{1 + (i // 99) % 99:02d}.{1 + i % 99:02d}"
+
+
+def gerar_categorias(quantidade: int, empresa: str = "EMPRESA_BENCH", semente: int = 42) -> list:
+    """Gera categorias no formato devolvido por ListarCategorias (categoria_cadastro)."""
+    aleatorio = random.Random(semente)
+    categorias = []
+    for i in range(quantidade):
+        codigo = _codigo_categoria(i)
+        receita = aleatorio.random() < 0.4
+        codigo_dre = f"{aleatorio.randint(1, 9)}.{aleatorio.randint(1, 20):02d}"
+        categorias.append({
+            "codigo": codigo,
+            "descricao": f"Despesas com servi&ccedil;os {i}" if not receita else f"Receita de vendas {i}",
+            "descricao_padrao": "Servi&ccedil;os de terceiros" if not receita else "Receitas operacionais",
+            "tipo_categoria": "R" if receita else "D",
+            "conta_inativa": aleatorio.choice(["N", "N", "N", "S"]),
+            "definida_pelo_usuario": aleatorio.choice(["S", "N"]),
+            "id_conta_contabil": aleatorio.randint(1, 900) if aleatorio.random() < 0.7 else "",
+            "tag_conta_contabil": "",
+            "conta_despesa": "N" if receita else "S",
+            "conta_receita": "S" if receita else "N",
+            "nao_exibir": "N",
+            "natureza": "Receita" if receita else "Despesa",
+            "totalizadora": "N",
+            "transferencia": "N",
+            "codigo_dre": codigo_dre,
+            "categoria_superior": codigo.rsplit(".", 1)[0],
+            "dadosDRE": {
+                "codigoDRE": codigo_dre,
+                "descricaoDRE": f"Grupo DRE {codigo_dre}",
+                "naoExibirDRE": "N",
+                "nivelDRE": aleatorio.randint(1, 3),
+                "sinalDRE": "+" if receita else "-",
+                "totalizaDRE": "N",
+            },
+            "empresa": empresa,
+        })
+    return categorias
+
+
+def gerar_orcamentos(quantidade: int, empresa: str = "EMPRESA_BENCH", ano: int = 2025, mes: int = 2,
+                     semente: int = 42) -> list:
+    """Gera orçamentos de um mês no formato devolvido por ListarOrcamentos (ListaOrcamentos)."""
+    aleatorio = random.Random(semente * 1000 + ano * 12 + mes)
+    orcamentos = []
+    for i in range(quantidade):
+        previsto = round(aleatorio.uniform(100, 100000), 2)
+        orcamentos.append({
+            "cCodCateg": _codigo_categoria(i),
+            "cDesCateg": f"Categoria {i}",
+            "nValorPrevisto": previsto,
+            "nValorRealizado": round(previsto * aleatorio.uniform(0.5, 1.3), 2),
+            "empresa": empresa,
+            "nAno": ano,
+            "nMes": mes,
+        })
+    return orcamentos
+
+
+def gerar_dre(quantidade: int, empresa: str = "EMPRESA_BENCH", semente: int = 42) -> list:
+    """Gera contas do DRE no formato devolvido por ListarCadastroDRE (dreLista)."""
+    aleatorio = random.Random(semente)
+    return [
+        {
+            "codigoDRE": f"{1 + i // 100}.{i % 100:02d}",
+            "descricaoDRE": f"Conta DRE {i}",
+            "naoExibirDRE": aleatorio.choice(["N", "N", "S"]),
+            "nivelDRE": 1 + i % 3,
+            "sinalDRE": aleatorio.choice(["+", "-"]),
+            "totalizaDRE": "S" if i % 100 == 0 else "N",
+            "empresa": empresa,
+        }
+        for i in range(quantidade)
+    ]
+
+
+def gerar_empresas(quantidade_empresas: int, movimentos: int = 1000, categorias: int = 200,
+                   orcamentos: int = 100, dre: int = 50, meses: list = None) -> dict:
+    """
+    Gera o conjunto completo de dados de várias empresas (empresas × registros).
+
+    Parâmetros:
+        quantidade_empresas (int): Quantidade de empresas.
+        movimentos, categorias, orcamentos, dre (int, opcional): Registros por empresa
+            (orcamentos é a quantidade por mês).
+        meses (list, opcional): Meses (ano, mês) de orçamento; por padrão apenas (2025, 2).
+
+    Retorno:
+        dict: Nome da empresa -> {'movimentos', 'categorias', 'orcamentos', 'dre'} com as listas brutas.
+    """
+    meses = meses or [(2025, 2)]
+    empresas = {}
+    for n in range(quantidade_empresas):
+        nome = f"EMPRESA_{n + 1:03d}"
+        empresas[nome] = {
+            "movimentos": gerar_movimentos(movimentos, nome, semente=n),
+            "categorias": gerar_categorias(categorias, nome, semente=n),
+            "orcamentos": [
+                item for ano, mes in meses for item in gerar_orcamentos(orcamentos, nome, ano, mes, semente=n)
+            ],
+            "dre": gerar_dre(dre, nome, semente=n),
+        }
+    return empresas
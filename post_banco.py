@@ -1,6 +1,13 @@
-from sqlalchemy import create_engine, Column, String, Integer, Boolean, ForeignKey, DECIMAL, Date, Text, text, BigInteger  # noqa: F401
-from sqlalchemy.orm import sessionmaker, declarative_base
+import hashlib
+from sqlalchemy import bindparam, inspect
+from sqlalchemy import create_engine, Column, String, Integer, Boolean, ForeignKey, DECIMAL, Date, DateTime, Text, text, BigInteger, UniqueConstraint, Index, MetaData, Table  # noqa: F401
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import sessionmaker, declarative_base  # noqa: F401
+from sqlalchemy.schema import CreateIndex, CreateTable
 import pandas as pd  # noqa: F401
+from escrita_bulk import escolher_estrategia
+from metricas import medir_carga
+from tratar_dados import restaurar_tipos
 
 
 def conectar_banco(user, password, host, name):
@@ -26,177 +33,334 @@ def conectar_banco(user, password, host, name):
     db_host = host
     db_name = name
 
-    engine = create_engine(f'mysql+pymysql://{db_user}:{db_password}@{db_host}:3306/{db_name}')
+    # local_infile libera o LOAD DATA LOCAL INFILE usado pela estratégia de carga 'load_data'
+    engine = create_engine(f'mysql+pymysql://{db_user}:{db_password}@{db_host}:3306/{db_name}',
+                           connect_args={'local_infile': True})
     return engine
 
-def criar_tabelas():
-    db = conectar_banco(user='', password='', host='', name='')
-
-
-    Session = sessionmaker(bind=db)
-    session = Session()  # noqa: F841
-    Base = declarative_base()
-
-    class Movimentacao(Base):
-        __tablename__ = 'movimentacoes'
-        ID = Column(Integer, primary_key=True, autoincrement=True)
-        nCodTitulo = Column(BigInteger)  # Alterado para BigInteger
-        empresa = Column(String(50))
-        cCodIntTitulo = Column(String(60))
-        cNumTitulo = Column(String(20))
-        dDtEmissao = Column(Date)
-        dDtVenc = Column(Date)
-        dDtPrevisao = Column(Date)
-        dDtPagamento = Column(Date)
-        nCodCliente = Column(BigInteger)  # Alterado para BigInteger
-        cCPFCNPJCliente = Column(String(20))
-        nCodCtr = Column(BigInteger)  # Alterado para BigInteger
-        cNumCtr = Column(String(20))
-        nCodOS = Column(BigInteger)  # Alterado para BigInteger
-        cNumOS = Column(String(15))
-        nCodCC = Column(BigInteger)  # Alterado para BigInteger
-        cStatus = Column(String(100))
-        cNatureza = Column(String(1))
-        cTipo = Column(String(5))
-        cOperacao = Column(String(2))
-        cNumDocFiscal = Column(String(20))
-        cCodCateg = Column(String(20))
-        cNumParcela = Column(String(7))
-        nValorTitulo = Column(DECIMAL)
-        nValorPIS = Column(DECIMAL)
-        cRetPIS = Column(String(1))
-        nValorCOFINS = Column(DECIMAL)
-        cRetCOFINS = Column(String(1))
-        nValorCSLL = Column(DECIMAL)
-        cRetCSLL = Column(String(1))
-        nValorIR = Column(DECIMAL)
-        cRetIR = Column(String(1))
-        nValorISS = Column(DECIMAL)
-        cRetISS = Column(String(1))
-        nValorINSS = Column(DECIMAL)
-        cRetINSS = Column(String(1))
-        cCodProjeto = Column(BigInteger)  # Alterado para BigInteger
-        observacao = Column(Text)
-        cCodVendedor = Column(BigInteger)  # Alterado para BigInteger
-        nCodComprador = Column(BigInteger)  # Alterado para BigInteger
-        cCodigoBarras = Column(String(70))
-        cNSU = Column(String(100))
-        nCodNF = Column(BigInteger)  # Alterado para BigInteger
-        dDtRegistro = Column(Date)
-        cNumBoleto = Column(String(30))
-        cChaveNFe = Column(String(44))
-        cOrigem = Column(String(4))
-        nCodTitRepet = Column(BigInteger)  # Alterado para BigInteger
-        cGrupo = Column(String(20))
-        nCodMovCC = Column(BigInteger)  # Alterado para BigInteger
-        nValorMovCC = Column(DECIMAL)
-        nCodMovCCRepet = Column(BigInteger)  # Alterado para BigInteger
-        nDesconto = Column(DECIMAL)
-        nJuros = Column(DECIMAL)
-        nMulta = Column(DECIMAL)
-        nCodBaixa = Column(BigInteger)  # Alterado para BigInteger
-        dDtCredito = Column(Date)
-        dDtConcilia = Column(Date)
-        cHrConcilia = Column(String(8))
-        cUsConcilia = Column(String(10))
-        dDtInc = Column(Date)
-        cHrInc = Column(String(8))
-        cUsInc = Column(String(10))
-        dDtAlt = Column(Date)
-        cHrAlt = Column(String(8))
-        cUsAlt = Column(String(10))
-        resumo_cLiquidado = Column(String(1))
-        resumo_nValPago = Column(DECIMAL)
-        resumo_nValAberto = Column(DECIMAL)
-        resumo_nDesconto = Column(DECIMAL)
-        resumo_nJuros = Column(DECIMAL)
-        resumo_nMulta = Column(DECIMAL)
-        resumo_nValLiquido = Column(DECIMAL)
-
-        def _init_(self, **kwargs):
-            for key, value in kwargs.items():
-                setattr(self, key, value)
-
-
-    class Categoria(Base):
-        __tablename__ = 'categorias'
-
-        ID = Column(String(50), primary_key=True)
-        codigo = Column(String(20))
-        empresa = Column(String(50))
-        descricao = Column(String(100))
-        descricao_padrao = Column(String(100))
-        tipo_categoria = Column(String(3))
-        conta_inativa = Column(String(1))
-        definida_pelo_usuario = Column(String(1))
-        id_conta_contabil = Column(Integer)
-        tag_conta_contabil = Column(String(20))
-        conta_despesa = Column(String(1))
-        conta_receita = Column(String(1))
-        nao_exibir = Column(String(1))
-        natureza = Column(String(500))
-        totalizadora = Column(String(1))
-        transferencia = Column(String(1))
-        codigo_dre = Column(String(10))
-        categoria_superior = Column(Text)
-        dre_codigoDRE = Column(String(10))
-        dre_descricaoDRE = Column(String(40))
-        dre_naoExibirDRE = Column(String(1))
-        dre_nivelDRE = Column(Integer)
-        dre_sinalDRE = Column(String(1))
-        dre_totalizaDRE = Column(String(1))
-
-        def _init_(self, **kwargs):
-            for key, value in kwargs.items():
-                setattr(self, key, value)
-
-    class Orcamento(Base):
-        __tablename__ = 'orcamentos'
-
-        ID = Column(String(50), primary_key=True)
-        cCodCateg = Column(String(20))
-        cDesCateg = Column(String(500))
-        nValorPrevisto = Column(DECIMAL)
-        nValorRealizado = Column(DECIMAL)
-        nAno = Column(Integer)
-        nMes = Column(Integer)
-        empresa = Column(String(50))
-        
-        def _init_(self, **kwargs):
-            for key, value in kwargs.items():
-                setattr(self, key, value)
-                
-    class Dre(Base):
-        __tablename__ = 'dre'
-
-        ID = Column(String(50), primary_key=True)
-        codigoDRE = Column(String(20))
-        descricaoDRE = Column(String(500))
-        naoExibirDRE = Column(String(10))
-        nivelDRE = Column(Integer)
-        sinalDRE = Column(String(10))
-        totalizaDRE = Column(String(10))
-        empresa = Column(String(50))
-        
-        def _init_(self, **kwargs):
-            for key, value in kwargs.items():
-                setattr(self, key, value)
+# Chave natural de cada tabela, usada pela carga com upsert (modo='merge')
+CHAVES_NATURAIS = {
+    'movimentacoes': ['empresa', 'nCodTitulo', 'nCodMovCC'],
+    'categorias': ['ID'],
+    'orcamentos': ['ID', 'nAno', 'nMes'],
+    'dre': ['ID'],
+}
+
+# Colunas preenchidas pelo próprio banco (autoincremento), nunca enviadas no upsert
+COLUNAS_GERADAS = {
+    'movimentacoes': ['ID'],
+}
+
+# Coluna de data que delimita a partição (empresa, período) substituída pela carga com `empresas`
+COLUNA_PARTICAO = {
+    'movimentacoes': 'dDtEmissao',
+}
+
+
+# Modelos das tabelas do banco, declarados uma única vez; o DDL só roda em `criar_tabelas`
+Base = declarative_base()
+
+
+class Movimentacao(Base):
+    __tablename__ = 'movimentacoes'
+    __table_args__ = (
+        UniqueConstraint(*CHAVES_NATURAIS['movimentacoes'], name='uq_movimentacoes_chave'),
+        # Usado pela substituição por (empresa, período) e pelo DELETE do intervalo de emissão
+        Index('ix_movimentacoes_empresa_emissao', 'empresa', 'dDtEmissao'),
+    )
+    ID = Column(Integer, primary_key=True, autoincrement=True)
+    nCodTitulo = Column(BigInteger)  # Alterado para BigInteger
+    empresa = Column(String(50))
+    cCodIntTitulo = Column(String(60))
+    cNumTitulo = Column(String(20))
+    dDtEmissao = Column(Date)
+    dDtVenc = Column(Date)
+    dDtPrevisao = Column(Date)
+    dDtPagamento = Column(Date)
+    nCodCliente = Column(BigInteger)  # Alterado para BigInteger
+    cCPFCNPJCliente = Column(String(20))
+    nCodCtr = Column(BigInteger)  # Alterado para BigInteger
+    cNumCtr = Column(String(20))
+    nCodOS = Column(BigInteger)  # Alterado para BigInteger
+    cNumOS = Column(String(15))
+    nCodCC = Column(BigInteger)  # Alterado para BigInteger
+    cStatus = Column(String(100))
+    cNatureza = Column(String(1))
+    cTipo = Column(String(5))
+    cOperacao = Column(String(2))
+    cNumDocFiscal = Column(String(20))
+    cCodCateg = Column(String(20))
+    cNumParcela = Column(String(7))
+    nValorTitulo = Column(DECIMAL(15, 2))
+    nValorPIS = Column(DECIMAL(15, 2))
+    cRetPIS = Column(String(1))
+    nValorCOFINS = Column(DECIMAL(15, 2))
+    cRetCOFINS = Column(String(1))
+    nValorCSLL = Column(DECIMAL(15, 2))
+    cRetCSLL = Column(String(1))
+    nValorIR = Column(DECIMAL(15, 2))
+    cRetIR = Column(String(1))
+    nValorISS = Column(DECIMAL(15, 2))
+    cRetISS = Column(String(1))
+    nValorINSS = Column(DECIMAL(15, 2))
+    cRetINSS = Column(String(1))
+    cCodProjeto = Column(BigInteger)  # Alterado para BigInteger
+    observacao = Column(Text)
+    cCodVendedor = Column(BigInteger)  # Alterado para BigInteger
+    nCodComprador = Column(BigInteger)  # Alterado para BigInteger
+    cCodigoBarras = Column(String(70))
+    cNSU = Column(String(100))
+    nCodNF = Column(BigInteger)  # Alterado para BigInteger
+    dDtRegistro = Column(Date)
+    cNumBoleto = Column(String(30))
+    cChaveNFe = Column(String(44))
+    cOrigem = Column(String(4))
+    nCodTitRepet = Column(BigInteger)  # Alterado para BigInteger
+    cGrupo = Column(String(20))
+    nCodMovCC = Column(BigInteger)  # Alterado para BigInteger
+    nValorMovCC = Column(DECIMAL(15, 2))
+    nCodMovCCRepet = Column(BigInteger)  # Alterado para BigInteger
+    nDesconto = Column(DECIMAL(15, 2))
+    nJuros = Column(DECIMAL(15, 2))
+    nMulta = Column(DECIMAL(15, 2))
+    nCodBaixa = Column(BigInteger)  # Alterado para BigInteger
+    dDtCredito = Column(Date)
+    dDtConcilia = Column(Date)
+    cHrConcilia = Column(String(8))
+    cUsConcilia = Column(String(10))
+    dDtInc = Column(Date)
+    cHrInc = Column(String(8))
+    cUsInc = Column(String(10))
+    dDtAlt = Column(Date)
+    cHrAlt = Column(String(8))
+    cUsAlt = Column(String(10))
+    dtHrConcilia = Column(DateTime)  # dDtConcilia + cHrConcilia
+    dtHrInc = Column(DateTime)  # dDtInc + cHrInc
+    dtHrAlt = Column(DateTime)  # dDtAlt + cHrAlt
+    resumo_cLiquidado = Column(String(1))
+    resumo_nValPago = Column(DECIMAL(15, 2))
+    resumo_nValAberto = Column(DECIMAL(15, 2))
+    resumo_nDesconto = Column(DECIMAL(15, 2))
+    resumo_nJuros = Column(DECIMAL(15, 2))
+    resumo_nMulta = Column(DECIMAL(15, 2))
+    resumo_nValLiquido = Column(DECIMAL(15, 2))
+
+    def _init_(self, **kwargs):
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+
+class Categoria(Base):
+    __tablename__ = 'categorias'
+
+    ID = Column(String(50), primary_key=True)
+    codigo = Column(String(20))
+    empresa = Column(String(50))
+    descricao = Column(String(100))
+    descricao_padrao = Column(String(100))
+    tipo_categoria = Column(String(3))
+    conta_inativa = Column(String(1))
+    definida_pelo_usuario = Column(String(1))
+    id_conta_contabil = Column(Integer)
+    tag_conta_contabil = Column(String(20))
+    conta_despesa = Column(String(1))
+    conta_receita = Column(String(1))
+    nao_exibir = Column(String(1))
+    natureza = Column(String(500))
+    totalizadora = Column(String(1))
+    transferencia = Column(String(1))
+    codigo_dre = Column(String(10))
+    categoria_superior = Column(Text)
+    dre_codigoDRE = Column(String(10))
+    dre_descricaoDRE = Column(String(40))
+    dre_naoExibirDRE = Column(String(1))
+    dre_nivelDRE = Column(Integer)
+    dre_sinalDRE = Column(String(1))
+    dre_totalizaDRE = Column(String(1))
+    hash_linha = Column(String(32))  # Hash do conteúdo da linha, usado na carga com modo='diff'
+
+    def _init_(self, **kwargs):
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+class Orcamento(Base):
+    __tablename__ = 'orcamentos'
+
+    # O mesmo ID (categoria + empresa) se repete em cada mês do orçamento
+    ID = Column(String(50), primary_key=True)
+    cCodCateg = Column(String(20))
+    cDesCateg = Column(String(500))
+    nValorPrevisto = Column(DECIMAL(15, 2))
+    nValorRealizado = Column(DECIMAL(15, 2))
+    nAno = Column(Integer, primary_key=True, autoincrement=False)
+    nMes = Column(Integer, primary_key=True, autoincrement=False)
+    empresa = Column(String(50))
+    
+    def _init_(self, **kwargs):
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+            
+class Dre(Base):
+    __tablename__ = 'dre'
+
+    ID = Column(String(50), primary_key=True)
+    codigoDRE = Column(String(20))
+    descricaoDRE = Column(String(500))
+    naoExibirDRE = Column(String(10))
+    nivelDRE = Column(Integer)
+    sinalDRE = Column(String(10))
+    totalizaDRE = Column(String(10))
+    empresa = Column(String(50))
+    hash_linha = Column(String(32))  # Hash do conteúdo da linha, usado na carga com modo='diff'
     
-    Base.metadata.create_all(bind=db)
-criar_tabelas()
+    def _init_(self, **kwargs):
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+
+# Tabela com a impressão digital do esquema já aplicado, para pular a verificação de DDL
+TABELA_ESQUEMA = 'etl_esquema'
+
+# Engines (URL) cujo esquema já foi conferido neste processo
+_esquemas_conferidos = set()
+
+
+def impressao_esquema(engine) -> str:
+    """
+    Impressão digital (SHA-256) do DDL dos modelos, compilado para o dialeto do banco.
+    Muda sempre que uma tabela, coluna, tipo, restrição ou índice dos modelos muda.
+    """
+    ddl = "\n".join(
+        str(comando.compile(dialect=engine.dialect)).strip()
+        for tabela in Base.metadata.sorted_tables
+        for comando in [CreateTable(tabela)] + [CreateIndex(indice) for indice in sorted(tabela.indexes, key=lambda i: i.name)]
+    )
+    return hashlib.sha256(ddl.encode("utf-8")).hexdigest()
+
+
+def criar_tabelas(engine=None, forcar=False):
+    """
+    Cria as tabelas que ainda não existem no banco.
+
+    A verificação completa (uma consulta por tabela e o DDL) só roda quando a impressão digital dos
+    modelos é diferente da gravada no banco na última execução, ou quando `forcar=True`. No mesmo
+    processo, cada engine é conferida uma única vez. Nas tabelas já existentes são acrescentadas
+    as colunas e os índices novos e ajustados precisão e escala das colunas DECIMAL.
+
+    Parâmetros:
+    - engine (sqlalchemy.engine.base.Engine, opcional): Banco de destino; por padrão `conectar_banco`.
+    - forcar (bool, opcional): Ignora a impressão digital gravada e refaz a verificação.
+
+    Retorna:
+    - bool: True se a verificação completa foi executada, False se o esquema já estava atualizado.
+    """
+    db = engine if engine is not None else conectar_banco(user='', password='', host='', name='')
+    url = db.url.render_as_string(hide_password=True)
+    if not forcar and url in _esquemas_conferidos:
+        return False
+
+    impressao = impressao_esquema(db)
+    if not forcar:
+        try:
+            with db.connect() as conn:
+                gravada = conn.execute(text(f"SELECT impressao FROM {TABELA_ESQUEMA}")).scalar()
+        except DBAPIError:
+            gravada = None  # Primeira execução: a tabela de controle ainda não existe
+        if gravada == impressao:
+            _esquemas_conferidos.add(url)
+            return False
+
+    with db.begin() as conn:
+        Base.metadata.create_all(bind=conn)
+        adicionar_colunas_faltantes(conn)
+        ajustar_colunas_decimais(conn)
+        adicionar_indices_faltantes(conn)
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {TABELA_ESQUEMA} (impressao VARCHAR(64) NOT NULL)"))
+        conn.execute(text(f"DELETE FROM {TABELA_ESQUEMA}"))
+        conn.execute(text(f"INSERT INTO {TABELA_ESQUEMA} (impressao) VALUES (:impressao)"), {"impressao": impressao})
+    _esquemas_conferidos.add(url)
+    return True
+
+
+def adicionar_colunas_faltantes(conn):
+    """
+    Acrescenta às tabelas já existentes as colunas novas dos modelos (ex: hash_linha),
+    já que o create_all só cria tabelas inteiras.
+    """
+    inspetor = inspect(conn)
+    for tabela in Base.metadata.sorted_tables:
+        existentes = {coluna["name"] for coluna in inspetor.get_columns(tabela.name)}
+        for coluna in tabela.columns:
+            if coluna.name not in existentes:
+                tipo = coluna.type.compile(dialect=conn.dialect)
+                conn.execute(text(f"ALTER TABLE {tabela.name} ADD COLUMN {coluna.name} {tipo}"))
+
+
+def ajustar_colunas_decimais(conn):
+    """
+    Altera as colunas DECIMAL das tabelas já existentes cuja precisão ou escala difere da dos modelos
+    (ex: valores monetários criados como DECIMAL(10,0), que truncavam os centavos).
+    No SQLite não há o que ajustar: o tipo é só uma afinidade e os valores são gravados como estão.
+    """
+    if conn.dialect.name == 'sqlite':
+        return
+    inspetor = inspect(conn)
+    for tabela in Base.metadata.sorted_tables:
+        existentes = {coluna["name"]: coluna["type"] for coluna in inspetor.get_columns(tabela.name)}
+        for coluna in tabela.columns:
+            if not isinstance(coluna.type, DECIMAL) or coluna.name not in existentes:
+                continue
+            atual = existentes[coluna.name]
+            if (getattr(atual, "precision", None), getattr(atual, "scale", None)) == (coluna.type.precision, coluna.type.scale):
+                continue
+            tipo = coluna.type.compile(dialect=conn.dialect)
+            nulo = "NULL" if coluna.nullable else "NOT NULL"
+            conn.execute(text(f"ALTER TABLE {tabela.name} MODIFY COLUMN {coluna.name} {tipo} {nulo}"))
+
+
+def adicionar_indices_faltantes(conn):
+    """Cria nas tabelas já existentes os índices novos dos modelos (o create_all só os cria com a tabela)."""
+    inspetor = inspect(conn)
+    for tabela in Base.metadata.sorted_tables:
+        existentes = {indice["name"] for indice in inspetor.get_indexes(tabela.name)}
+        for indice in tabela.indexes:
+            if indice.name not in existentes:
+                indice.create(bind=conn)
+
+
+@medir_carga
 def carregar_dados(df, tabela, engine, **kwargs):
     """
     Carrega um DataFrame para uma tabela no banco de dados MySQL.
 
     Parâmetros:
-    - df (pandas.DataFrame): DataFrame contendo os dados a serem inseridos.
+    - df (pandas.DataFrame): DataFrame contendo os dados a serem inseridos. Se for None ou vazio,
+      apenas os registros do destino são removidos.
     - tabela (str): Nome da tabela no banco de dados.
     - engine (sqlalchemy.engine.base.Engine): Objeto de conexão com o banco de dados.
     - **kwargs: Parâmetros opcionais (ex: dtinicio, dtfim, ano, mes para filtragem).
+      Em orcamentos, `empresa` junto com ano e mes restringe a substituição àquela empresa.
+      Em movimentacoes, dtinicio e dtfim substituem o período por meio de uma tabela de staging
+      (ver `substituir_particoes`); com `empresas`, só o período dessas empresas.
+      Com `chaves` (lista de colunas), as linhas são mescladas: apenas os registros do banco com as
+      mesmas chaves do DataFrame são substituídos, dentro de uma única transação.
+      Com `modo='merge'`, faz upsert pela chave natural da tabela (ver `upsert_dados`).
+      Com `modo='diff'`, grava só as linhas novas, alteradas ou removidas, comparando o hash de
+      cada linha com o gravado no banco (ver `sincronizar_por_hash`).
+      `estrategia` escolhe o método de inserção ('multi', 'executemany' ou 'load_data');
+      por padrão é usado o definido em escrita_bulk.ESTRATEGIA_POR_TABELA.
+
+    Retorna:
+    - dict | None: Contagem de linhas inseridas, atualizadas e inalteradas nos modos 'merge' e 'diff'
+      (no 'diff', também das removidas); no período de movimentacoes, das removidas e inseridas.
 
     Exemplo de uso:
     python
     carregar_dados(df, "movimentacoes", engine, dtinicio="2024-01-01", dtfim="2024-12-31")
+    carregar_dados(df, "movimentacoes", engine, dtinicio="2024-01-01", dtfim="2024-12-31", empresas=["EMPRESA_X"])
+    carregar_dados(df, "movimentacoes", engine, chaves=["empresa", "nCodTitulo"])
+    carregar_dados(df, "categorias", engine, modo="merge")
+    carregar_dados(df, "dre", engine, modo="diff")
     
     """
 
@@ -204,6 +368,25 @@ def carregar_dados(df, tabela, engine, **kwargs):
     dtfim = kwargs.get("dtfim")
     ano = kwargs.get("ano")
     mes = kwargs.get("mes")
+    chaves = kwargs.get("chaves")
+    metodo = escolher_estrategia(tabela, engine, kwargs.get("estrategia"))
+
+    # DataFrames no modo compacto (centavos, category) voltam aos tipos do banco sem perda. Nas
+    # cargas que gravam em partes, cada fatia é restaurada só na hora de ser gravada (os valores
+    # Decimal ocupam bem mais memória que os centavos); upsert e diff precisam do DataFrame inteiro.
+    if kwargs.get("modo") == "merge":
+        return upsert_dados(restaurar_tipos(df), tabela, engine)
+
+    if kwargs.get("modo") == "diff":
+        return sincronizar_por_hash(restaurar_tipos(df), tabela, engine, metodo=metodo)
+
+    if chaves:
+        mesclar_lotes_por_chave(_fatias_restauradas(df), tabela, engine, chaves, metodo=metodo)
+        return
+
+    if tabela in COLUNA_PARTICAO and dtinicio and dtfim:
+        return substituir_particoes(_fatias_restauradas(df), tabela, engine, kwargs.get("empresas"), dtinicio, dtfim,
+                                    metodo=metodo)
  
     # with engine.begin() as conn:
     #     conn.execute(text(f"DELETE FROM {tabela}"))
@@ -211,22 +394,451 @@ def carregar_dados(df, tabela, engine, **kwargs):
     # df.to_sql(name=tabela, con=engine, if_exists='append', index=False, chunksize=10000)
 
     with engine.begin() as conn:
-        if tabela == 'movimentacoes' and dtinicio and dtfim:
-            if dtinicio and dtfim:
-                # Usa placeholders para evitar SQL Injection
-                conn.execute(
-                    text(f"DELETE FROM {tabela} WHERE dDtEmissao BETWEEN :dtinicio AND :dtfim"),
-                    {"dtinicio": dtinicio, "dtfim": dtfim})
-            else:
-                conn.execute(text(f"DELETE FROM {tabela}"))    
-            
-        elif tabela == 'orcamentos' and ano and mes:
+        apagar_destino(conn, tabela, dtinicio=dtinicio, dtfim=dtfim, ano=ano, mes=mes, empresa=kwargs.get("empresa"))
+
+        # Na mesma transação do DELETE: se a inserção falhar, a tabela volta ao estado anterior
+        for fatia in _fatias_restauradas(df):
+            fatia.to_sql(name=tabela, con=conn, if_exists='append', index=False, chunksize=10000, method=metodo)
+
+
+def _fatias_restauradas(df, tamanho=10000):
+    """Fatias de `tamanho` linhas do DataFrame, cada uma com os tipos do banco (ver `restaurar_tipos`)."""
+    if df is None or df.empty:
+        return
+    for inicio in range(0, len(df), tamanho):
+        yield restaurar_tipos(df.iloc[inicio:inicio + tamanho])
+
+
+def apagar_destino(conn, tabela, dtinicio=None, dtfim=None, ano=None, mes=None, empresa=None):
+    """
+    Apaga da tabela os registros que serão substituídos pela carga: o intervalo de emissão
+    em movimentacoes, o mês (opcionalmente de uma só empresa) em orcamentos ou a tabela inteira
+    nos demais casos.
+    """
+    if tabela == 'movimentacoes' and dtinicio and dtfim:
+        if dtinicio and dtfim:
             # Usa placeholders para evitar SQL Injection
             conn.execute(
-                 text(f"DELETE FROM {tabela} WHERE nAno = :ano AND nMes = :mes"),
-                {"ano": ano, "mes": mes}
-            )
+                text(f"DELETE FROM {tabela} WHERE dDtEmissao BETWEEN :dtinicio AND :dtfim"),
+                {"dtinicio": dtinicio, "dtfim": dtfim})
         else:
-            conn.execute(text(f"DELETE FROM {tabela}"))
+            conn.execute(text(f"DELETE FROM {tabela}"))    
+        
+    elif tabela == 'orcamentos' and ano and mes and empresa:
+        conn.execute(
+            text(f"DELETE FROM {tabela} WHERE nAno = :ano AND nMes = :mes AND empresa = :empresa"),
+            {"ano": ano, "mes": mes, "empresa": empresa}
+        )
+    elif tabela == 'orcamentos' and ano and mes:
+        # Usa placeholders para evitar SQL Injection
+        conn.execute(
+             text(f"DELETE FROM {tabela} WHERE nAno = :ano AND nMes = :mes"),
+            {"ano": ano, "mes": mes}
+        )
+    else:
+        conn.execute(text(f"DELETE FROM {tabela}"))
+
+
+def carregar_dados_em_lotes(lotes, tabela, engine, **kwargs):
+    """
+    Carrega no banco uma sequência de DataFrames (ex: uma página tratada por vez), sem juntar tudo em memória.
+
+    Sem `chaves` nem `modo`, a limpeza do destino (ver `apagar_destino`) e todas as inserções acontecem
+    em uma única transação, que fica aberta enquanto os lotes são produzidos. Com `chaves`, todos os
+    lotes passam pela staging e as chaves recebidas são substituídas de uma vez (ver
+    `mesclar_lotes_por_chave`). Com `modo`, cada lote é carregado em sua própria transação por
+    `carregar_dados`. No período de
+    movimentacoes, os lotes vão para a staging e o período é substituído de uma vez (ver
+    `substituir_particoes`); com `empresas` (que pode ser uma função, avaliada depois do último lote),
+    só o período dessas empresas.
+
+    Parâmetros:
+    - lotes (iterable): DataFrames a serem carregados; valores None são ignorados.
+    - tabela (str): Nome da tabela no banco de dados.
+    - engine (sqlalchemy.engine.base.Engine): Objeto de conexão com o banco de dados.
+    - **kwargs: Os mesmos parâmetros opcionais de `carregar_dados`.
+
+    Retorna:
+    - int: Total de linhas carregadas.
+    """
+    total = 0
+    if (tabela in COLUNA_PARTICAO and kwargs.get("dtinicio") and kwargs.get("dtfim")
+            and not (kwargs.get("chaves") or kwargs.get("modo"))):
+        lotes = (restaurar_tipos(df) for df in lotes)
+        metodo = escolher_estrategia(tabela, engine, kwargs.get("estrategia"))
+        contagem = substituir_particoes(lotes, tabela, engine, kwargs.get("empresas"), kwargs.get("dtinicio"),
+                                        kwargs.get("dtfim"), metodo=metodo)
+        return contagem["inseridas"]
+
+    if kwargs.get("chaves") and not kwargs.get("modo"):
+        lotes = (restaurar_tipos(df) for df in lotes)
+        metodo = escolher_estrategia(tabela, engine, kwargs.get("estrategia"))
+        return mesclar_lotes_por_chave(lotes, tabela, engine, kwargs["chaves"], metodo=metodo)
+
+    if kwargs.get("modo"):
+        for df in lotes:
+            if df is not None and not df.empty:
+                carregar_dados(df, tabela, engine, **kwargs)
+                total += len(df)
+        return total
+
+    metodo = escolher_estrategia(tabela, engine, kwargs.get("estrategia"))
+    with engine.begin() as conn:
+        apagar_destino(conn, tabela, dtinicio=kwargs.get("dtinicio"), dtfim=kwargs.get("dtfim"),
+                       ano=kwargs.get("ano"), mes=kwargs.get("mes"), empresa=kwargs.get("empresa"))
+        for df in lotes:
+            if df is not None and not df.empty:
+                df.to_sql(name=tabela, con=conn, if_exists='append', index=False, chunksize=10000, method=metodo)
+                total += len(df)
+    return total
+
+
+def substituir_particoes(lotes, tabela, engine, empresas, dtinicio, dtfim, metodo=None):
+    """
+    Substitui no banco o período [dtinicio, dtfim] das empresas informadas (ou de todas).
+
+    Os lotes são gravados primeiro em uma tabela temporária (staging); em seguida, na mesma
+    transação, o período das empresas é apagado (pelo índice (empresa, data)) e reposto com um único
+    INSERT ... SELECT da staging. Quem lê a tabela nunca vê o período vazio, e as linhas de uma
+    empresa fora de `empresas` (ex: cuja extração falhou) nem são apagadas nem inseridas.
+    Linhas recebidas com a mesma chave natural (ex: páginas sobrepostas) entram uma vez só, valendo
+    a última. Também são apagadas as linhas fora do período com a mesma chave natural de uma linha recebida
+    (ex: um título cuja data de emissão mudou para dentro do período), que senão violariam o
+    índice único na inserção.
+
+    Parâmetros:
+    - lotes (iterable): DataFrames a serem carregados; valores None são ignorados.
+    - tabela (str): Nome da tabela no banco de dados (com entrada em COLUNA_PARTICAO).
+    - engine (sqlalchemy.engine.base.Engine): Objeto de conexão com o banco de dados.
+    - empresas (list | callable | None): Empresas cujo período é substituído, ou função que as devolve
+      depois que todos os lotes foram consumidos; None substitui o período de todas as empresas.
+    - dtinicio (str): Início do período ("AAAA-MM-DD").
+    - dtfim (str): Fim do período ("AAAA-MM-DD").
+    - metodo (callable, opcional): Método de inserção do `to_sql` na staging (ver escrita_bulk).
+
+    Retorna:
+    - dict: {"removidas": int, "inseridas": int}
+    """
+    coluna = COLUNA_PARTICAO[tabela]
+    staging = f"{tabela}_staging"
+    colunas = None
+
+    with engine.begin() as conn:
+        _criar_staging(conn, tabela, staging)
+        try:
+            for df in lotes:
+                if df is None or df.empty:
+                    continue
+                df = df.drop(columns=[c for c in COLUNAS_GERADAS.get(tabela, []) if c in df.columns])
+                colunas = colunas or list(df.columns)
+                _gravar_staging(conn, tabela, staging, df[colunas], metodo)
+            chaves = CHAVES_NATURAIS.get(tabela, [])
+            if colunas and chaves and all(c in colunas for c in chaves):
+                _deduplicar_staging(conn, tabela, staging, chaves)
+
+            periodo = {"dtinicio": dtinicio, "dtfim": dtfim}
+            if empresas is not None:
+                periodo["empresas"] = [str(empresa) for empresa in (empresas() if callable(empresas) else empresas)]
+                if not periodo["empresas"]:
+                    return {"removidas": 0, "inseridas": 0}
+
+            def das_empresas(prefixo=""):
+                return f"{prefixo}empresa IN :empresas" if empresas is not None else "1 = 1"
+
+            def comando(sql):
+                sql = text(sql)
+                return sql.bindparams(bindparam("empresas", expanding=True)) if empresas is not None else sql
+
+            removidas = conn.execute(
+                comando(f"DELETE FROM {tabela} WHERE {das_empresas()} AND {coluna} BETWEEN :dtinicio AND :dtfim"),
+                periodo).rowcount
+
+            inseridas = 0
+            if colunas:
+                if chaves and all(c in colunas for c in chaves):
+                    apagar_chaves = _apagar_mesma_chave(conn.dialect.name, tabela, staging, chaves, das_empresas('s.'))
+                    removidas += conn.execute(comando(apagar_chaves), periodo).rowcount
+
+                lista_colunas = ", ".join(colunas)
+                inserir = (f"INSERT INTO {tabela} ({lista_colunas}) SELECT {lista_colunas} FROM {staging} "
+                           f"WHERE {das_empresas()}")
+                inseridas = conn.execute(comando(inserir), periodo).rowcount
+        finally:
+            _apagar_staging(conn, staging)
+
+    return {"removidas": removidas, "inseridas": inseridas}
+
+
+def _criar_staging(conn, tabela, staging):
+    """
+    Cria uma tabela temporária com as colunas da tabela de destino, visível só nesta conexão.
+
+    A staging não tem os índices únicos da tabela (o `LIKE` do MySQL os copiaria; o `AS SELECT` do
+    SQLite não), então chaves repetidas entre os lotes chegam nela nos dois bancos e são
+    resolvidas por `_deduplicar_staging`.
+    """
+    if conn.dialect.name == 'mysql':
+        conn.execute(text(f"CREATE TEMPORARY TABLE {staging} LIKE {tabela}"))
+        destino = Base.metadata.tables.get(tabela)
+        for restricao in (destino.constraints if destino is not None else ()):
+            if isinstance(restricao, UniqueConstraint) and restricao.name:
+                conn.execute(text(f"ALTER TABLE {staging} DROP INDEX {restricao.name}"))
+    else:
+        conn.execute(text(f"CREATE TEMP TABLE {staging} AS SELECT * FROM {tabela} WHERE 0"))
+
+
+def _deduplicar_staging(conn, tabela, staging, chaves):
+    """
+    Mantém na staging só a última linha gravada de cada chave, como uma sequência de upserts
+    (o GROUP BY junta as chaves nulas). A ordem de gravação é o rowid no SQLite e a coluna de
+    autoincremento da tabela (COLUNAS_GERADAS) no MySQL.
+
+    Retorna:
+    - int: Quantidade de linhas repetidas removidas.
+    """
+    lista_chaves = ", ".join(chaves)
+    if conn.dialect.name != 'mysql':
+        return conn.execute(text(
+            f"DELETE FROM {staging} WHERE rowid NOT IN (SELECT MAX(rowid) FROM {staging} GROUP BY {lista_chaves})"
+        )).rowcount
+
+    # Uma tabela temporária não pode aparecer duas vezes no mesmo comando do MySQL
+    ordem = COLUNAS_GERADAS[tabela][0]
+    ultimas = f"{staging}_ultimas"
+    conn.execute(text(
+        f"CREATE TEMPORARY TABLE {ultimas} AS SELECT MAX({ordem}) AS ordem FROM {staging} GROUP BY {lista_chaves}"))
+    try:
+        return conn.execute(text(
+            f"DELETE s FROM {staging} s LEFT JOIN {ultimas} u ON u.ordem = s.{ordem} WHERE u.ordem IS NULL"
+        )).rowcount
+    finally:
+        conn.execute(text(f"DROP TEMPORARY TABLE {ultimas}"))
+
+
+def _gravar_staging(conn, tabela, staging, df, metodo=None):
+    """
+    Insere o DataFrame na staging com os tipos da tabela real e o método de inserção escolhido
+    (ver escrita_bulk). Nas colunas Date vai só a data, no mesmo formato de uma gravação direta.
+    """
+    destino = Base.metadata.tables.get(tabela)
+    if destino is None:
+        destino = Table(tabela, MetaData(), autoload_with=conn)
+    tipos = {c: destino.c[c].type for c in df.columns}
+    datas = [c for c, tipo in tipos.items()
+             if isinstance(tipo, Date) and pd.api.types.is_datetime64_any_dtype(df[c])]
+    if datas:
+        df = df.assign(**{c: df[c].dt.date for c in datas})
+    df.to_sql(staging, con=conn, if_exists='append', index=False, chunksize=10000, method=metodo, dtype=tipos)
+
+
+def _apagar_staging(conn, staging):
+    conn.execute(text(f"DROP {'TEMPORARY ' if conn.dialect.name == 'mysql' else ''}TABLE {staging}"))
+
+
+def mesclar_por_chave(df, tabela, engine, chaves, metodo=None):
+    """
+    Substitui no banco as linhas cujas chaves aparecem no DataFrame, em uma única transação.
+
+    Usado na carga incremental: cada título alterado é apagado e reinserido com seus dados atuais,
+    sem tocar nos demais registros da tabela. Igual a `mesclar_lotes_por_chave` com um único lote.
+
+    Parâmetros:
+    - df (pandas.DataFrame): DataFrame com os registros novos ou alterados.
+    - tabela (str): Nome da tabela no banco de dados.
+    - engine (sqlalchemy.engine.base.Engine): Objeto de conexão com o banco de dados.
+    - chaves (list): Colunas que identificam os registros a serem substituídos.
+    - metodo (callable, opcional): Método de inserção do `to_sql` (ver escrita_bulk).
+    """
+    mesclar_lotes_por_chave([df], tabela, engine, chaves, metodo)
+
+
+def mesclar_lotes_por_chave(lotes, tabela, engine, chaves, metodo=None):
+    """
+    Substitui no banco as linhas cujas chaves aparecem em algum dos lotes, em uma única transação.
+
+    Todos os lotes vão primeiro para uma tabela temporária (staging), gravada com os tipos da tabela
+    real; só então as linhas do banco com as mesmas chaves (NULL igual a NULL) são apagadas, uma vez,
+    e as da staging inseridas. Assim um título cujos movimentos vêm em páginas diferentes não tem as
+    linhas de uma página apagadas pela seguinte.
+
+    Parâmetros:
+    - lotes (iterable): DataFrames a serem carregados; valores None são ignorados.
+    - tabela (str): Nome da tabela no banco de dados.
+    - engine (sqlalchemy.engine.base.Engine): Objeto de conexão com o banco de dados.
+    - chaves (list): Colunas que identificam os registros a serem substituídos.
+    - metodo (callable, opcional): Método de inserção do `to_sql` (ver escrita_bulk).
+
+    Retorna:
+    - int: Total de linhas inseridas.
+    """
+    staging = f"{tabela}_staging"
+    colunas = None
+
+    with engine.begin() as conn:
+        _criar_staging(conn, tabela, staging)
+        try:
+            for df in lotes:
+                if df is None or df.empty:
+                    continue
+                df = df.drop(columns=[c for c in COLUNAS_GERADAS.get(tabela, []) if c in df.columns])
+                colunas = colunas or list(df.columns)
+                _gravar_staging(conn, tabela, staging, df[colunas], metodo)
+            if not colunas:
+                return 0
+
+            naturais = CHAVES_NATURAIS.get(tabela, [])
+            if naturais and all(c in colunas for c in naturais):
+                _deduplicar_staging(conn, tabela, staging, naturais)
+            conn.execute(text(_apagar_mesma_chave(conn.dialect.name, tabela, staging, chaves)))
+            lista_colunas = ", ".join(colunas)
+            return conn.execute(text(
+                f"INSERT INTO {tabela} ({lista_colunas}) SELECT {lista_colunas} FROM {staging}")).rowcount
+        finally:
+            _apagar_staging(conn, staging)
+
+
+def upsert_dados(df, tabela, engine, chaves=None):
+    """
+    Carrega um DataFrame com upsert pela chave natural da tabela, em uma única transação.
+
+    Os dados vão primeiro para uma tabela temporária (staging) e depois dois comandos set-based
+    atualizam as linhas existentes que mudaram e inserem as chaves novas. Linhas idênticas às do
+    banco não são regravadas. As chaves são comparadas com NULL igual a NULL (`<=>` no MySQL,
+    `IS` no SQLite), já que o índice único não impede duas linhas com a mesma chave nula
+    (ex: nCodMovCC de um título sem movimento de conta corrente).
+
+    Parâmetros:
+    - df (pandas.DataFrame): DataFrame contendo os dados a serem carregados.
+    - tabela (str): Nome da tabela no banco de dados.
+    - engine (sqlalchemy.engine.base.Engine): Objeto de conexão com o banco de dados.
+    - chaves (list, opcional): Colunas da chave; por padrão CHAVES_NATURAIS[tabela].
+
+    Retorna:
+    - dict: {"inseridas": int, "atualizadas": int, "inalteradas": int}
+    """
+    chaves = chaves or CHAVES_NATURAIS[tabela]
+    df = df.drop(columns=[c for c in COLUNAS_GERADAS.get(tabela, []) if c in df.columns and c not in chaves])
+    # Uma linha por chave (a última recebida prevalece), como faria uma sequência de upserts
+    df = df.drop_duplicates(subset=chaves, keep='last')
+
+    colunas = list(df.columns)
+    atualizaveis = [c for c in colunas if c not in chaves]
+    staging = f"{tabela}_staging"
+    mysql = engine.dialect.name == 'mysql'
+
+    lista_colunas = ", ".join(colunas)
+    mesma_chave = _mesma_chave(engine.dialect.name, chaves)
+    if mysql:
+        diferente = " OR ".join(f"NOT (t.{c} <=> s.{c})" for c in atualizaveis)
+    else:
+        diferente = " OR ".join(f"t.{c} IS NOT s.{c}" for c in atualizaveis)
+    diferente = diferente or "0 = 1"
+
+    with engine.begin() as conn:
+        _criar_staging(conn, tabela, staging)
+
+        try:
+            _gravar_staging(conn, tabela, staging, df)
+
+            inseridas = conn.execute(text(
+                f"SELECT COUNT(*) FROM {staging} s WHERE NOT EXISTS "
+                f"(SELECT 1 FROM {tabela} t WHERE {mesma_chave})")).scalar()
+            # Conta as chaves recebidas, não as linhas do banco (que podem repetir uma chave)
+            atualizadas = conn.execute(text(
+                f"SELECT COUNT(*) FROM {staging} s WHERE EXISTS "
+                f"(SELECT 1 FROM {tabela} t WHERE {mesma_chave} AND ({diferente}))")).scalar()
+
+            # Só as linhas alteradas são regravadas
+            if atualizadas:
+                if mysql:
+                    atribuicoes = ", ".join(f"t.{c} = s.{c}" for c in atualizaveis)
+                    conn.execute(text(
+                        f"UPDATE {tabela} t JOIN {staging} s ON {mesma_chave} SET {atribuicoes} WHERE {diferente}"))
+                else:
+                    atribuicoes = ", ".join(f"{c} = s.{c}" for c in atualizaveis)
+                    conn.execute(text(
+                        f"UPDATE {tabela} AS t SET {atribuicoes} FROM {staging} AS s "
+                        f"WHERE {mesma_chave} AND ({diferente})"))
+            if inseridas:
+                conn.execute(text(
+                    f"INSERT INTO {tabela} ({lista_colunas}) SELECT {lista_colunas} FROM {staging} s "
+                    f"WHERE NOT EXISTS (SELECT 1 FROM {tabela} t WHERE {mesma_chave})"))
+        finally:
+            _apagar_staging(conn, staging)
+
+    return {"inseridas": inseridas, "atualizadas": atualizadas, "inalteradas": len(df) - inseridas - atualizadas}
+
+
+def _mesma_chave(dialeto, chaves, destino='t', origem='s'):
+    """Condição de igualdade das chaves entre duas tabelas, com NULL igual a NULL."""
+    operador = '<=>' if dialeto == 'mysql' else 'IS'
+    return " AND ".join(f"{destino}.{c} {operador} {origem}.{c}" for c in chaves)
+
+
+def _apagar_mesma_chave(dialeto, tabela, staging, chaves, condicao_staging="1 = 1"):
+    """DELETE das linhas da tabela (alias t) com as mesmas chaves de alguma linha da staging (alias s)."""
+    mesma_chave = _mesma_chave(dialeto, chaves)
+    if dialeto == 'mysql':
+        return f"DELETE t FROM {tabela} t JOIN {staging} s ON {mesma_chave} WHERE {condicao_staging}"
+    return f"DELETE FROM {tabela} AS t WHERE EXISTS (SELECT 1 FROM {staging} s WHERE {mesma_chave} AND {condicao_staging})"
+
+
+def hash_linhas(df) -> pd.Series:
+    """
+    Hash MD5 do conteúdo de cada linha, estável entre execuções: as colunas entram em ordem
+    alfabética (sem a própria hash_linha) e valores nulos viram texto vazio.
+    """
+    colunas = sorted(c for c in df.columns if c != 'hash_linha')
+    texto = df[colunas].astype(object).where(df[colunas].notna(), '').astype(str)
+    linhas = texto[colunas[0]].str.cat([texto[c] for c in colunas[1:]], sep='\x1f')
+    return pd.Series([hashlib.md5(linha.encode('utf-8')).hexdigest() for linha in linhas], index=df.index)
+
+
+def sincronizar_por_hash(df, tabela, engine, chave='ID', metodo=None):
+    """
+    Sincroniza uma tabela de dimensão comparando o hash de cada linha com o gravado no banco.
+
+    Só as empresas presentes no DataFrame são comparadas: as linhas delas que não vieram são
+    removidas, as com hash diferente são regravadas e as novas são inseridas. Uma semana sem
+    mudanças custa apenas a consulta dos hashes.
+
+    Parâmetros:
+    - df (pandas.DataFrame): DataFrame com todas as linhas atuais das empresas carregadas.
+    - tabela (str): Nome da tabela no banco de dados (precisa da coluna hash_linha).
+    - engine (sqlalchemy.engine.base.Engine): Objeto de conexão com o banco de dados.
+    - chave (str, opcional): Coluna que identifica a linha.
+    - metodo (callable, opcional): Método de inserção do `to_sql` (ver escrita_bulk).
+
+    Retorna:
+    - dict: {"inseridas": int, "atualizadas": int, "removidas": int, "inalteradas": int}
+    """
+    if df is None or df.empty:
+        return {"inseridas": 0, "atualizadas": 0, "removidas": 0, "inalteradas": 0}
+
+    df = df.drop_duplicates(subset=[chave], keep='last')
+    df = df.assign(hash_linha=hash_linhas(df).values)
+    empresas = [str(empresa) for empresa in df['empresa'].dropna().unique()]
+
+    with engine.begin() as conn:
+        consulta = text(f"SELECT {chave}, hash_linha FROM {tabela} WHERE empresa IN :empresas").bindparams(
+            bindparam("empresas", expanding=True))
+        gravados = dict(conn.execute(consulta, {"empresas": empresas}).fetchall())
+
+        chaves_df = df[chave].astype(str)
+        novas = ~chaves_df.isin(gravados.keys())
+        alteradas = ~novas & (chaves_df.map(gravados) != df['hash_linha'])
+        removidas = set(gravados) - set(chaves_df)
+
+        apagar = [{"chave": valor} for valor in list(removidas) + chaves_df[alteradas].tolist()]
+        if apagar:
+            conn.execute(text(f"DELETE FROM {tabela} WHERE {chave} = :chave"), apagar)
+        gravar = df[novas | alteradas]
+        if not gravar.empty:
+            gravar.to_sql(name=tabela, con=conn, if_exists='append', index=False, chunksize=10000, method=metodo)
 
-    df.to_sql(name=tabela, con=engine, if_exists='append', index=False, chunksize=10000)
\ No newline at end of file
+    return {
+        "inseridas": int(novas.sum()),
+        "atualizadas": int(alteradas.sum()),
+        "removidas": len(removidas),
+        "inalteradas": int(len(df) - novas.sum() - alteradas.sum()),
+    }
@@ -0,0 +1,314 @@
+"""
+Saída colunar (Parquet) dos DataFrames tratados, como alternativa de leitura ao banco MySQL.
+
+Cada tabela é gravada em um diretório particionado no formato Hive
+(`empresa=.../ano=.../mes=.../parte.parquet`), com os valores escapados como URI (como o
+pyarrow faz). Cada partição tem um único arquivo, substituído de forma atômica: o novo é escrito
+em um arquivo oculto na própria partição e trocado por `os.replace`, então um leitor enxerga o
+arquivo antigo ou o novo, nunca uma partição ausente ou pela metade. Os arquivos ocultos (prefixo
+'.') são ignorados pelo pyarrow na leitura.
+
+Depende do pyarrow (opcional; só é importado quando a saída é usada).
+"""
+import json
+import os
+import uuid
+from decimal import Decimal
+from urllib.parse import quote
+
+import pandas as pd
+
+from tratar_dados import COLUNAS_MONETARIAS, restaurar_tipos
+
+# Coluna de data usada para particionar por ano/mês; tabelas sem data são particionadas só por empresa
+COLUNA_DATA_PARTICAO = {
+    'movimentacoes': 'dDtEmissao',
+}
+
+# Tabelas que já possuem colunas de ano/mês
+COLUNAS_ANO_MES = {
+    'orcamentos': ('nAno', 'nMes'),
+}
+
+# Tipo Arrow das colunas monetárias em todos os caminhos de gravação (com ou sem o modo compacto)
+PRECISAO_MONETARIA = (15, 2)
+
+COMPRESSAO = "zstd"
+ARQUIVO_PARTICAO = "parte.parquet"
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("A saída Parquet requer o pacote pyarrow (pip install pyarrow).") from e
+    return pa, pq
+
+
+def _particoes(df: pd.DataFrame, tabela: str) -> pd.DataFrame:
+    """Acrescenta as colunas de partição (empresa, ano, mes) conforme a tabela."""
+    df = df.copy()
+    if tabela in COLUNA_DATA_PARTICAO:
+        datas = pd.to_datetime(df[COLUNA_DATA_PARTICAO[tabela]])
+        df['ano'] = datas.dt.year.astype('Int64')
+        df['mes'] = datas.dt.month.astype('Int64')
+    elif tabela in COLUNAS_ANO_MES:
+        coluna_ano, coluna_mes = COLUNAS_ANO_MES[tabela]
+        df['ano'] = df[coluna_ano].astype('Int64')
+        df['mes'] = df[coluna_mes].astype('Int64')
+    return df
+
+
+def _caminho_particao(diretorio_tabela: str, chave: tuple, colunas: list) -> str:
+    partes = []
+    for coluna, valor in zip(colunas, chave):
+        # Escapado como o particionamento Hive do pyarrow (segment_encoding='uri'): uma empresa
+        # com '/' ou '=' no nome não cria diretórios a mais e é lida de volta com o nome original
+        valor = "__NULL__" if pd.isna(valor) else quote(str(valor), safe='')
+        partes.append(f"{coluna}={valor}")
+    return os.path.join(diretorio_tabela, *partes)
+
+
+def _apagar_particao(destino: str) -> bool:
+    """Remove o arquivo da partição (de uma vez só) e, se ficar vazio, o diretório."""
+    arquivo = os.path.join(destino, ARQUIVO_PARTICAO)
+    if not os.path.exists(arquivo):
+        return False
+    os.remove(arquivo)
+    try:
+        os.rmdir(destino)
+    except OSError:
+        pass  # Ainda há um arquivo oculto de uma gravação em andamento
+    return True
+
+
+def _meses_intervalo(dtinicio: str, dtfim: str) -> list:
+    inicio, fim = pd.Timestamp(dtinicio), pd.Timestamp(dtfim)
+    return [(p.year, p.month) for p in pd.period_range(inicio, fim, freq='M')]
+
+
+def _tipo_monetario(pa):
+    return pa.decimal128(*PRECISAO_MONETARIA)
+
+
+def _centavos(serie: pd.Series) -> pd.Series:
+    """Valores monetários (centavos do modo compacto, float ou Decimal) como centavos inteiros (Int64)."""
+    if serie.dtype == 'Int64':
+        return serie
+    return (pd.to_numeric(serie).astype('float64') * 100).round().astype('Int64')
+
+
+def _com_tipos_monetarios(pa, tabela_arrow, monetarias: list):
+    """
+    Converte as colunas monetárias presentes na tabela Arrow para o tipo decimal fixo. Colunas int64
+    são centavos e são escaladas pelo próprio Arrow, sem criar um Decimal por valor no Python.
+    """
+    import pyarrow.compute as pc
+
+    tipo = _tipo_monetario(pa)
+    for coluna in monetarias:
+        indice = tabela_arrow.schema.get_field_index(coluna)
+        if indice < 0 or tabela_arrow.schema.field(indice).type == tipo:
+            continue
+        valores = tabela_arrow.column(indice)
+        if pa.types.is_integer(valores.type):
+            valores = pc.multiply(valores.cast(pa.decimal128(19, 0)), pa.scalar(Decimal("0.01"), pa.decimal128(3, 2)))
+        elif pa.types.is_floating(valores.type):
+            valores = pc.round(valores, PRECISAO_MONETARIA[1])
+        tabela_arrow = tabela_arrow.set_column(indice, pa.field(coluna, tipo), valores.cast(tipo))
+    return _metadados_decimais(tabela_arrow, monetarias)
+
+
+def _metadados_decimais(tabela_arrow, monetarias: list):
+    """Ajusta os metadados do pandas gravados no arquivo: as colunas monetárias são lidas como Decimal."""
+    metadados = dict(tabela_arrow.schema.metadata or {})
+    if b"pandas" not in metadados:
+        return tabela_arrow
+    pandas_meta = json.loads(metadados[b"pandas"])
+    for coluna in pandas_meta.get("columns", []):
+        if coluna.get("name") in monetarias:
+            coluna.update(pandas_type="decimal", numpy_type="object",
+                          metadata={"precision": PRECISAO_MONETARIA[0], "scale": PRECISAO_MONETARIA[1]})
+    metadados[b"pandas"] = json.dumps(pandas_meta).encode("utf-8")
+    return tabela_arrow.replace_schema_metadata(metadados)
+
+
+def _ler_particao(pa, pq, destino: str, monetarias: list):
+    """Partição já gravada, com as colunas monetárias em centavos (Int64) como as do DataFrame novo."""
+    import pyarrow.compute as pc
+
+    arquivo = os.path.join(destino, ARQUIVO_PARTICAO)
+    if not os.path.exists(arquivo):
+        return None
+    # Partições gravadas antes do tipo fixo podem ter float64 (ou null) nas colunas monetárias
+    tabela_arrow = _com_tipos_monetarios(pa, pq.read_table(arquivo), monetarias)
+    cem = pa.scalar(Decimal(100), pa.decimal128(3, 0))
+    for coluna in monetarias:
+        indice = tabela_arrow.schema.get_field_index(coluna)
+        if indice >= 0:
+            centavos = pc.multiply(tabela_arrow.column(indice), cem).cast(pa.int64())
+            tabela_arrow = tabela_arrow.set_column(indice, coluna, centavos)
+    existente = tabela_arrow.to_pandas()
+    for coluna in monetarias:
+        if coluna in existente.columns:
+            existente[coluna] = existente[coluna].astype('Int64')
+    return existente
+
+
+def gravar_parquet(df: pd.DataFrame, tabela: str, diretorio: str, dtinicio: str = None, dtfim: str = None,
+                   chaves: list = None) -> list:
+    """
+    Grava o DataFrame em Parquet, particionado por empresa e, quando houver data, por ano/mês.
+
+    Cada partição presente no DataFrame é substituída inteira; as demais continuam como estão.
+    Com `dtinicio` e `dtfim` (movimentacoes), a troca segue a mesma regra do `carregar_dados`:
+    nos meses do intervalo, as linhas já gravadas fora do intervalo são mantidas e as de dentro
+    são trocadas pelas novas, inclusive nos meses sem nenhuma linha nova das empresas do DataFrame.
+    Com `chaves` (carga incremental), as partições tocadas mantêm as linhas já gravadas cujas chaves
+    não vieram no DataFrame.
+
+    Parâmetros:
+        df (pandas.DataFrame): DataFrame tratado (saída de um tratamento_*).
+        tabela (str): Nome da tabela (movimentacoes, orcamentos, categorias, dre).
+        diretorio (str): Diretório raiz da saída Parquet.
+        dtinicio (str, opcional): Data inicial (AAAA-MM-DD) do intervalo substituído.
+        dtfim (str, opcional): Data final (AAAA-MM-DD) do intervalo substituído.
+        chaves (list, opcional): Colunas que identificam uma linha, para mesclar com o que já está gravado.
+
+    Retorna:
+        list: Caminhos das partições gravadas.
+    """
+    pa, pq = _pyarrow()
+    if df is None or df.empty:
+        return []
+
+    # As colunas 'category' do modo compacto voltam a texto; as monetárias seguem em centavos
+    # inteiros até a conversão para decimal no Arrow (ver _com_tipos_monetarios)
+    df = df.copy(deep=False)
+    df.attrs = {}
+    df = restaurar_tipos(df)
+    monetarias = [coluna for coluna in COLUNAS_MONETARIAS.get(tabela, []) if coluna in df.columns]
+    if monetarias:
+        df = df.assign(**{coluna: _centavos(df[coluna]) for coluna in monetarias})
+    diretorio_tabela = os.path.join(diretorio, tabela)
+    df = _particoes(df, tabela)
+    colunas_particao = ['empresa'] + (['ano', 'mes'] if 'ano' in df.columns else [])
+
+    grupos = {
+        (chave if isinstance(chave, tuple) else (chave,)): parte
+        for chave, parte in df.groupby(colunas_particao, dropna=False, sort=True)
+    }
+
+    coluna_data = COLUNA_DATA_PARTICAO.get(tabela)
+    intervalo = dtinicio and dtfim and coluna_data
+    if intervalo:
+        # Meses do intervalo sem linhas novas também são regravados (ficam só as linhas fora do intervalo)
+        for empresa in df['empresa'].dropna().unique():
+            for ano, mes in _meses_intervalo(dtinicio, dtfim):
+                grupos.setdefault((empresa, ano, mes), df.iloc[0:0])
+
+    if chaves:
+        recebidas = pd.MultiIndex.from_frame(df[chaves].astype(str))
+
+    gravadas = []
+    for chave, parte in sorted(grupos.items(), key=lambda item: tuple(str(valor) for valor in item[0])):
+        destino = _caminho_particao(diretorio_tabela, chave, colunas_particao)
+        parte = parte.drop(columns=[c for c in ('empresa', 'ano', 'mes') if c in parte.columns])
+
+        if intervalo or chaves:
+            existente = _ler_particao(pa, pq, destino, monetarias)
+            if existente is not None:
+                if chaves:
+                    existente = existente.assign(**{c: chave[i] for i, c in enumerate(colunas_particao)})
+                    mantidas = ~pd.MultiIndex.from_frame(existente[chaves].astype(str)).isin(recebidas)
+                else:
+                    datas = pd.to_datetime(existente[coluna_data])
+                    mantidas = (datas < pd.Timestamp(dtinicio)) | (datas > pd.Timestamp(dtfim))
+                fora = existente[mantidas].drop(columns=[c for c in colunas_particao if c in existente.columns])
+                parte = pd.concat([fora, parte], ignore_index=True) if not fora.empty else parte
+            if parte.empty:
+                if _apagar_particao(destino):
+                    gravadas.append(destino)
+                continue
+
+        _gravar_arquivo(pa, pq, parte, destino, monetarias)
+        gravadas.append(destino)
+    return gravadas
+
+
+def apagar_particoes(tabela: str, diretorio: str, particoes: list) -> list:
+    """
+    Remove partições inteiras, para os casos em que a origem ficou sem nenhuma linha
+    (ex: um mês de orçamento esvaziado na Omie), que `gravar_parquet` não enxerga.
+
+    Parâmetros:
+        tabela (str): Nome da tabela.
+        diretorio (str): Diretório raiz da saída Parquet.
+        particoes (list): Chaves das partições, na ordem das colunas de partição da tabela
+            (ex: (empresa, ano, mes) em orcamentos).
+
+    Retorna:
+        list: Caminhos das partições removidas.
+    """
+    diretorio_tabela = os.path.join(diretorio, tabela)
+    colunas_particao = ['empresa'] + (['ano', 'mes'] if tabela in COLUNA_DATA_PARTICAO or tabela in COLUNAS_ANO_MES else [])
+    removidas = []
+    for chave in particoes:
+        destino = _caminho_particao(diretorio_tabela, tuple(chave), colunas_particao)
+        if _apagar_particao(destino):
+            removidas.append(destino)
+    return removidas
+
+
+def _gravar_arquivo(pa, pq, df: pd.DataFrame, diretorio: str, monetarias: list = ()):
+    """Grava o arquivo da partição em um arquivo oculto no mesmo diretório e o troca pelo atual com `os.replace`."""
+    tabela_arrow = pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False)
+    # Sem o tipo fixo, uma partição só com nulos ganharia o tipo null e não seria lida junto com as outras
+    tabela_arrow = _com_tipos_monetarios(pa, tabela_arrow, monetarias)
+    # Dicionário para as colunas de texto: valores muito repetidos (status, natureza, categoria...)
+    colunas_texto = [
+        campo.name for campo in tabela_arrow.schema
+        if pa.types.is_string(campo.type) or pa.types.is_large_string(campo.type)
+    ]
+    os.makedirs(diretorio, exist_ok=True)
+    temporario = os.path.join(diretorio, f".parte-{uuid.uuid4().hex}.parquet")
+    try:
+        pq.write_table(tabela_arrow, temporario, compression=COMPRESSAO, use_dictionary=colunas_texto or False)
+        os.replace(temporario, os.path.join(diretorio, ARQUIVO_PARTICAO))
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+def ler_parquet(tabela: str, diretorio: str, **filtros) -> pd.DataFrame:
+    """
+    Lê uma tabela gravada por `gravar_parquet`, opcionalmente filtrando partições.
+
+    As colunas monetárias são lidas sempre como decimal, inclusive em partições gravadas antes do
+    tipo fixo (float64 ou só nulos).
+
+    Exemplo de uso:
+        ler_parquet("movimentacoes", "saida_parquet", empresa="EMPRESA_X", ano=2025)
+    """
+    pa, _ = _pyarrow()
+    import pyarrow.dataset as ds
+
+    caminho = os.path.join(diretorio, tabela)
+    descoberto = ds.dataset(caminho, format="parquet", partitioning="hive")
+    esquema = pa.unify_schemas(
+        [fragmento.physical_schema for fragmento in descoberto.get_fragments()] + [descoberto.schema],
+        promote_options="permissive",
+    )
+    for coluna in COLUNAS_MONETARIAS.get(tabela, []):
+        indice = esquema.get_field_index(coluna)
+        if indice >= 0:
+            esquema = esquema.set(indice, pa.field(coluna, _tipo_monetario(pa)))
+
+    filtro = None
+    for coluna, valor in filtros.items():
+        condicao = ds.field(coluna) == valor
+        filtro = condicao if filtro is None else filtro & condicao
+    dataset = ds.dataset(caminho, schema=esquema, format="parquet", partitioning="hive")
+    return dataset.to_table(filter=filtro).to_pandas()
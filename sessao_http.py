@@ -0,0 +1,96 @@
+import threading
+import requests # type: ignore
+from requests.adapters import HTTPAdapter # type: ignore
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool # type: ignore
+
+# Tamanho padrão do pool de conexões keep-alive por host (app.omie.com.br)
+TAMANHO_POOL = 10
+
+_lock = threading.Lock()
+_sessao = None
+_contadores = {"novas": 0, "reutilizadas": 0}
+
+
+def _contar(chave: str):
+    with _lock:
+        _contadores[chave] += 1
+
+
+class _PoolHTTPContado(HTTPConnectionPool):
+    """Pool de conexões que contabiliza conexões novas e reutilizadas."""
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout=timeout)
+        # Conexão sem socket aberto ainda fará o handshake TCP/TLS
+        _contar("reutilizadas" if getattr(conn, "sock", None) is not None else "novas")
+        return conn
+
+
+class _PoolHTTPSContado(_PoolHTTPContado, HTTPSConnectionPool):
+    pass
+
+
+def criar_sessao(tamanho_pool: int = TAMANHO_POOL) -> requests.Session:
+    """
+    Cria uma sessão HTTP com conexões keep-alive reaproveitadas por host.
+
+    Parâmetros:
+        tamanho_pool (int, opcional): Quantidade máxima de conexões mantidas abertas por host.
+
+    Retorno:
+        requests.Session: Sessão com pool de conexões e compressão gzip negociada.
+    """
+    sessao = requests.Session()
+    adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=tamanho_pool, pool_block=True)
+    adaptador.poolmanager.pool_classes_by_scheme = {"http": _PoolHTTPContado, "https": _PoolHTTPSContado}
+    sessao.mount("http://", adaptador)
+    sessao.mount("https://", adaptador)
+    sessao.headers.update({
+        "Content-Type": "application/json",
+        "Accept-Encoding": "gzip, deflate",
+        "Connection": "keep-alive",
+    })
+    return sessao
+
+
+def obter_sessao() -> requests.Session:
+    """Retorna a sessão HTTP compartilhada por todas as consultas, criando-a na primeira chamada."""
+    global _sessao
+    if _sessao is None:
+        with _lock:
+            if _sessao is None:
+                _sessao = criar_sessao()
+    return _sessao
+
+
+def configurar_sessao(tamanho_pool: int = TAMANHO_POOL):
+    """
+    Recria a sessão compartilhada com um novo tamanho de pool.
+
+    Deve ser chamada antes de iniciar as consultas; a sessão anterior é fechada.
+    """
+    global _sessao
+    with _lock:
+        anterior, _sessao = _sessao, criar_sessao(tamanho_pool)
+    if anterior is not None:
+        anterior.close()
+
+
+def fechar_sessao():
+    """Fecha a sessão compartilhada e todas as conexões abertas."""
+    global _sessao
+    with _lock:
+        anterior, _sessao = _sessao, None
+    if anterior is not None:
+        anterior.close()
+
+
+def estatisticas_conexoes() -> dict:
+    """
+    Retorna a contagem de conexões abertas e reutilizadas desde o início do processo.
+
+    Retorno:
+        dict: {"novas": int, "reutilizadas": int}
+    """
+    with _lock:
+        return dict(_contadores)
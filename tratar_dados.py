@@ -1,7 +1,581 @@
 import pandas as pd
 import html
+import json
+import marshal
+import multiprocessing
+import os
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
 
+from metricas import medir_tratamento, obter_metricas
+
+# Tipagem final de cada coluna de movimentacoes (nomes já sem o prefixo 'detalhes_')
+TIPOS_MOVIMENTOS = {
+    'ID': 'Int64',
+    'nCodTitulo': 'Int64',
+    'empresa': 'string',
+    'cCodIntTitulo': 'string',
+    'cNumTitulo': 'string',
+    'dDtEmissao': 'datetime64[ns]',
+    'dDtVenc': 'datetime64[ns]',
+    'dDtPrevisao': 'datetime64[ns]',
+    'dDtPagamento': 'datetime64[ns]',
+    'nCodCliente': 'Int64',
+    'cCPFCNPJCliente': 'string',
+    'nCodCtr': 'Int64',
+    'cNumCtr': 'string',
+    'nCodOS': 'Int64',
+    'cNumOS': 'string',
+    'nCodCC': 'Int64',
+    'cStatus': 'string',
+    'cNatureza': 'string',
+    'cTipo': 'string',
+    'cOperacao': 'string',
+    'cNumDocFiscal': 'string',
+    'cCodCateg': 'string',
+    'cNumParcela': 'string',
+    'nValorTitulo': 'float64',  # Alterado de decimal para float64
+    'nValorPIS': 'float64',
+    'cRetPIS': 'string',
+    'nValorCOFINS': 'float64',
+    'cRetCOFINS': 'string',
+    'nValorCSLL': 'float64',
+    'cRetCSLL': 'string',
+    'nValorIR': 'float64',
+    'cRetIR': 'string',
+    'nValorISS': 'float64',
+    'cRetISS': 'string',
+    'nValorINSS': 'float64',
+    'cRetINSS': 'string',
+    'cCodProjeto': 'Int64',
+    'observacao': 'string',
+    'cCodVendedor': 'Int64',
+    'nCodComprador': 'Int64',
+    'cCodigoBarras': 'string',
+    'cNSU': 'string',
+    'nCodNF': 'Int64',
+    'dDtRegistro': 'datetime64[ns]',
+    'cNumBoleto': 'string',
+    'cChaveNFe': 'string',
+    'cOrigem': 'string',
+    'nCodTitRepet': 'Int64',
+    'cGrupo': 'string',
+    'nCodMovCC': 'Int64',
+    'nValorMovCC': 'float64',
+    'nCodMovCCRepet': 'Int64',
+    'nDesconto': 'float64',
+    'nJuros': 'float64',
+    'nMulta': 'float64',
+    'nCodBaixa': 'Int64',
+    'dDtCredito': 'datetime64[ns]',
+    'dDtConcilia': 'datetime64[ns]',
+    'cHrConcilia': 'string',
+    'cUsConcilia': 'string',
+    'dDtInc': 'datetime64[ns]',
+    'cHrInc': 'string',
+    'cUsInc': 'string',
+    'dDtAlt': 'datetime64[ns]',
+    'cHrAlt': 'string',
+    'cUsAlt': 'string',
+    'resumo_cLiquidado': 'string',
+    'resumo_nValPago': 'float64',
+    'resumo_nValAberto': 'float64',
+    'resumo_nDesconto': 'float64',
+    'resumo_nJuros': 'float64',
+    'resumo_nMulta': 'float64',
+    'resumo_nValLiquido': 'float64'
+}
+
+# Nomes das colunas achatadas de dadosDRE em categorias
+COLUNAS_RENOMEAR_CATEGORIAS = {
+    'dadosDRE.codigoDRE': 'dre_codigoDRE',
+    'dadosDRE.descricaoDRE': 'dre_descricaoDRE',
+    'dadosDRE.naoExibirDRE': 'dre_naoExibirDRE',
+    'dadosDRE.nivelDRE': 'dre_nivelDRE',
+    'dadosDRE.sinalDRE': 'dre_sinalDRE',
+    'dadosDRE.totalizaDRE': 'dre_totalizaDRE'
+}
+
+# Tipagem final de cada coluna de categorias
+TIPOS_CATEGORIAS = {
+    'ID': 'string',
+    'codigo': 'string',
+    'empresa': 'string',
+    'descricao': 'string',
+    'descricao_padrao': 'string',
+    'tipo_categoria': 'string',
+    'conta_inativa': 'string',
+    'definida_pelo_usuario': 'string',
+    'id_conta_contabil': 'Int64',  # Pandas usa 'Int64' para suportar valores nulos
+    'tag_conta_contabil': 'string',
+    'conta_despesa': 'string',
+    'conta_receita': 'string',
+    'nao_exibir': 'string',
+    'natureza': 'string',
+    'totalizadora': 'string',
+    'transferencia': 'string',
+    'codigo_dre': 'string',
+    'categoria_superior': 'string',  # Pandas não tem tipo Text, 'string' equivale
+    'dre_codigoDRE': 'string',
+    'dre_descricaoDRE': 'string',
+    'dre_naoExibirDRE': 'string',
+    'dre_nivelDRE': 'Int64',
+    'dre_sinalDRE': 'string',
+    'dre_totalizaDRE': 'string'
+}
+
+# Tipagem final de cada coluna de orcamentos
+TIPOS_ORCAMENTOS = {
+    'ID': 'string',
+    'cCodCateg': 'string',
+    'cDesCateg': 'string',
+    'nValorPrevisto': 'float64',
+    'nValorRealizado': 'float64',
+    'nAno': 'Int64',
+    'nMes': 'Int64',
+    'empresa': 'string'
+}
+
+# Tipagem final de cada coluna de dre
+TIPOS_DRE = {
+    'ID': 'string',
+    'codigoDRE': 'string',
+    'descricaoDRE': 'string',
+    'naoExibirDRE': 'string',
+    'nivelDRE': 'Int64',
+    'sinalDRE': 'string',
+    'totalizaDRE': 'string',
+    'empresa': 'string'
+}
+
+# Formato fixo das datas devolvidas pela Omie
+FORMATO_DATA = '%d/%m/%Y'
+
+# Colunas combinadas de data e hora: destino -> (coluna de data, coluna de hora)
+PARES_DATA_HORA = {
+    'dtHrConcilia': ('dDtConcilia', 'cHrConcilia'),
+    'dtHrInc': ('dDtInc', 'cHrInc'),
+    'dtHrAlt': ('dDtAlt', 'cHrAlt'),
+}
+
+
+def _converter_unicos(valores, converter, vazio):
+    """Aplica `converter` só aos valores distintos e replica o resultado para todas as posições."""
+    codigos, unicos = pd.factorize(np.asarray(valores, dtype=object))
+    convertidos = np.asarray(converter(pd.Index(unicos, dtype=object)))
+    resultado = convertidos.take(codigos) if len(convertidos) else np.full(len(codigos), vazio)
+    resultado[codigos == -1] = vazio  # None/NaN
+    return resultado
+
+
+def converter_datas(valores, formato=FORMATO_DATA) -> np.ndarray:
+    """
+    Converte datas no formato da Omie (DD/MM/AAAA), interpretando cada valor distinto uma única vez.
+    Valores vazios ou fora do formato viram NaT, como no `errors='coerce'`.
+
+    Retorna:
+        numpy.ndarray: Array datetime64[ns].
+    """
+    return _converter_unicos(
+        valores,
+        lambda unicos: pd.to_datetime(unicos, format=formato, errors='coerce').values.astype('datetime64[ns]'),
+        np.datetime64('NaT', 'ns'),
+    )
+
+
+def converter_horas(valores) -> np.ndarray:
+    """
+    Converte horas HH:MM:SS em intervalos desde a meia-noite, interpretando cada valor distinto uma vez.
+    Valores vazios ou inválidos viram NaT.
+
+    Retorna:
+        numpy.ndarray: Array timedelta64[ns].
+    """
+    return _converter_unicos(
+        valores,
+        lambda unicos: pd.to_timedelta(unicos, errors='coerce').values.astype('timedelta64[ns]'),
+        np.timedelta64('NaT', 'ns'),
+    )
+
+
+def combinar_data_hora(datas, horas) -> np.ndarray:
+    """
+    Junta uma coluna de datas (DD/MM/AAAA) e outra de horas (HH:MM:SS) em um único timestamp.
+    Data inválida resulta em NaT; hora ausente ou inválida resulta na data à meia-noite.
+    """
+    deslocamento = converter_horas(horas)
+    deslocamento[np.isnat(deslocamento)] = np.timedelta64(0, 'ns')
+    return converter_datas(datas) + deslocamento
+
+
+class _MapaCaminhos(dict):
+    """Cache subchave -> posição da coluna no esquema; a posição é calculada só na primeira vez."""
+
+    def __init__(self, esquema, chave):
+        super().__init__()
+        self.esquema = esquema
+        self.chave = chave
+
+    def __missing__(self, subchave):
+        nome = self.chave if subchave is None else f"{self.chave}_{subchave}"
+        for prefixo in self.esquema.prefixos_removidos:
+            nome = nome.replace(prefixo, '')
+        posicao = self[subchave] = self.esquema.posicoes.get(nome)
+        return posicao
+
+
+class EsquemaColunar:
+    """
+    Esquema compilado a partir de um mapa de tipos (ex: TIPOS_MOVIMENTOS) que monta o DataFrame
+    direto dos registros da API, em uma única passada.
+
+    Os dicionários aninhados são achatados com o mesmo nome que `pd.json_normalize(sep="_")` daria,
+    removendo o prefixo 'detalhes_'; apenas as colunas do esquema são lidas. Colunas ausentes em todos
+    os registros viram nulas (texto vazio para colunas de texto), como no tratamento original.
+
+    Parâmetros:
+        tipos (dict): Coluna -> tipo pandas ('Int64', 'float64', 'string', 'datetime64[ns]').
+        prefixos_removidos (tuple, opcional): Prefixos retirados do nome achatado.
+        pares_data_hora (dict, opcional): Colunas de timestamp acrescentadas ao fim, no formato
+            destino -> (coluna de data, coluna de hora) do esquema (ex: PARES_DATA_HORA).
+    """
+
+    def __init__(self, tipos: dict, prefixos_removidos: tuple = ('detalhes_',), pares_data_hora: dict = None):
+        self.tipos = dict(tipos)
+        self.pares_data_hora = dict(pares_data_hora or {})
+        self.colunas = list(tipos)
+        self.prefixos_removidos = prefixos_removidos
+        self.posicoes = {coluna: i for i, coluna in enumerate(self.colunas)}
+        # chave de primeiro nível -> mapa de subchaves (None representa a própria chave)
+        self._mapas = {}
+
+    def _mapa(self, chave):
+        mapa = self._mapas.get(chave)
+        if mapa is None:
+            mapa = self._mapas[chave] = _MapaCaminhos(self, chave)
+        return mapa
+
+    def extrair_colunas(self, lista) -> tuple:
+        """
+        Lê os registros em uma passada.
+
+        Retorna:
+            tuple: (lista de valores por coluna do esquema, lista indicando se a coluna apareceu em algum registro)
+        """
+        total = len(lista)
+        valores = [[None] * total for _ in self.colunas]
+        presentes = [False] * len(self.colunas)
+        mapas = self._mapas
+        obter_mapa = self._mapa
+
+        for i, registro in enumerate(lista):
+            for chave, valor in registro.items():
+                mapa = mapas.get(chave) or obter_mapa(chave)
+                if isinstance(valor, dict):
+                    for subchave, subvalor in valor.items():
+                        indice = mapa[subchave]
+                        if indice is not None:
+                            valores[indice][i] = subvalor
+                            presentes[indice] = True
+                else:
+                    indice = mapa[None]
+                    if indice is not None:
+                        valores[indice][i] = valor
+                        presentes[indice] = True
+
+        return valores, presentes
+
+    def construir(self, lista, com_ausentes: bool = False):
+        """
+        Monta o DataFrame tipado a partir da lista de registros brutos.
+
+        Parâmetros:
+            lista (list): Registros brutos.
+            com_ausentes (bool, opcional): Devolve também as colunas que não apareceram em nenhum registro.
+
+        Retorna:
+            pandas.DataFrame: Uma coluna por entrada do esquema, na ordem do esquema, seguidas das
+            colunas de data e hora combinadas (ou a tupla (DataFrame, lista de colunas ausentes)).
+        """
+        valores, presentes = self.extrair_colunas(lista)
+        total = len(lista)
+        dados = {}
+
+        for coluna, coluna_valores, presente in zip(self.colunas, valores, presentes):
+            tipo = self.tipos[coluna]
+            if presente:
+                brutos = np.empty(total, dtype=object)
+                brutos[:] = coluna_valores
+
+            if tipo.startswith('datetime'):
+                if presente:
+                    dados[coluna] = converter_datas(brutos)
+                else:
+                    dados[coluna] = np.full(total, np.datetime64('NaT'), dtype=tipo)
+            elif tipo in ('Int64', 'float64'):
+                numeros = pd.to_numeric(brutos, errors='coerce') if presente else np.full(total, np.nan)
+                dados[coluna] = pd.array(numeros, dtype=tipo) if tipo == 'Int64' else numeros.astype(tipo)
+            else:
+                dados[coluna] = pd.array(brutos if presente else np.full(total, '', dtype=object), dtype=tipo)
+
+        for destino, (coluna_data, coluna_hora) in self.pares_data_hora.items():
+            datas = valores[self.posicoes[coluna_data]]
+            horas = valores[self.posicoes[coluna_hora]]
+            dados[destino] = combinar_data_hora(datas, horas)
+
+        df = pd.DataFrame(dados)
+        if com_ausentes:
+            return df, [coluna for coluna, presente in zip(self.colunas, presentes) if not presente]
+        return df
+
+
+ESQUEMA_MOVIMENTOS = EsquemaColunar(TIPOS_MOVIMENTOS, pares_data_hora=PARES_DATA_HORA)
+
+
+class ProjecaoRegistros:
+    """
+    Poda os registros brutos da API, mantendo só os campos que viram colunas no tratamento.
+
+    Um campo (ou subcampo de um dicionário de primeiro nível) é mantido quando o nome achatado dele,
+    como o tratamento o monta, está entre as colunas; listas e campos que o tratamento descarta
+    (ex: 'departamentos' e 'categorias' dos movimentos) saem do registro. A decisão de cada
+    caminho é calculada uma única vez. A ordem dos campos é preservada.
+
+    Parâmetros:
+        colunas (iterable): Colunas produzidas pelo tratamento (ex: TIPOS_MOVIMENTOS).
+        separador (str, opcional): Separador do nome achatado ('_' no EsquemaColunar, '.' no json_normalize).
+        prefixos_removidos (tuple, opcional): Prefixos retirados do nome achatado.
+        renomear (dict, opcional): Nome achatado -> nome da coluna (ex: COLUNAS_RENOMEAR_CATEGORIAS).
+    """
+
+    def __init__(self, colunas, separador: str = '_', prefixos_removidos: tuple = (), renomear: dict = None):
+        self.colunas = set(colunas)
+        self.separador = separador
+        self.prefixos_removidos = prefixos_removidos
+        self.renomear = dict(renomear or {})
+        self._mantidos = {}
+
+    def _mantem(self, chave, subchave=None) -> bool:
+        mantem = self._mantidos.get((chave, subchave))
+        if mantem is None:
+            nome = chave if subchave is None else f"{chave}{self.separador}{subchave}"
+            nome = self.renomear.get(nome, nome)
+            for prefixo in self.prefixos_removidos:
+                nome = nome.replace(prefixo, '')
+            mantem = self._mantidos[(chave, subchave)] = nome in self.colunas
+        return mantem
+
+    def projetar(self, registro: dict) -> dict:
+        """Cópia do registro apenas com os campos usados pelo tratamento."""
+        projetado = {}
+        for chave, valor in registro.items():
+            if isinstance(valor, dict):
+                subcampos = {subchave: subvalor for subchave, subvalor in valor.items() if self._mantem(chave, subchave)}
+                if subcampos:
+                    projetado[chave] = subcampos
+            elif self._mantem(chave):
+                projetado[chave] = valor
+        return projetado
+
+
+# Projeção dos registros brutos de cada tabela, derivada das colunas do respectivo tratamento
+PROJECOES = {
+    'movimentacoes': ProjecaoRegistros(TIPOS_MOVIMENTOS, prefixos_removidos=ESQUEMA_MOVIMENTOS.prefixos_removidos),
+    'categorias': ProjecaoRegistros(TIPOS_CATEGORIAS, separador='.', renomear=COLUNAS_RENOMEAR_CATEGORIAS),
+    'orcamentos': ProjecaoRegistros(TIPOS_ORCAMENTOS, separador='.'),
+    'dre': ProjecaoRegistros(TIPOS_DRE, separador='.'),
+}
+
+
+# Registros de cada página medidos em JSON para estimar os bytes mantidos e descartados pela projeção
+AMOSTRA_PROJECAO = 8
+
+
+def _tamanho_json(lista) -> int:
+    return len(json.dumps(lista, ensure_ascii=False, separators=(',', ':')))
+
+
+def projetar_registros(lista, tabela):
+    """
+    Poda os registros brutos de uma página para os campos usados pelo tratamento da tabela e
+    registra os bytes (em JSON) mantidos e descartados, estimados a partir de até AMOSTRA_PROJECAO
+    registros espalhados pela página (serializar a página inteira custaria mais que a projeção).
+
+    Parâmetros:
+        lista (list): Registros brutos da resposta da API.
+        tabela (str): Tabela de destino ('movimentacoes', 'categorias', 'orcamentos' ou 'dre').
+
+    Retorna:
+        list: Registros projetados (a própria lista se a tabela não tem projeção).
+    """
+    projecao = PROJECOES.get(tabela)
+    if projecao is None or not lista:
+        return lista
+    projetados = [projecao.projetar(registro) for registro in lista]
+
+    passo = max(1, len(lista) // AMOSTRA_PROJECAO)
+    escala = len(lista) / len(lista[::passo])
+    recebidos = round(_tamanho_json(lista[::passo]) * escala)
+    mantidos = round(_tamanho_json(projetados[::passo]) * escala)
+    metricas = obter_metricas()
+    metricas.incrementar("etl_projecao_bytes_total", mantidos, tabela=tabela, parte="mantidos")
+    metricas.incrementar("etl_projecao_bytes_total", recebidos - mantidos, tabela=tabela, parte="descartados")
+    return projetados
+
+
+def normalizar_texto(df, colunas=None, funcao=html.unescape, marcador='&'):
+    """
+    Aplica uma normalização de texto (por padrão `html.unescape`) às colunas de texto do DataFrame.
+
+    Cada valor distinto é tratado uma única vez: a coluna é fatorada (vetorizado) nos seus valores
+    únicos, a busca por `marcador` e a função rodam só sobre eles e o resultado é mapeado de volta.
+    Colunas em que nenhum valor distinto contém `marcador` (a função não alteraria nada) são puladas
+    sem serem reconstruídas. Colunas com valores não hasheáveis (listas, dicts) não podem ser fatoradas
+    e são tratadas célula a célula.
+
+    Parâmetros:
+        df (pandas.DataFrame): DataFrame a ser tratado (alterado no próprio objeto).
+        colunas (list, opcional): Colunas a tratar; por padrão as de tipo object e string.
+        funcao (callable, opcional): Função aplicada a cada valor distinto.
+        marcador (str, opcional): Trecho que precisa estar no valor para a função poder alterá-lo.
+
+    Retorna:
+        pandas.DataFrame: O próprio DataFrame, com as colunas normalizadas.
+    """
+    if colunas is None:
+        colunas = df.select_dtypes(include=[object, 'string']).columns
+
+    for coluna in colunas:
+        serie = df[coluna]
+        try:
+            codigos, unicos = pd.factorize(serie, use_na_sentinel=False)
+        except TypeError:
+            # Coluna com listas ou dicts (não hasheáveis): só as células de texto passam pela função
+            if any(isinstance(valor, str) and marcador in valor for valor in serie):
+                df[coluna] = serie.map(lambda valor: funcao(valor) if isinstance(valor, str) and marcador in valor else valor)
+            continue
+        unicos = np.asarray(unicos, dtype=object)
+        alterar = [i for i, valor in enumerate(unicos) if isinstance(valor, str) and marcador in valor]
+        if not alterar:
+            continue
+
+        for i in alterar:
+            unicos[i] = funcao(unicos[i])
+        # Só as células com valores alterados são trocadas; as demais (inclusive nulos) ficam como estão
+        linhas = np.isin(codigos, alterar)
+        valores = serie.to_numpy(dtype=object, copy=True)
+        valores[linhas] = unicos[codigos[linhas]]
+        if isinstance(serie.dtype, pd.StringDtype):
+            valores = pd.array(valores, dtype=serie.dtype)
+        df[coluna] = pd.Series(valores, index=serie.index, name=coluna)
+    return df
+
+
+# Colunas monetárias de cada tabela, guardadas como centavos inteiros no modo compacto
+COLUNAS_MONETARIAS = {
+    'movimentacoes': [coluna for coluna, tipo in TIPOS_MOVIMENTOS.items() if tipo == 'float64'],
+    'orcamentos': ['nValorPrevisto', 'nValorRealizado'],
+}
+
+# Colunas de texto com até esta fração de valores distintos viram 'category'
+LIMITE_CATEGORIA = 0.5
+
+
+def _tipo_texto_compacto():
+    """'string[pyarrow]' quando o pyarrow está instalado; caso contrário, o 'string' padrão."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return 'string'
+    return 'string[pyarrow]'
+
+
+def bytes_por_linha(df) -> float:
+    """Memória ocupada pelo DataFrame (contando o conteúdo dos textos) dividida pelo número de linhas."""
+    return df.memory_usage(deep=True, index=False).sum() / max(1, len(df))
+
+
+def compactar_tipos(df, tabela):
+    """
+    Converte um DataFrame tratado para uma representação compacta em memória:
+    valores monetários como centavos inteiros (Int64, sem erro de arredondamento), textos com poucos
+    valores distintos como 'category' e os demais textos como 'string[pyarrow]' (se disponível).
+
+    As colunas em centavos ficam registradas em `df.attrs['centavos']`; `restaurar_tipos` desfaz a
+    conversão sem perda (os valores voltam como Decimal com duas casas).
+
+    Parâmetros:
+        df (pandas.DataFrame): Saída de um tratamento_*.
+        tabela (str): Tabela de destino (define as colunas monetárias, ver COLUNAS_MONETARIAS).
+
+    Retorna:
+        pandas.DataFrame: Novo DataFrame compacto.
+    """
+    if df is None or df.empty:
+        return df
+
+    antes = bytes_por_linha(df)
+    compacto = df.copy()
+    tipo_texto = _tipo_texto_compacto()
+    centavos = [coluna for coluna in COLUNAS_MONETARIAS.get(tabela, []) if coluna in compacto.columns]
+
+    for coluna in centavos:
+        compacto[coluna] = (compacto[coluna].astype('float64') * 100).round().astype('Int64')
+    for coluna in compacto.columns:
+        serie = compacto[coluna]
+        if coluna in centavos or not (serie.dtype == object or isinstance(serie.dtype, pd.StringDtype)):
+            continue
+        if serie.nunique(dropna=True) <= LIMITE_CATEGORIA * len(serie):
+            compacto[coluna] = serie.astype('category')
+        else:
+            compacto[coluna] = serie.astype(tipo_texto)
+
+    compacto.attrs['centavos'] = centavos
+    depois = bytes_por_linha(compacto)
+    metricas = obter_metricas()
+    metricas.incrementar("etl_tratamento_bytes_total", antes * len(df), tabela=tabela, formato="original")
+    metricas.incrementar("etl_tratamento_bytes_total", depois * len(df), tabela=tabela, formato="compacto")
+    print(f"[INFO] {tabela}: {antes:.0f} bytes/linha -> {depois:.0f} bytes/linha no modo compacto.")
+    return compacto
+
+
+def _tipo_compacto(tipo) -> bool:
+    return isinstance(tipo, pd.CategoricalDtype) or getattr(tipo, 'storage', None) == 'pyarrow'
+
+
+def restaurar_tipos(df):
+    """
+    Desfaz `compactar_tipos` para a gravação: centavos voltam a valores Decimal exatos e as colunas
+    'category' e 'string[pyarrow]' voltam a texto comum. DataFrames não compactados são devolvidos como estão.
+    """
+    if df is None:
+        return df
+    centavos = df.attrs.get('centavos', [])
+    compactas = [coluna for coluna, tipo in df.dtypes.items() if _tipo_compacto(tipo)]
+    if not centavos and not compactas:
+        return df
+
+    restaurado = df.copy()
+    for coluna in centavos:
+        restaurado[coluna] = [
+            None if pd.isna(valor) else Decimal(int(valor)).scaleb(-2) for valor in df[coluna]
+        ]
+    for coluna in compactas:
+        restaurado[coluna] = restaurado[coluna].astype(object).where(restaurado[coluna].notna(), None)
+    restaurado.attrs = {}
+    return restaurado
+
+
+def _movimentos_tratados(lista) -> tuple:
+    """DataFrame de movimentos e as colunas ausentes em todos os registros da lista."""
+    # Monta as colunas tipadas direto dos registros (detalhes/resumo), em uma única passada
+    df, ausentes = ESQUEMA_MOVIMENTOS.construir(lista, com_ausentes=True)
+    # Corrige caracteres HTML escapados no texto livre
+    return normalizar_texto(df, ['observacao']), ausentes
+
+
+@medir_tratamento('movimentacoes')
 def tratamento_movimentos(lista):
     """
     Processa os dados consultados da API, transformando-os em um DataFrame 
@@ -15,130 +589,11 @@ def tratamento_movimentos(lista):
     """
     if lista:
         print(f"\nTotal de movimentos obtidos: {len(lista)}")
-        # Normalizando os dados
-        df = pd.json_normalize(lista,sep="_")
-        # Renomeia as colunas para remover os prefixos 'resumo_' e 'detalhes_'
-        df.columns = df.columns.str.replace('detalhes_', '', regex=False)
-        
-        numerical_columns = [
-            'nCodTitulo', 'nCodCliente', 'nCodCtr', 'nCodOS', 'nCodCC', 'nValorTitulo', 
-            'nValorPIS', 'nValorCOFINS', 'nValorCSLL', 'nValorIR', 'nValorISS', 'nValorINSS', 
-            'nCodProjeto', 'cCodVendedor', 'nCodComprador', 'nCodNF', 'nCodTitRepet', 'nCodMovCC', 
-            'nValorMovCC', 'nCodMovCCRepet', 'nDesconto', 'nJuros', 'nMulta', 'nCodBaixa', 
-            'resumo_nValPago', 'resumo_nValAberto', 'resumo_nDesconto', 'resumo_nJuros', 'resumo_nMulta', 
-            'resumo_nValLiquido'
-        ]
-
-        # Converte para numérico, forçando nulos (erro='coerce')
-        for col in numerical_columns:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-
-        # Converte colunas de data com pd.to_datetime(), forçando nulos (erro='coerce')
-        date_columns = [
-            'dDtEmissao', 'dDtVenc', 'dDtPrevisao', 'dDtPagamento', 'dDtRegistro', 
-            'dDtCredito', 'dDtConcilia', 'dDtInc', 'dDtAlt'
-        ]
-
-        # Converte para datetime, forçando nulos (erro='coerce')
-        for col in date_columns:
-            if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors='coerce', dayfirst=True)
-
-        tipos_colunas = {
-            'ID': 'Int64',
-            'nCodTitulo': 'Int64',
-            'empresa': 'string',
-            'cCodIntTitulo': 'string',
-            'cNumTitulo': 'string',
-            'dDtEmissao': 'datetime64[ns]',
-            'dDtVenc': 'datetime64[ns]',
-            'dDtPrevisao': 'datetime64[ns]',
-            'dDtPagamento': 'datetime64[ns]',
-            'nCodCliente': 'Int64',
-            'cCPFCNPJCliente': 'string',
-            'nCodCtr': 'Int64',
-            'cNumCtr': 'string',
-            'nCodOS': 'Int64',
-            'cNumOS': 'string',
-            'nCodCC': 'Int64',
-            'cStatus': 'string',
-            'cNatureza': 'string',
-            'cTipo': 'string',
-            'cOperacao': 'string',
-            'cNumDocFiscal': 'string',
-            'cCodCateg': 'string',
-            'cNumParcela': 'string',
-            'nValorTitulo': 'float64',  # Alterado de decimal para float64
-            'nValorPIS': 'float64',
-            'cRetPIS': 'string',
-            'nValorCOFINS': 'float64',
-            'cRetCOFINS': 'string',
-            'nValorCSLL': 'float64',
-            'cRetCSLL': 'string',
-            'nValorIR': 'float64',
-            'cRetIR': 'string',
-            'nValorISS': 'float64',
-            'cRetISS': 'string',
-            'nValorINSS': 'float64',
-            'cRetINSS': 'string',
-            'cCodProjeto': 'Int64',
-            'observacao': 'string',
-            'cCodVendedor': 'Int64',
-            'nCodComprador': 'Int64',
-            'cCodigoBarras': 'string',
-            'cNSU': 'string',
-            'nCodNF': 'Int64',
-            'dDtRegistro': 'datetime64[ns]',
-            'cNumBoleto': 'string',
-            'cChaveNFe': 'string',
-            'cOrigem': 'string',
-            'nCodTitRepet': 'Int64',
-            'cGrupo': 'string',
-            'nCodMovCC': 'Int64',
-            'nValorMovCC': 'float64',
-            'nCodMovCCRepet': 'Int64',
-            'nDesconto': 'float64',
-            'nJuros': 'float64',
-            'nMulta': 'float64',
-            'nCodBaixa': 'Int64',
-            'dDtCredito': 'datetime64[ns]',
-            'dDtConcilia': 'datetime64[ns]',
-            'cHrConcilia': 'string',
-            'cUsConcilia': 'string',
-            'dDtInc': 'datetime64[ns]',
-            'cHrInc': 'string',
-            'cUsInc': 'string',
-            'dDtAlt': 'datetime64[ns]',
-            'cHrAlt': 'string',
-            'cUsAlt': 'string',
-            'resumo_cLiquidado': 'string',
-            'resumo_nValPago': 'float64',
-            'resumo_nValAberto': 'float64',
-            'resumo_nDesconto': 'float64',
-            'resumo_nJuros': 'float64',
-            'resumo_nMulta': 'float64',
-            'resumo_nValLiquido': 'float64'
-        }
-        # Verifica quais colunas existem no DataFrame antes de aplicar os tipos
-        # colunas_existentes = {col: tipos_colunas[col] for col in df.columns if col in tipos_colunas}
-        
-        # Adicionando colunas ausentes com valores padrão
-        for col, tipo in tipos_colunas.items():
-            if col not in df.columns:
-                if tipo.startswith('datetime'):
-                    df[col] = pd.NaT  # Data em branco
-                elif tipo == 'Int64' or tipo == 'float64':
-                    df[col] = np.nan  # Número em branco
-                else:
-                    df[col] = ''  # String em branco
-        # Alterando a tipagem das colunas presentes no DataFrame
-        df = df.astype(tipos_colunas)
-
-        return df
+        return _movimentos_tratados(lista)[0]
     else:
         print("Nenhum dado encontrado.")
         
+@medir_tratamento('categorias')
 def tratamento_categorias(lista):
     """
     Processa os dados consultados da API, transformando-os em um DataFrame 
@@ -154,55 +609,21 @@ def tratamento_categorias(lista):
         print(f"\nTotal de movimentos obtidos: {len(lista)}")
         # Criando DataFrame
         df = pd.json_normalize(lista)
-        # Corrige caracteres HTML escapados
-        for col in df.select_dtypes(include=[object]):  # Selecione apenas colunas de tipo string
-            df[col] = df[col].map(lambda x: html.unescape(x) if isinstance(x, str) else x)
+        # Corrige caracteres HTML escapados (cada valor distinto é tratado uma vez)
+        normalizar_texto(df, df.select_dtypes(include=[object]).columns)
         # criando coluna ID
         df['ID'] = df['codigo'].astype(str) + "_" + df['empresa'].astype(str)
-        colunas_renomear = {
-            'dadosDRE.codigoDRE': 'dre_codigoDRE',
-            'dadosDRE.descricaoDRE': 'dre_descricaoDRE',
-            'dadosDRE.naoExibirDRE': 'dre_naoExibirDRE',
-            'dadosDRE.nivelDRE': 'dre_nivelDRE',
-            'dadosDRE.sinalDRE': 'dre_sinalDRE',
-            'dadosDRE.totalizaDRE': 'dre_totalizaDRE'
-        }
-        df.rename(columns= colunas_renomear, inplace=True)
+        df.rename(columns=COLUNAS_RENOMEAR_CATEGORIAS, inplace=True)
         # Substituir valores vazios por NaN para colunas numéricas antes da conversão
         df['id_conta_contabil'] = pd.to_numeric(df['id_conta_contabil'], errors='coerce')
         df['dre_nivelDRE'] = pd.to_numeric(df['dre_nivelDRE'], errors='coerce')
 
-        tipos_colunas = {
-            'ID': 'string',
-            'codigo': 'string',
-            'empresa': 'string',
-            'descricao': 'string',
-            'descricao_padrao': 'string',
-            'tipo_categoria': 'string',
-            'conta_inativa': 'string',
-            'definida_pelo_usuario': 'string',
-            'id_conta_contabil': 'Int64',  # Pandas usa 'Int64' para suportar valores nulos
-            'tag_conta_contabil': 'string',
-            'conta_despesa': 'string',
-            'conta_receita': 'string',
-            'nao_exibir': 'string',
-            'natureza': 'string',
-            'totalizadora': 'string',
-            'transferencia': 'string',
-            'codigo_dre': 'string',
-            'categoria_superior': 'string',  # Pandas não tem tipo Text, 'string' equivale
-            'dre_codigoDRE': 'string',
-            'dre_descricaoDRE': 'string',
-            'dre_naoExibirDRE': 'string',
-            'dre_nivelDRE': 'Int64',
-            'dre_sinalDRE': 'string',
-            'dre_totalizaDRE': 'string'
-        }
-        df = df.astype(tipos_colunas)
+        df = df.astype(TIPOS_CATEGORIAS)
         return df
     else:
         print("Nenhum dado encontrado.")
 
+@medir_tratamento('orcamentos')
 def tratamento_orcamentos(lista):
     """
     Processa os dados consultados da API, transformando-os em um DataFrame 
@@ -219,22 +640,13 @@ def tratamento_orcamentos(lista):
         df = pd.json_normalize(data=lista)
         # criando coluna ID
         df['ID'] = df['cCodCateg'].astype(str) + "_" + df['empresa'].astype(str)
-        tipos_colunas = {
-            'ID': 'string',
-            'cCodCateg': 'string',
-            'cDesCateg': 'string',
-            'nValorPrevisto': 'float64',
-            'nValorRealizado': 'float64',
-            'nAno': 'Int64',
-            'nMes': 'Int64',
-            'empresa': 'string'
-        }
-        df = df.astype(tipos_colunas)
+        df = df.astype(TIPOS_ORCAMENTOS)
         return df
     else:
         print("Nenhum dado encontrado.")
 
 
+@medir_tratamento('dre')
 def tratamento_dre(lista):
     """
     Processa os dados consultados da API, transformando-os em um DataFrame 
@@ -251,17 +663,118 @@ def tratamento_dre(lista):
         df = pd.json_normalize(data=lista)
         # criando coluna ID
         df['ID'] = df['codigoDRE'].astype(str) + "_" + df['empresa'].astype(str)
-        tipos_colunas = {
-            'ID': 'string',
-            'codigoDRE': 'string',
-            'descricaoDRE': 'string',
-            'naoExibirDRE': 'string',
-            'nivelDRE': 'Int64',
-            'sinalDRE': 'string',
-            'totalizaDRE': 'string',
-            'empresa': 'string'
-        }
-        df = df.astype(tipos_colunas)
+        df = df.astype(TIPOS_DRE)
         return df
     else:
-        print("Nenhum dado encontrado.")
\ No newline at end of file
+        print("Nenhum dado encontrado.")
+
+
+def tratar_em_lotes(paginas, funcao):
+    """
+    Aplica uma função de tratamento a cada página de dados brutos, sem juntar as páginas em memória.
+
+    Parâmetros:
+        paginas (iterable): Listas de dados brutos, uma por página (ex: consultar_movimentos_paginas).
+        funcao (callable): Função de tratamento (ex: tratamento_movimentos).
+
+    Retorna:
+        generator: Um DataFrame tratado por página não vazia.
+    """
+    for pagina in paginas:
+        if pagina:
+            yield funcao(pagina)
+
+
+# Tratamento de cada tabela, usado por `tratar_em_paralelo`
+TRATAMENTOS = {
+    'movimentacoes': tratamento_movimentos,
+    'categorias': tratamento_categorias,
+    'orcamentos': tratamento_orcamentos,
+    'dre': tratamento_dre,
+}
+
+
+def tratar_em_paralelo(lista, tabela, processos=None):
+    """
+    Trata os registros brutos de uma tabela em um pool de processos, com o mesmo resultado do
+    tratamento em um único processo.
+
+    Os registros de movimentacoes são divididos por empresa (empresas muito maiores que as demais
+    são divididas em partes). Onde há fork, os processos filhos herdam a lista e recebem só as
+    posições da sua parte; nos demais sistemas (ex: Windows), cada parte vai como um único bloco
+    marshal, bem mais barato de serializar que o pickle dos dicionários. Os DataFrames tipados voltam
+    e são concatenados na ordem original dos registros. As tabelas de dimensão, pequenas, são
+    tratadas no próprio processo.
+
+    Parâmetros:
+        lista (list): Registros brutos de todas as empresas.
+        tabela (str): 'movimentacoes', 'categorias', 'orcamentos' ou 'dre'.
+        processos (int, opcional): Tamanho do pool; por padrão a quantidade de CPUs.
+
+    Retorna:
+        pandas.DataFrame: O mesmo DataFrame devolvido pelo tratamento da tabela.
+    """
+    processos = processos or os.cpu_count() or 1
+    if tabela != 'movimentacoes' or processos <= 1 or not lista:
+        return TRATAMENTOS[tabela](lista)
+    return _tratamento_movimentos_paralelo(lista, processos)
+
+
+def _particionar(lista, processos) -> list:
+    """Posições dos registros de cada parte: uma por empresa, no máximo ~len(lista)/processos registros cada."""
+    por_empresa = {}
+    for posicao, registro in enumerate(lista):
+        por_empresa.setdefault(registro.get('empresa'), []).append(posicao)
+    tamanho = max(1, -(-len(lista) // processos))
+    return [posicoes[inicio:inicio + tamanho]
+            for posicoes in por_empresa.values()
+            for inicio in range(0, len(posicoes), tamanho)]
+
+
+# Registros de `tratar_em_paralelo`, herdados pelos processos filhos criados por fork
+_registros_herdados = None
+
+
+def _tratar_particao(parte) -> tuple:
+    """Executado no processo filho: `parte` são as posições na lista herdada ou um bloco marshal."""
+    if isinstance(parte, bytes):
+        return _movimentos_tratados(marshal.loads(parte))
+    return _movimentos_tratados([_registros_herdados[posicao] for posicao in parte])
+
+
+@medir_tratamento('movimentacoes')
+def _tratamento_movimentos_paralelo(lista, processos):
+    particoes = _particionar(lista, processos)
+    if len(particoes) == 1:
+        return _movimentos_tratados(lista)[0]
+
+    global _registros_herdados
+    print(f"\nTotal de movimentos obtidos: {len(lista)}")
+    if 'fork' in multiprocessing.get_all_start_methods():
+        contexto = multiprocessing.get_context('fork')
+        partes = particoes
+        _registros_herdados = lista
+    else:
+        contexto = multiprocessing.get_context()
+        partes = (marshal.dumps([lista[posicao] for posicao in posicoes]) for posicoes in particoes)
+    try:
+        with ProcessPoolExecutor(max_workers=min(processos, len(particoes)), mp_context=contexto) as executor:
+            resultados = list(executor.map(_tratar_particao, partes))
+    finally:
+        _registros_herdados = None
+
+    # Uma coluna de texto ausente em uma parte sai como texto vazio; se ela apareceu em outra parte,
+    # no tratamento único seria nula nesses registros
+    ausentes_em_todas = set.intersection(*(set(ausentes) for _, ausentes in resultados))
+    frames = []
+    for df, ausentes in resultados:
+        for coluna in ausentes:
+            if coluna not in ausentes_em_todas and isinstance(df[coluna].dtype, pd.StringDtype):
+                df[coluna] = pd.array([pd.NA] * len(df), dtype=df[coluna].dtype)
+        frames.append(df)
+
+    df = pd.concat(frames, ignore_index=True)
+    posicoes = np.concatenate([np.asarray(posicoes) for posicoes in particoes])
+    if (np.diff(posicoes) < 0).any():
+        df = df.take(np.argsort(posicoes, kind='stable')).reset_index(drop=True)
+    return df
@@ -0,0 +1,73 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+# Arquivo onde fica a data/hora da última alteração já carregada de cada empresa
+ARQUIVO_WATERMARK = "watermarks.json"
+
+_lock = threading.Lock()
+
+
+def ler_watermark(empresa: str, arquivo: str = ARQUIVO_WATERMARK):
+    """
+    Retorna a data/hora da última alteração de movimentos já carregada para a empresa.
+
+    Retorno:
+        datetime | None: None quando a empresa ainda não teve uma carga incremental.
+    """
+    with _lock:
+        marcas = _ler_arquivo(arquivo)
+    valor = marcas.get(empresa)
+    return datetime.fromisoformat(valor) if valor else None
+
+
+def salvar_watermarks(novas: dict, arquivo: str = ARQUIVO_WATERMARK):
+    """
+    Persiste as watermarks das empresas informadas, mantendo as demais.
+
+    A gravação é feita em um arquivo temporário e renomeada, para não corromper o arquivo
+    caso o processo seja interrompido.
+
+    Parâmetros:
+        novas (dict): empresa -> datetime da última alteração carregada.
+        arquivo (str, opcional): Caminho do arquivo de watermarks.
+    """
+    with _lock:
+        marcas = _ler_arquivo(arquivo)
+        for empresa, valor in novas.items():
+            if valor is not None:
+                marcas[empresa] = valor.isoformat()
+        temporario = f"{arquivo}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(marcas, f, indent=2, ensure_ascii=False)
+        os.replace(temporario, arquivo)
+
+
+def calcular_watermark(movimentos: list):
+    """
+    Calcula a maior data/hora de alteração (dDtAlt + cHrAlt) entre os movimentos brutos da API.
+
+    Retorno:
+        datetime | None: None quando nenhum movimento possui data de alteração válida.
+    """
+    maior = None
+    for movimento in movimentos:
+        detalhes = movimento.get("detalhes", {})
+        data = detalhes.get("dDtAlt")
+        if not data:
+            continue
+        try:
+            alterado = datetime.strptime(f"{data} {detalhes.get('cHrAlt') or '00:00:00'}", "%d/%m/%Y %H:%M:%S")
+        except ValueError:
+            continue
+        if maior is None or alterado > maior:
+            maior = alterado
+    return maior
+
+
+def _ler_arquivo(arquivo):
+    if not os.path.exists(arquivo):
+        return {}
+    with open(arquivo, encoding="utf-8") as f:
+        return json.load(f)